@@ -1,43 +1,87 @@
 # ...existing code...
 from urllib.parse import quote
 import os
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, Response, stream_with_context
 import hashlib
-import httpx
-from supabase import create_client, Client
+from supabase import Client
 from dotenv import load_dotenv
-from supabase.lib.client_options import ClientOptions as SyncClientOptions 
 from functools import wraps
 from flask import Flask, render_template, session, redirect, url_for, flash
 from datetime import datetime, timedelta 
 import calendar
+import json
+import time
 import uuid
-from supabase import create_client, Client
-from redesign_app import redesign_bp
+from redesign_app import (
+    redesign_bp, designer_recommender, designer_profiles, designer_facets, designer_search, designer_written
+)
+from data_access import (
+    fan_out, coalesced, get_supabase, toggle_row, count_round_trips, finish_round_trips
+)
+from designer_stats import DesignerStatsStore
+from designer_listing import list_designers, parse_listing_args, InvalidListingQuery, SORTS, STYLE_OPTIONS, CARD_COLUMNS
+from facet_index import parse_facet_args
+from favorites_feed import favorites_page, InvalidFeedCursor, FAVORITES_PAGE_SIZE
+from llm_client import get_llm
+from estimate_cache import EstimateCache, normalize_estimate_inputs
+from budget_model import estimate as estimate_costs, local_recommendations
+from project_schedule import schedule, ScheduleError
+from json_stream import JsonEventParser
+from instance_paths import INSTANCE_DIR
+from werkzeug.utils import secure_filename
 import requests
 
 load_dotenv()
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-# Custom httpx client (development only)
-http_client = httpx.Client(verify=False)
-
-options = SyncClientOptions(
-    httpx_client=http_client
-)
+# Shared with the redesign blueprint: one client and connection pool per process
+supabase: Client = get_supabase()
+# One Gemini client and set of model handles per worker
+llm = get_llm()
+estimate_cache = EstimateCache()
 
-supabase: Client = create_client(
-    SUPABASE_URL,
-    SUPABASE_KEY,
-    options=options
-)
-
-app = Flask(__name__)
+# The local stores already write under INSTANCE_DIR (see instance_paths.py)
+app = Flask(__name__, instance_path=INSTANCE_DIR)
 app.secret_key = os.getenv("SECRET_KEY", "supersecretkey_fallback")
 
 app.register_blueprint(redesign_bp, url_prefix='/redesign') 
 
+# Per-route round trips are listed by /redesign/health (with HEALTH_DETAIL);
+# the response header exposes backend detail, so it is only sent in debug or
+# when asked for
+DB_ROUND_TRIP_HEADER = os.getenv("DB_ROUND_TRIP_HEADER", "false").lower() in ("1", "true", "yes")
+
+
+@app.before_request
+def start_round_trip_count():
+    count_round_trips()
+
+
+@app.after_request
+def report_round_trips(response):
+    route = f"{request.method} {request.url_rule.rule if request.url_rule else 'unmatched'}"
+    round_trips = finish_round_trips(route)
+    if app.debug or DB_ROUND_TRIP_HEADER:
+        response.headers["X-DB-Round-Trips"] = str(round_trips)
+    return response
+
+
+# Per-designer dashboard aggregates, maintained on write (see designer_stats.py)
+designer_stats = DesignerStatsStore()
+
+
+@app.cli.command("rebuild-designer-search")
+def rebuild_designer_search():
+    """Re-index every designer into the local full-text search index"""
+    count = designer_search.rebuild()
+    print(f"Indexed {count} designers for search")
+
+
+@app.cli.command("rebuild-designer-stats")
+def rebuild_designer_stats():
+    """Recompute every designer's stats rollup from Supabase"""
+    count = designer_stats.rebuild_all(supabase)
+    print(f"Rebuilt stats for {count} designers")
+
 # Utility: simple password hashing
 def hash_password(password: str) -> str:
     return hashlib.sha256(password.encode()).hexdigest()
@@ -247,6 +291,7 @@ def signup():
                 insert_response = supabase.table("designers").insert(designer_payload).execute()
                 
                 if insert_response.data:
+                    designer_written(insert_response.data[0]["id"], insert_response.data[0])
                     designer_name= insert_response.data[0]["designer_name"]
                     flash(f"Registration complete! Welcome, {designer_name}", "success")
                     return redirect(url_for("login_designer")) 
@@ -346,15 +391,30 @@ def dashboard():
         print(f"Logged-in designer email: {email}")
         print("====================================")
 
+        # Aggregates come from the designer_stats rollup; only what the page
+        # renders row by row is fetched from Supabase
+        results, _ = fan_out({
+            "designer": lambda: designer_profiles.get_by_email(email),
+            "portfolio": lambda: (
+                supabase.table("designer_portfolio")
+                .select("id, project_title, room_type, image_url")
+                .filter("designer_email", "eq", email)
+                .execute()
+            ),
+            "upcoming": lambda: (
+                supabase.table("designer_bookings")
+                .select("id, user_name, booking_date, booking_status, notes")
+                .filter("designer_email", "eq", email)
+                .not_.is_("booking_date", "null")
+                .order("booking_date")
+                .limit(3)
+                .execute()
+            ),
+            "stats": lambda: designer_stats.dashboard_summary(email, supabase),
+        }, label="designer dashboard")
+
         # Fetch designer record
-        designer_res = (
-            supabase.table("designers")
-            .select("*")
-            .filter("email", "eq", email)
-            .limit(1)
-            .execute()
-        )
-        designer = designer_res.data[0] if designer_res.data else None
+        designer = results["designer"]
         if not designer:
             flash("Designer not found.", "danger")
             print(f"No designer found for: {email}")
@@ -363,99 +423,28 @@ def dashboard():
         print(f"Designer found: {designer.get('designer_name', 'Unknown')}")
 
         # ---------- PORTFOLIO ----------
-        portfolio_res = (
-            supabase.table("designer_portfolio")
-            .select("*")
-            .filter("designer_email", "eq", email)
-            .execute()
-        )
-        portfolio = portfolio_res.data or []
+        portfolio = results["portfolio"].data or []
         print(f"Portfolio fetched: {len(portfolio)} items")
 
-        # ---------- REVIEWS ----------
-        review_res = (
-            supabase.table("designer_reviews")
-            .select("*")
-            .filter("designer_email", "eq", email)
-            .execute()
-        )
-        reviews = review_res.data or []
-        avg_rating = round(sum([r["rating"] for r in reviews]) / len(reviews), 1) if reviews else 0
-        total_reviews = len(reviews)
-        print(f"Reviews fetched: {total_reviews} (Avg Rating: {avg_rating})")
-
-        # ---------- BOOKINGS ----------
-        booking_res = (
-            supabase.table("designer_bookings")
-            .select("*")
-            .filter("designer_email", "eq", email)
-            .execute()
-        )
-        bookings = booking_res.data or []
-        print(f"Bookings fetched: {len(bookings)}")
-
-        # ---------- CALCULATIONS ----------
-        total_projects = len(portfolio)
-        now = datetime.now()
-        current_month = calendar.month_abbr[now.month]
-
-        monthly_bookings = len([
-            b for b in bookings
-            if b.get("created_at") and b["created_at"][:7] == now.strftime("%Y-%m")
-        ])
-
-        # ---------- EARNINGS ----------
-        total_earnings = 0
-        pending_earnings = 0
-        for b in bookings:
-            notes = b.get("notes", "")
-            digits = "".join([c for c in notes if c.isdigit()])
-            amount = int(digits) if digits else 0
-
-            status = b.get("booking_status", "").lower()
-            if status in ["confirmed", "completed"]:
-                total_earnings += amount
-            elif status == "pending":
-                pending_earnings += amount
-
-        print(f"Total Earnings: Rs.{total_earnings:,} | Pending: Rs.{pending_earnings:,}")
+        # ---------- STATS ROLLUP ----------
+        stats = results["stats"]
+        current_month = calendar.month_abbr[datetime.now().month]
+        print(f"Reviews: {stats['total_reviews']} (Avg Rating: {stats['avg_rating']})")
+        print(f"Total Earnings: Rs.{stats['total_earnings']:,} | Pending: Rs.{stats['pending_earnings']:,}")
 
         # ---------- UPCOMING SCHEDULE ----------
-        upcoming_schedule = sorted(
-            [b for b in bookings if b.get("booking_date")],
-            key=lambda x: x["booking_date"]
-        )[:3]
+        upcoming_schedule = results["upcoming"].data or []
         print(f"Upcoming Meetings: {len(upcoming_schedule)}")
 
-        # ---------- POPULAR STYLES ----------
-        style_count = {}
-        for p in portfolio:
-            style = p.get("design_style")
-            if style:
-                style_count[style] = style_count.get(style, 0) + 1
-
-        total_styles = sum(style_count.values())
-        popular_styles = [
-            {"style": s, "percent": round((c / total_styles) * 100, 1)}
-            for s, c in sorted(style_count.items(), key=lambda x: x[1], reverse=True)
-        ] if total_styles else []
-        print(f"Popular Styles Found: {len(popular_styles)}")
-
         # ---------- RENDER DESIGNER DASHBOARD ----------
         return render_template(
             "dashboard_designer.html",
             user=user,
             designer=designer,
             portfolio=portfolio,
-            avg_rating=avg_rating,
-            total_reviews=total_reviews,
-            total_projects=total_projects,
-            monthly_bookings=monthly_bookings,
             upcoming_schedule=upcoming_schedule,
-            total_earnings=total_earnings,
-            pending_earnings=pending_earnings,
-            popular_styles=popular_styles,
             current_month=current_month,
+            **stats,
         )
 
     except Exception as e:
@@ -464,6 +453,22 @@ def dashboard():
         return redirect(url_for("index"))
 
 
+def designer_card(d):
+    """Shape a recommender result for the homeowner dashboard's designer cards"""
+    name = d.get("designer_name") or "Designer"
+    low, high = d.get("budget_range_min"), d.get("budget_range_max")
+    return {
+        "id": d["id"],
+        "initials": "".join(part[0] for part in name.split()[:2]).upper(),
+        "name": name,
+        "style": " & ".join(d.get("design_styles") or []) or "Interior Design",
+        "rating": d.get("rating", 0),
+        "reviews": d.get("total_reviews", 0),
+        "location": d.get("location") or "N/A",
+        "budget": f"₹{low // 1000}K - ₹{high // 1000}K" if low is not None and high is not None else "On request",
+    }
+
+
 # --- *** NEW ROUTE *** ---
 # --- THIS IS THE USER (HOMEOWNER) DASHBOARD ---
 @app.route("/user_dashboard")
@@ -526,14 +531,19 @@ def user_dashboard():
             "trending": "Modern Minimalist"
         }
 
-        # Example: Fetch recommended designers
-        # designers_res = supabase.table("designers").select("*").limit(3).execute()
-        # recommended_designers = designers_res.data or []
-        recommended_designers = [
-            {"initials": "PS", "name": "Priya Sharma", "style": "Modern & Contemporary", "rating": 4.9, "reviews": 127, "location": "Mumbai", "budget": "₹15K - ₹50K"},
-            {"initials": "AP", "name": "Arjun Patel", "style": "Scandinavian & Minimalist", "rating": 4.8, "reviews": 89, "location": "Bangalore", "budget": "₹20K - ₹60K"},
-            {"initials": "KR", "name": "Kavya Reddy", "style": "Traditional & Fusion", "rating": 4.9, "reviews": 156, "location": "Hyderabad", "budget": "₹18K - ₹45K", "available": True},
-        ]
+        # Recommended designers, scored against the homeowner's own preferences
+        try:
+            matches = designer_recommender.recommend(
+                styles=homeowner.get("user_styles"),
+                room_type=(homeowner.get("user_rooms") or [None])[0],
+                budget=homeowner.get("user_budget"),
+                city=homeowner.get("user_city"),
+                k=3
+            )
+        except Exception as e:
+            print(f"Designer recommendation error: {e}")
+            matches = []
+        recommended_designers = [designer_card(d) for d in matches]
 
         # ---------- RENDER HOMEOWNER DASHBOARD ----------
         return render_template(
@@ -576,10 +586,9 @@ def designer_profile():
 
     try:
         # Fetch the full designer profile from the 'designers' table
-        response = supabase.table("designers").select("*").eq("id", user_id).execute()
+        designer_data = designer_profiles.get_by_id(user_id)
         
-        if response.data:
-            designer_data = response.data[0]
+        if designer_data:
             # Use the correct template name
             return render_template("portfolio_designer.html", designer=designer_data) 
         else:
@@ -643,6 +652,7 @@ def update_designer_profile():
         update_response = supabase.table("designers").update(update_payload).eq("id", user_id).execute()
         
         if update_response.data:
+            designer_written(user_id, update_response.data[0])
             flash("Profile successfully updated!", "success")
         else:
             flash("Profile not updated. Data was the same or an issue occurred.", "warning")
@@ -717,6 +727,7 @@ def add_portfolio_item():
     try:
         response = supabase.table("designer_portfolio").insert(new_project).execute()
         if response.data:
+            designer_stats.record_portfolio_item(designer_email, response.data[0].get("design_style"))
             return jsonify({"success": True, "project": response.data[0]})
         else:
             return jsonify({"success": False, "message": "Insert failed"}), 500
@@ -731,30 +742,32 @@ def add_portfolio_item():
 @login_required
 def browse_designers():
     """
-    Renders the page showing all designers.
+    Renders the first page of designers for the current filters; further
+    pages are loaded from /api/designers with the returned cursor.
     """
     user = session["user"]
-    user_id = user["id"] # This is the UUID from user_profiles
 
     try:
-        # 1. Fetch all designers from the database
-        designers_res = supabase.table("designers").select("*").execute()
-        all_designers = designers_res.data or []
+        filters = parse_listing_args(request.args)
+    except InvalidListingQuery as e:
+        flash(str(e), "warning")
+        return redirect(url_for("browse_designers"))
 
-        # 2. Fetch this user's existing favorites
-        favorites_res = supabase.table("saved_favorites").select("designer_id").eq("user_id", user_id).execute()
-        
-        # 3. Create a simple set of IDs for easy checking in the template
-        liked_designer_ids = {f["designer_id"] for f in (favorites_res.data or [])}
+    try:
+        designers, next_cursor = list_designers(supabase, filters)
+        liked_designer_ids = liked_among(user["id"], [d["id"] for d in designers])
 
-        print(f"Found {len(all_designers)} designers.")
-        print(f"User likes {len(liked_designer_ids)} designers.")
+        print(f"Found {len(designers)} designers (sort={filters['sort']}, more={bool(next_cursor)}).")
 
         return render_template(
             "browse_designers.html", 
             user=user, 
-            all_designers=all_designers,
-            liked_designer_ids=liked_designer_ids
+            all_designers=designers,
+            liked_designer_ids=liked_designer_ids,
+            filters=filters,
+            next_cursor=next_cursor,
+            style_options=STYLE_OPTIONS,
+            sort_options=list(SORTS)
         )
 
     except Exception as e:
@@ -763,6 +776,90 @@ def browse_designers():
         return redirect(url_for("user_dashboard"))
 
 
+@app.route("/api/designers")
+@login_required
+def api_list_designers():
+    """One page of designer cards as JSON, for infinite scroll"""
+    try:
+        filters = parse_listing_args(request.args)
+        designers, next_cursor = list_designers(supabase, filters)
+    except InvalidListingQuery as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"ERROR listing designers: {e}")
+        return jsonify({"error": "Could not load designers."}), 500
+
+    liked = liked_among(session["user"]["id"], [d["id"] for d in designers])
+    # The rows may be shared with concurrent requests (see coalesced); annotate copies
+    designers = [{**d, "liked": d["id"] in liked} for d in designers]
+    return jsonify({"designers": designers, "next_cursor": next_cursor})
+
+
+@app.route("/api/designers/facets")
+@login_required
+def api_designer_facets():
+    """
+    Faceted search over the designers' array attributes, e.g.
+    ?design_styles=Modern&design_styles=Minimalist&cities_served.all=Pune&extra_services.none=3D Rendering
+    Returns the matching total, per-value facet counts and one page of cards.
+    """
+    try:
+        limit = max(1, min(int(request.args.get("limit", 24)), 100))
+        offset = max(0, int(request.args.get("offset", 0)))
+    except ValueError:
+        return jsonify({"error": "limit and offset must be integers"}), 400
+
+    try:
+        result = designer_facets.search(parse_facet_args(request.args), limit=limit, offset=offset)
+        designers = []
+        if result["ids"]:
+            res = supabase.table("designers").select(CARD_COLUMNS).in_("id", result["ids"]).execute()
+            by_id = {str(d["id"]): d for d in (res.data or [])}
+            designers = [by_id[i] for i in result["ids"] if i in by_id]
+    except Exception as e:
+        print(f"ERROR searching designer facets: {e}")
+        return jsonify({"error": "Could not search designers."}), 500
+
+    return jsonify({
+        "total": result["total"],
+        "facets": result["facets"],
+        "designers": designers,
+        "took_ms": result["took_ms"],
+    })
+
+
+@app.route("/api/designers/search")
+@login_required
+def api_search_designers():
+    """Ranked free-text search over names, studios, specialisations, bios and awards"""
+    text = (request.args.get("q") or "").strip()
+    try:
+        limit = max(1, min(int(request.args.get("limit", 20)), 50))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if not text:
+        return jsonify({"query": text, "results": []})
+
+    try:
+        results = designer_search.search(text, limit=limit)
+    except Exception as e:
+        print(f"ERROR searching designers: {e}")
+        return jsonify({"error": "Search is unavailable right now."}), 500
+    return jsonify({"query": text, "results": results})
+
+
+def liked_among(user_id, designer_ids):
+    """Which of these designers the user has saved (one query bounded by the page)"""
+    if not designer_ids:
+        return set()
+    res = supabase.table("saved_favorites") \
+        .select("designer_id") \
+        .eq("user_id", user_id) \
+        .in_("designer_id", designer_ids) \
+        .execute()
+    return {f["designer_id"] for f in (res.data or [])}
+
+
 # The route MUST have <string:designer_id> because it's a UUID
 @app.route("/api/designer/<string:designer_id>/like", methods=["POST"])
 @login_required
@@ -772,90 +869,69 @@ def like_designer(designer_id):
     user_id = user["id"] # This is the user's UUID
     
     try:
-        # This query now works (UUID == UUID and UUID == UUID)
-        existing_like = supabase.table("saved_favorites") \
-            .select("id") \
-            .eq("user_id", user_id) \
-            .eq("designer_id", designer_id) \
-            .execute()
-
-        if existing_like.data:
-            # It exists, so UN-like (DELETE)
-            supabase.table("saved_favorites").delete().eq("id", existing_like.data[0]["id"]).execute()
+        # Delete-or-insert: the delete tells us whether the like existed
+        liked = toggle_row(supabase, "saved_favorites", {"user_id": user_id, "designer_id": designer_id})
+        if not liked:
             print(f"User {user_id} UN-liked designer {designer_id}")
             return jsonify({"status": "unliked", "designer_id": designer_id})
-        
-        else:
-            # It does not exist, so LIKE (INSERT)
-            new_like = {
-                "user_id": user_id,       # This is a UUID
-                "designer_id": designer_id  # This is also a UUID (as a string)
-            }
-            # This insert will now work
-            supabase.table("saved_favorites").insert(new_like).execute()
-            print(f"User {user_id} LIKED designer {designer_id}")
-            return jsonify({"status": "liked", "designer_id": designer_id})
+
+        print(f"User {user_id} LIKED designer {designer_id}")
+        return jsonify({"status": "liked", "designer_id": designer_id})
 
     except Exception as e:
         # The REAL error will be printed in your terminal
         print(f"ERROR LIKING DESIGNER: {e}") 
         return jsonify({"error": str(e)}), 500
 
+
 # ... (add this with your other @app.route functions)
 
 @app.route("/saved_favorites")
 @login_required
 def saved_favorites():
     """
-    Renders the page showing BOTH saved designers and saved AI designs.
+    Renders the first page of saved designers and saved AI designs, newest
+    first; later pages come from /api/favorites with the returned cursor.
     """
     user = session["user"]
     user_id = user["id"]
-    
-    all_favorites = []
 
     try:
-        # 1. Fetch Saved Designers
-        designers_res = supabase.table("saved_favorites") \
-            .select("designer_id, designers(*)") \
-            .eq("user_id", user_id) \
-            .execute()
-
-        for f in (designers_res.data or []):
-            if f.get("designers"):
-                designer_data = f["designers"]
-                designer_data["favorite_type"] = "designer" # Add a type
-                # Get the 'created_at' from the join table to allow sorting
-                designer_data["saved_at"] = f.get("created_at", "1970-01-01T00:00:00Z")
-                all_favorites.append(designer_data)
-
-        # 2. Fetch Saved AI Designs
-        ai_designs_res = supabase.table("saved_ai_designs") \
-            .select("*") \
-            .eq("user_id", user_id) \
-            .execute()
-        
-        for d in (ai_designs_res.data or []):
-            d["favorite_type"] = "ai_image" # Add a type
-            d["saved_at"] = d.get("created_at", "1970-01-01T00:00:00Z")
-            all_favorites.append(d)
-        
-        # 3. Sort all favorites by creation/saved date, newest first
-        all_favorites.sort(key=lambda x: x["saved_at"], reverse=True)
-
-        print(f"User {user_id} has {len(all_favorites)} total saved items.")
+        all_favorites, next_cursor = favorites_page(supabase, user_id)
+        print(f"User {user_id}: showing {len(all_favorites)} saved items (more={bool(next_cursor)}).")
 
         return render_template(
             "saved_favorites.html",
             user=user,
-            all_favorites=all_favorites
+            all_favorites=all_favorites,
+            next_cursor=next_cursor
         )
 
     except Exception as e:
         print(f"ERROR fetching all favorites: {e}")
         flash("Could not load your saved favorites.", "danger")
         return redirect(url_for("user_dashboard"))
-    
+
+
+@app.route("/api/favorites")
+@login_required
+def api_favorites():
+    """The next page of the saved favorites feed as JSON"""
+    try:
+        limit = int(request.args.get("limit", FAVORITES_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    try:
+        items, next_cursor = favorites_page(supabase, session["user"]["id"], request.args.get("cursor"), limit)
+    except InvalidFeedCursor as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"ERROR fetching favorites page: {e}")
+        return jsonify({"error": "Could not load favorites."}), 500
+    return jsonify({"items": items, "next_cursor": next_cursor})
+
+
 @app.route("/designer/<string:designer_id>")
 @login_required
 def view_designer(designer_id):
@@ -865,32 +941,28 @@ def view_designer(designer_id):
     user = session["user"] # For the layout
 
     try:
-        # 1. Fetch the designer's main profile
-        designer_res = supabase.table("designers") \
-            .select("*") \
-            .eq("id", designer_id) \
-            .limit(1) \
-            .execute()
-
-        if not designer_res.data:
+        # 1. Profile and portfolio in one embedded select; a shared designer
+        # link brings many identical reads at once, so concurrent requests
+        # share that one call
+        rows = coalesced(
+            supabase.table("designers")
+            .select("*, designer_portfolio(*)")
+            .eq("id", designer_id)
+            .order("uploaded_at", desc=True, foreign_table="designer_portfolio")
+            .limit(1)
+        ).data
+        if not rows:
             flash("Sorry, that designer could not be found.", "danger")
             return redirect(request.referrer or url_for("user_dashboard"))
 
-        designer = designer_res.data[0]
-
-        # 2. Fetch all portfolio projects for that designer
-        portfolio_res = supabase.table("designer_portfolio") \
-            .select("*") \
-            .eq("designer_id", designer_id) \
-            .order("uploaded_at", desc=True) \
-            .execute()
-            
-        portfolio_projects = portfolio_res.data or []
+        # Copy: the coalesced response is shared with concurrent requests
+        designer = dict(rows[0])
+        portfolio_projects = designer.pop("designer_portfolio", None) or []
 
         print(f"Viewing profile for {designer['designer_name']}")
         print(f"Found {len(portfolio_projects)} portfolio projects.")
 
-        # 3. Render the new template
+        # 2. Render the new template
         return render_template(
             "designer_portfolio_public.html",
             user=user,
@@ -913,11 +985,10 @@ def book_consultation(designer_id):
     Shows the booking form (GET) and handles the submission (POST).
     """
     user = session["user"]
-    designer_res = supabase.table("designers").select("*").eq("id", designer_id).limit(1).execute()
-    if not designer_res.data:
+    designer = designer_profiles.get_by_id(designer_id)
+    if not designer:
         flash("Sorry, that designer could not be found.", "danger")
         return redirect(url_for("browse_designers"))
-    designer = designer_res.data[0]
 
     if request.method == "POST":
         try:
@@ -935,7 +1006,11 @@ def book_consultation(designer_id):
                 "notes": notes,
                 "booking_status": "pending"
             }
-            supabase.table("designer_bookings").insert(new_booking).execute()
+            insert_res = supabase.table("designer_bookings").insert(new_booking).execute()
+            if insert_res.data:
+                designer_stats.record_booking(
+                    designer["email"], insert_res.data[0].get("created_at"), notes, "pending"
+                )
             flash("Consultation requested! The designer will be notified.", "success")
             return redirect(url_for("my_consultations"))
         except Exception as e:
@@ -991,37 +1066,54 @@ def update_booking_status(booking_id):
         return jsonify({"error": "Invalid status."}), 400
 
     try:
-        # Check that this designer owns this booking
-        booking_res = supabase.table("designer_bookings") \
-            .select("id, designer_id") \
-            .eq("id", booking_id) \
-            .eq("designer_id", user["id"]) \
-            .limit(1) \
-            .execute()
-
-        if not booking_res.data:
-            return jsonify({"error": "Booking not found or permission denied."}), 404
-
-        # Update the booking
-        update_res = supabase.table("designer_bookings") \
-            .update({"booking_status": new_status}) \
-            .eq("id", booking_id) \
-            .execute()
-
+        # Ownership is part of the update's filter, so no separate check is
+        # needed. Bookings being answered are normally still pending, which
+        # also tells the stats rollup which earnings bucket to move from.
+        def set_status(only_pending):
+            query = supabase.table("designer_bookings") \
+                .update({"booking_status": new_status}) \
+                .eq("id", booking_id) \
+                .eq("designer_id", user["id"])
+            if only_pending:
+                query = query.eq("booking_status", "pending")
+            return query.execute()
+
+        update_res = set_status(only_pending=True)
         if update_res.data:
-            print(f"Designer {user['id']} updated booking {booking_id} to {new_status}")
-            return jsonify({
-                "status": "success", 
-                "new_status": new_status,
-                "booking_id": booking_id
-            }), 200
+            booking = update_res.data[0]
+            designer_stats.record_booking_status(booking["designer_email"], booking.get("notes"), "pending", new_status)
         else:
-            raise Exception("Supabase update returned no data.")
+            update_res = set_status(only_pending=False)
+            if not update_res.data:
+                return jsonify({"error": "Booking not found or permission denied."}), 404
+            # Previous status unknown here; let the rollup rebuild this designer
+            designer_stats.invalidate(update_res.data[0]["designer_email"])
+
+        print(f"Designer {user['id']} updated booking {booking_id} to {new_status}")
+        return jsonify({
+            "status": "success", 
+            "new_status": new_status,
+            "booking_id": booking_id
+        }), 200
 
     except Exception as e:
         print(f"ERROR updating booking: {e}")
         return jsonify({"error": str(e)}), 500
     
+# ---------- Server-Sent Events ----------
+
+def sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+def sse_response(events):
+    return Response(
+        stream_with_context(events),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 # ---------- Budget Estimator API (FINAL) ----------
 
 
@@ -1031,81 +1123,39 @@ def budget_estimator_page():
     user = session["user"]
     return render_template("budget_estimator.html", user=user)
 
-@app.route("/api/estimate_generate", methods=["POST"])
-@login_required
-def estimate_generate():
-    import json
-    import google.generativeai as genai
-    import os
-    from urllib.parse import quote # Crucial for Pollinations URL
+ESTIMATE_FIELDS = [
+    "location", "area", "home_type", "style",
+    "material", "user_budget", "room_type", "color_palette"
+]
 
+
+def read_estimate_request():
+    """(raw form, normalised inputs, None) or (None, None, error response)"""
     data = request.get_json(silent=True)
 
     if not data:
-        return jsonify({"success": False, "error": "No JSON received"}), 400
-
-    required = [
-        "location", "area", "home_type", "style",
-        "material", "user_budget", "room_type", "color_palette"
-    ]
+        return None, None, (jsonify({"success": False, "error": "No JSON received"}), 400)
 
-    missing = [f for f in required if f not in data]
+    missing = [f for f in ESTIMATE_FIELDS if f not in data]
     if missing:
-        return jsonify({"success": False, "error": f"Missing fields: {missing}"}), 400
-
-    # Configure Gemini
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-
-    system_prompt = """
-    You are an expert interior design budget estimator.
-    Output ONLY valid JSON in this format:
-    {
-      "estimated_cost": number,
-      "breakdown": {
-        "Furniture": number,
-        "Kitchen": number,
-        "Paint": number,
-        "Electricals": number,
-        "Civil": number,
-        "Misc": number
-      },
-      "recommendations": ["string", "string"]
-    }
-    """
-
-    user_prompt = f"""
-    Estimate interior design cost.
-
-    City: {data['location']}
-    Area: {data['area']}
-    Home Type: {data['home_type']}
-    Style: {data['style']}
-    Material Quality: {data['material']}
-    User Budget: {data['user_budget']}
-    """
+        return None, None, (jsonify({"success": False, "error": f"Missing fields: {missing}"}), 400)
 
-    # -----------------------------
-    # 1️⃣ COST ESTIMATE (Gemini) - CORRECTED MODEL
-    # -----------------------------
     try:
-        model = genai.GenerativeModel("gemini-2.5-flash") # <-- Corrected to free-tier model
-
-        response = model.generate_content(
-            system_prompt + "\n" + user_prompt,
-            generation_config={"response_mime_type": "application/json"}
-        )
+        return data, normalize_estimate_inputs(data), None
+    except ValueError as e:
+        return None, None, (jsonify({"success": False, "error": str(e)}), 400)
 
-        print("Gemini Raw Output:", response.text)
 
-        cost_data = json.loads(response.text)
+def local_estimate(inputs):
+    start = time.perf_counter()
+    cost_data = estimate_costs(inputs)
+    print(f"[ESTIMATE] {inputs['location']} {inputs['area']} sq.ft. {inputs['material']}: "
+          f"₹{cost_data['estimated_cost']:,} in {(time.perf_counter() - start) * 1e6:.0f} µs")
+    return cost_data
 
-    except Exception as e:
-        print("Gemini cost estimation error:", e)
-        return jsonify({"success": False, "error": str(e)}), 500
 
-    # -----------------------------
-    # 2️⃣ IMAGE GENERATION (Pollinations.ai) - FREE SOLUTION
-    # -----------------------------
+def estimate_image_url(data):
+    # Pollinations.ai renders from the URL itself - FREE SOLUTION
     image_prompt = (
         f"{data['room_type']} interior in {data['style']} style, "
         f"{data['color_palette']} colors, high quality, realistic render, premium materials"
@@ -1121,19 +1171,17 @@ def estimate_generate():
             f"?width=1024&height=1024&nologo=true&model=flux" 
         )
         print("Pollinations Image URL:", image_url)
-
+        return image_url
 
     except Exception as e:
         print("Pollinations image URL generation error:", e)
-        image_url = None
+        return None
 
-    # -----------------------------
-    # 3️⃣ SAVE TO SUPABASE
-    # -----------------------------
+
+def save_estimate(user_id, data, cost_data, image_url):
     try:
-        # NOTE: Assumes 'supabase' object is defined globally or passed in.
         supabase.table("budget_estimates").insert({
-            "user_id": session["user"]["id"],
+            "user_id": user_id,
             "location": data["location"],
             "area": data["area"],
             "home_type": data["home_type"],
@@ -1147,16 +1195,124 @@ def estimate_generate():
     except Exception as e:
         print("Supabase Insert Error:", e)
 
-    # -----------------------------
+
+def recommendations_prompt(inputs, cost_data):
+    system_prompt = """
+    You are an expert interior design budget advisor.
+    Given a project and its cost estimate in INR, give 3 short, specific recommendations.
+    Output ONLY valid JSON in this format:
+    {
+      "recommendations": ["string", "string", "string"]
+    }
+    """
+
+    # Built from the normalised inputs, so the cached answer matches the prompt
+    user_prompt = f"""
+    City: {inputs['location']}
+    Area: {inputs['area']} sq.ft.
+    Home Type: {inputs['home_type']}
+    Style: {inputs['style']}
+    Material Quality: {inputs['material']}
+    User Budget: {inputs['user_budget']}
+    Estimated Cost: {cost_data['estimated_cost']}
+    Breakdown: {json.dumps(cost_data['breakdown'])}
+    """
+    return system_prompt + "\n" + user_prompt
+
+
+def valid_recommendations(recommendations):
+    return isinstance(recommendations, list) and bool(recommendations) and all(isinstance(r, str) for r in recommendations)
+
+
+@app.route("/api/estimate_generate", methods=["POST"])
+@login_required
+def estimate_generate():
+    data, inputs, error = read_estimate_request()
+    if error:
+        return error
+
+    # 1️⃣ COST ESTIMATE (local cost model)
+    cost_data = local_estimate(inputs)
+
+    # Gemini is only asked on the streaming endpoint; here a cached answer or the local tips
+    cached = estimate_cache.peek(inputs) if llm.enabled else None
+    if cached:
+        recommendations = cached.get("recommendations", [])
+    else:
+        recommendations = local_recommendations(inputs, cost_data)
+
+    # 2️⃣ IMAGE GENERATION (Pollinations.ai)
+    image_url = estimate_image_url(data)
+
+    # 3️⃣ SAVE TO SUPABASE
+    save_estimate(session["user"]["id"], data, cost_data, image_url)
+
     # 4️⃣ SEND TO FRONTEND
-    # -----------------------------
     return jsonify({
         "success": True,
         "estimated_cost": cost_data["estimated_cost"],
         "breakdown": cost_data["breakdown"],
         "image_url": image_url,
-        "recommendations": cost_data.get("recommendations", [])
+        "recommendations": recommendations
     })
+
+
+@app.route("/api/estimate_generate/stream", methods=["POST"])
+@login_required
+def estimate_generate_stream():
+    """
+    Server-Sent Events: `estimated_cost`, one `breakdown` per category and
+    `image` straight away, then one `recommendation` per tip as Gemini streams
+    it (cached or local tips when Gemini is off or fails), then `done`.
+    """
+    data, inputs, error = read_estimate_request()
+    if error:
+        return error
+    user_id = session["user"]["id"]
+
+    def events():
+        cost_data = local_estimate(inputs)
+        yield sse_event("estimated_cost", {"estimated_cost": cost_data["estimated_cost"], "user_budget": inputs["user_budget"]})
+        for category, amount in cost_data["breakdown"].items():
+            yield sse_event("breakdown", {"category": category, "amount": amount})
+        image_url = estimate_image_url(data)
+        yield sse_event("image", {"image_url": image_url})
+        save_estimate(user_id, data, cost_data, image_url)
+
+        cached = estimate_cache.peek(inputs) if llm.enabled else None
+        if cached:
+            source, recommendations = "cache", cached.get("recommendations", [])
+        elif llm.enabled:
+            source, recommendations, streamed = "llm", [], []
+
+            def gemini_recommendations():
+                parser, tips = JsonEventParser(max_depth=2), []
+                for chunk in llm.stream_json(recommendations_prompt(inputs, cost_data)):
+                    for path, value in parser.feed(chunk):
+                        if len(path) == 2 and path[0] == "recommendations" and isinstance(value, str):
+                            tips.append(value)
+                            yield path[1], value
+                if parser.done and valid_recommendations(tips):
+                    estimate_cache.put(inputs, {"recommendations": tips})
+
+            try:
+                # Identical estimates submitted meanwhile follow this one Gemini stream
+                for index, text in estimate_cache.share_stream(inputs, gemini_recommendations):
+                    streamed.append(text)
+                    yield sse_event("recommendation", {"index": index, "text": text})
+            except Exception as e:
+                print("Gemini recommendations error:", e)
+            if not streamed:
+                # Nothing arrived from Gemini; fall back to the local tips
+                source, recommendations = "local", local_recommendations(inputs, cost_data)
+        else:
+            source, recommendations = "local", local_recommendations(inputs, cost_data)
+
+        for index, text in enumerate(recommendations):
+            yield sse_event("recommendation", {"index": index, "text": text})
+        yield sse_event("done", {"recommendations_source": source})
+
+    return sse_response(events())
 #-----------------project timeline---------------------
 # Add this import at the top of your app.py file
 
@@ -1168,28 +1324,31 @@ def project_timeline_page():
     user = session["user"]
     return render_template("project_timeline.html",user=user)
 
-# --- New API Endpoint ---
-@app.route("/api/timeline_generate", methods=["POST"])
-@login_required
-def timeline_generate():
-    import json
-    import google.generativeai as genai
-    import os
-    from datetime import datetime, timedelta
-
+def read_timeline_request():
+    """(request data, scheduled timeline, None) or (None, None, error response)"""
     data = request.get_json(silent=True)
 
     required_budget = ["start_date", "area", "home_type", "style", "material"]
-    if any(f not in data for f in required_budget):
-        return jsonify({"success": False, "error": "Missing required project base fields for timeline"}), 400
+    if not data or any(f not in data for f in required_budget):
+        return None, None, (jsonify({"success": False, "error": "Missing required project base fields for timeline"}), 400)
 
     # Retrieve core budget inputs
-    area = int(data.get('area', 1500))
+    try:
+        area = int(float(data.get('area', 1500)))
+        work_week_days = int(data.get('work_week', 5))
+    except (TypeError, ValueError):
+        return None, None, (jsonify({"success": False, "error": "area and work_week must be numbers"}), 400)
     material = data.get('material', 'Premium')
     project_start = data['start_date']
+
+    holidays = data.get("holidays") or []
+    if not isinstance(holidays, list) or not all(isinstance(h, str) for h in holidays):
+        return None, None, (jsonify({"success": False, "error": "holidays must be a list of YYYY-MM-DD strings"}), 400)
+    holiday_calendar = data.get("holiday_calendar") or None
+    if holiday_calendar is not None and not isinstance(holiday_calendar, str):
+        return None, None, (jsonify({"success": False, "error": "holiday_calendar must be a string"}), 400)
     
     # Retrieve new optional inputs (with defaults)
-    work_week_days = int(data.get('work_week', 5))
     site_complexity = data.get('site_complexity', 'Easy')
     decision_speed = data.get('decision_speed', 'Standard')
 
@@ -1233,61 +1392,101 @@ def timeline_generate():
     # Phase 4 remains fixed
     installation_weeks = 1 
     
-    # Configure Gemini
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-
-    # 2. Gemini System Prompt (Define the rules and output format)
-    # UPDATED: Now uses the dynamic work_week_days variable
-    system_prompt = f"""
-    You are an expert interior design project scheduler.
-    Your task is to calculate the start and end dates for a sequential 4-phase project timeline based on the client's inputs and assumed phase durations.
-    - Assume a {work_week_days}-day work week. If {work_week_days} is 5, assume Mon-Fri. If 6, assume Mon-Sat. If 7, assume all days. Do not include non-working days in the duration calculation.
-    - Output ONLY valid JSON in the specified format.
-    - Provide realistic, descriptive text for the 'details' field for each phase.
-    """ + json.dumps({
-        "total_project_days": "number (total duration including weekends)",
-        "end_date": "YYYY-MM-DD (final project completion date)",
-        "phases": [
-            {
-                "name": "string (Concept & Design, Procurement & Manufacturing, On-Site Execution & Civil Works, Installation & Styling)",
-                "duration_weeks": "number",
-                "details": "string (brief description of the work)",
-                "start_date": "YYYY-MM-DD",
-                "end_date": "YYYY-MM-DD"
-            }
-        ]
-    })
-    
-    # 3. Gemini User Prompt (Provide the inputs and calculated durations)
-    # UPDATED: Uses the modified phase durations
-    user_prompt = f"""
-    Calculate a project timeline.
-    Project Start Date: {project_start} (Must be the start of Phase 1)
+    # 2. Dates from the local working-day scheduler (sequential phases)
+    phases = [
+        {"name": "Concept & Design", "duration_weeks": concept_weeks,
+         "details": "Site measurement, mood boards, layouts and 3D views, ending with design sign-off."},
+        {"name": "Procurement & Manufacturing", "duration_weeks": procurement_weeks,
+         "details": f"Ordering {material.lower()} materials and fittings; factory production of modular furniture and kitchen."},
+        {"name": "On-Site Execution & Civil Works", "duration_weeks": execution_weeks,
+         "details": "Civil changes, false ceiling, electrical and plumbing work, flooring and painting."},
+        {"name": "Installation & Styling", "duration_weeks": installation_weeks,
+         "details": "Installing furniture and fixtures, soft furnishings, deep cleaning and handover."},
+    ]
+    try:
+        timeline_data = schedule(
+            project_start,
+            phases,
+            work_week_days=work_week_days,
+            holidays=holidays,
+            calendar=holiday_calendar
+        )
+    except ScheduleError as e:
+        return None, None, (jsonify({"success": False, "error": str(e)}), 400)
 
-    Phase 1 (Concept & Design): {concept_weeks} weeks (Fixed/Adjusted)
-    Phase 2 (Procurement & Manufacturing): {procurement_weeks} weeks (Material-Based/Adjusted)
-    Phase 3 (On-Site Execution & Civil Works): {execution_weeks} weeks (Area-Based/Adjusted)
-    Phase 4 (Installation & Styling): {installation_weeks} week (Fixed)
-    
-    Ensure the start date of each phase is the day immediately following the end date of the previous phase.
-    Return the full JSON.
+    return data, timeline_data, None
+
+
+def timeline_details_prompt(data, timeline_data):
+    """Ask Gemini for project-specific phase descriptions only; the dates stay local"""
+    phases = [{"name": p["name"], "duration_weeks": p["duration_weeks"]} for p in timeline_data["phases"]]
+    return f"""
+    You are an expert interior design project planner.
+    Write one or two sentences describing the work in each phase of this project.
+    Output ONLY valid JSON mapping each phase name to its description.
+
+    Area: {data['area']} sq.ft.
+    Home Type: {data['home_type']}
+    Style: {data['style']}
+    Material Quality: {data['material']}
+    Site Complexity: {data.get('site_complexity', 'Easy')}
+    Phases: {json.dumps(phases)}
     """
-    # 4. API Call and Response
-    try:
-        model = genai.GenerativeModel("gemini-2.5-flash")
 
-        response = model.generate_content(
-            system_prompt + "\n" + user_prompt,
-            generation_config={"response_mime_type": "application/json"}
-        )
 
-        timeline_data = json.loads(response.text)
-        return jsonify({"success": True, "timeline": timeline_data})
+# --- New API Endpoint ---
+@app.route("/api/timeline_generate", methods=["POST"])
+@login_required
+def timeline_generate():
+    data, timeline_data, error = read_timeline_request()
+    if error:
+        return error
 
-    except Exception as e:
-        print("Gemini timeline estimation error:", e)
-        # Fallback error for non-Gemini related issues like network or JSON parsing
-        return jsonify({"success": False, "error": str(e)}), 500
+    # Optional: Gemini rewrites the built-in phase details
+    if data.get("ai_details") and llm.enabled:
+        try:
+            details = llm.generate_json(timeline_details_prompt(data, timeline_data))
+            for phase in timeline_data["phases"]:
+                if isinstance(details.get(phase["name"]), str):
+                    phase["details"] = details[phase["name"]]
+        except Exception as e:
+            print("Gemini timeline details error:", e)
+
+    return jsonify({"success": True, "timeline": timeline_data})
+
+
+@app.route("/api/timeline_generate/stream", methods=["POST"])
+@login_required
+def timeline_generate_stream():
+    """
+    Server-Sent Events: `summary` (end_date, total_project_days, working_days)
+    and one `phase` per phase straight away; with ai_details, a `phase_details`
+    event as each of Gemini's descriptions finishes streaming; then `done`.
+    """
+    data, timeline_data, error = read_timeline_request()
+    if error:
+        return error
+
+    def events():
+        yield sse_event("summary", {k: v for k, v in timeline_data.items() if k != "phases"})
+        for phase in timeline_data["phases"]:
+            yield sse_event("phase", phase)
+
+        source = "local"
+        if data.get("ai_details") and llm.enabled:
+            names = {phase["name"] for phase in timeline_data["phases"]}
+            try:
+                parser = JsonEventParser(max_depth=1)
+                for chunk in llm.stream_json(timeline_details_prompt(data, timeline_data)):
+                    for (name,), details in parser.feed(chunk):
+                        if name in names and isinstance(details, str):
+                            yield sse_event("phase_details", {"name": name, "details": details})
+                            source = "llm"
+            except Exception as e:
+                print("Gemini timeline details error:", e)
+        yield sse_event("done", {"details_source": source})
+
+    return sse_response(events())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,195 @@
+"""
+Interior AI - Blob Store
+Generated images are written once to local disk, named by the SHA-256 of
+their bytes, and referenced everywhere by a short URL instead of a base64
+data URL. Because a blob's name is its content, it never changes and can be
+cached by browsers forever.
+
+The store is capped at BLOB_STORE_MAX_MB and evicts least recently served
+blobs first. Blobs a user saved are pinned (moved under pinned/) and are
+never evicted.
+"""
+
+import base64
+import hashlib
+import os
+import re
+import threading
+from typing import Optional, Tuple
+
+from instance_paths import instance_path
+
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", instance_path("blobs"))
+# Where the blueprint's blob route is mounted (app.py registers it under /redesign)
+BLOB_URL_PREFIX = os.getenv("BLOB_URL_PREFIX", "/redesign/blobs")
+BLOB_STORE_MAX_MB = int(os.getenv("BLOB_STORE_MAX_MB", "1024"))
+
+BLOB_NAME_RE = re.compile(r"^[0-9a-f]{64}\.(png|jpg|webp|gif)$")
+
+MIME_TYPES = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "webp": "image/webp",
+    "gif": "image/gif",
+}
+
+
+def sniff_extension(data: bytes) -> str:
+    """Pick a file extension from the image's magic bytes (PNG if unknown)"""
+    if data.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    return "png"
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        return 0.0
+
+
+class BlobStore:
+    def __init__(
+        self,
+        directory: str = BLOB_STORE_DIR,
+        url_prefix: str = BLOB_URL_PREFIX,
+        max_bytes: int = BLOB_STORE_MAX_MB * 1024 * 1024
+    ):
+        self.directory = directory
+        self.url_prefix = url_prefix.rstrip("/")
+        self.max_bytes = max_bytes
+        self.pinned_directory = os.path.join(directory, "pinned")
+        self._lock = threading.Lock()
+        self.stats = {"stores": 0, "evictions": 0, "pins": 0}
+
+        os.makedirs(self.pinned_directory, exist_ok=True)
+        self._used = sum(os.path.getsize(path) for path in self._evictable_files())
+
+    def put(self, data: bytes) -> str:
+        """Store bytes (no-op if already present) and return the blob name"""
+        name = f"{hashlib.sha256(data).hexdigest()}.{sniff_extension(data)}"
+        if self._find(name):
+            return name
+
+        path = self._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._used += len(data)
+            self.stats["stores"] += 1
+        self._evict()
+        return name
+
+    def pin(self, name: str) -> bool:
+        """Exempt a blob from eviction (e.g. once a user saves the design)"""
+        if not BLOB_NAME_RE.match(name):
+            return False
+        pinned = self._pinned_path(name)
+        if os.path.isfile(pinned):
+            return True
+
+        path = self._path(name)
+        try:
+            size = os.path.getsize(path)
+            os.makedirs(os.path.dirname(pinned), exist_ok=True)
+            os.replace(path, pinned)
+        except FileNotFoundError:
+            # Evicted before anyone saved it
+            return False
+        with self._lock:
+            self._used -= size
+            self.stats["pins"] += 1
+        return True
+
+    def pin_url(self, url: str) -> bool:
+        """pin() for a URL returned by url(); other URLs are ignored"""
+        if not url or not url.startswith(f"{self.url_prefix}/"):
+            return False
+        return self.pin(url[len(self.url_prefix) + 1:])
+
+    def path(self, name: str) -> Optional[str]:
+        """Local file for a stored blob, or None"""
+        if not BLOB_NAME_RE.match(name):
+            return None
+        return self._find(name)
+
+    def url(self, name: str) -> str:
+        return f"{self.url_prefix}/{name}"
+
+    def put_url(self, data: bytes) -> str:
+        return self.url(self.put(data))
+
+    def locate(self, name: str) -> Optional[Tuple[str, str]]:
+        """Return (path, mimetype) for a valid, existing blob name"""
+        match = BLOB_NAME_RE.match(name)
+        if not match:
+            return None
+        path = self._find(name)
+        if not path:
+            return None
+        if path != self._pinned_path(name):
+            try:
+                # mtime doubles as "last served" for eviction
+                os.utime(path)
+            except FileNotFoundError:
+                return None
+        return path, MIME_TYPES[match.group(1)]
+
+    def get_stats(self):
+        with self._lock:
+            return {**self.stats, "bytes": self._used, "max_bytes": self.max_bytes}
+
+    def from_data_url(self, value: str) -> Optional[str]:
+        """Move a `data:image/...;base64,` string into the store; returns its URL"""
+        if not value or not value.startswith("data:") or ";base64," not in value:
+            return None
+        try:
+            data = base64.b64decode(value.split(";base64,", 1)[1])
+        except Exception:
+            return None
+        return self.put_url(data)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name[:2], name)
+
+    def _pinned_path(self, name: str) -> str:
+        return os.path.join(self.pinned_directory, name[:2], name)
+
+    def _find(self, name: str) -> Optional[str]:
+        for path in (self._pinned_path(name), self._path(name)):
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def _evictable_files(self):
+        for root, dirs, files in os.walk(self.directory):
+            if root == self.directory:
+                dirs[:] = [d for d in dirs if d != "pinned"]
+            for name in files:
+                if BLOB_NAME_RE.match(name):
+                    yield os.path.join(root, name)
+
+    def _evict(self):
+        if self._used <= self.max_bytes:
+            return
+
+        # Least recently served first, down to 90% so we do not evict on every put
+        target = int(self.max_bytes * 0.9)
+        for path in sorted(self._evictable_files(), key=_mtime):
+            if self._used <= target:
+                break
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            with self._lock:
+                self._used -= size
+                self.stats["evictions"] += 1
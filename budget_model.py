@@ -0,0 +1,147 @@
+"""
+Interior AI - Budget Cost Model
+Deterministic, local interior cost estimates, so the budget estimator's
+numbers no longer wait on an LLM round trip. Every category in the breakdown
+is priced as
+
+    effective area x base rate x city factor x material multiplier x style factor
+
+except Kitchen, which is a lump sum per home type through the same
+multipliers. Effective area grows slightly slower than floor area (bigger
+homes get cheaper per sq.ft.). City factors blend a labour index and a
+goods index by each category's labour share: paint and civil work track local
+wages, furniture mostly does not.
+
+All the arithmetic runs on (n, categories) NumPy arrays. One call prices any
+number of input rows, e.g. every material and style combination for the
+"what would fit my budget" suggestions.
+
+Rates are 2024 metro averages in INR and are meant to be tuned here.
+"""
+
+import itertools
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+CATEGORIES = ("Furniture", "Kitchen", "Paint", "Electricals", "Civil", "Misc")
+
+# INR per sq.ft. at Premium / Modern in a reference city (Kitchen is priced per home)
+BASE_RATES = np.array([700.0, 0.0, 55.0, 140.0, 210.0, 70.0])
+# Share of each category's cost that is site labour
+LABOUR_SHARE = np.array([0.2, 0.3, 0.7, 0.5, 0.7, 0.4])
+
+# Premium / Modern kitchen per home type
+KITCHEN_LUMP_SUMS = {"1BHK": 150000.0, "2BHK": 220000.0, "3BHK": 300000.0, "4BHK": 380000.0, "VILLA": 480000.0}
+
+# canonical city -> (labour index, goods index); see estimate_cache.canonical_city
+CITY_INDEX = {
+    "Mumbai": (1.25, 1.05),
+    "Delhi": (1.05, 1.0),
+    "Gurugram": (1.12, 1.02),
+    "Noida": (1.0, 1.0),
+    "Bengaluru": (1.0, 1.0),
+    "Pune": (0.95, 0.98),
+    "Hyderabad": (0.92, 0.97),
+    "Chennai": (0.92, 0.98),
+    "Kolkata": (0.85, 0.97),
+    "Ahmedabad": (0.85, 0.95),
+    "Kochi": (0.9, 0.98),
+    "Mysuru": (0.8, 0.95),
+}
+DEFAULT_CITY_INDEX = (0.88, 0.97)
+
+MATERIAL_MULTIPLIERS = {
+    "Basic": np.array([0.6, 0.65, 0.75, 0.75, 0.85, 0.8]),
+    "Premium": np.ones(len(CATEGORIES)),
+    "Luxury": np.array([1.9, 2.0, 1.5, 1.6, 1.3, 1.5]),
+}
+STYLE_FACTORS = {
+    "Minimal": np.array([0.85, 0.9, 0.95, 0.9, 0.9, 0.8]),
+    "Modern": np.ones(len(CATEGORIES)),
+    "Luxury": np.array([1.35, 1.3, 1.2, 1.25, 1.15, 1.3]),
+}
+
+# Effective area = REFERENCE_AREA * (area / REFERENCE_AREA) ** AREA_EXPONENT
+REFERENCE_AREA = 1000.0
+AREA_EXPONENT = 0.92
+ROUND_TO = 1000
+
+
+def _kitchen(home_type: str, area: float) -> float:
+    if home_type in KITCHEN_LUMP_SUMS:
+        return KITCHEN_LUMP_SUMS[home_type]
+    # Unknown home type: size the kitchen from the floor area
+    return float(np.interp(area, [500, 1200, 1800, 3000], [150000, 220000, 300000, 480000]))
+
+
+def price(rows: Sequence[Dict]) -> np.ndarray:
+    """
+    Price normalised estimator inputs (see estimate_cache.normalize_estimate_inputs).
+    Returns an (n, len(CATEGORIES)) array of INR, rounded to ROUND_TO.
+    """
+    ones = np.ones(len(CATEGORIES))
+    area = np.array([float(r["area"]) for r in rows])
+    city = np.array([CITY_INDEX.get(r["location"], DEFAULT_CITY_INDEX) for r in rows])
+    material = np.stack([MATERIAL_MULTIPLIERS.get(r["material"], ones) for r in rows])
+    style = np.stack([STYLE_FACTORS.get(r["style"], ones) for r in rows])
+    kitchen = np.array([_kitchen(r["home_type"], float(r["area"])) for r in rows])
+
+    effective_area = REFERENCE_AREA * (area / REFERENCE_AREA) ** AREA_EXPONENT
+    city_factor = city[:, :1] * LABOUR_SHARE + city[:, 1:] * (1 - LABOUR_SHARE)
+
+    base = effective_area[:, None] * BASE_RATES
+    base[:, CATEGORIES.index("Kitchen")] = kitchen
+    costs = base * city_factor * material * style
+    return np.round(costs / ROUND_TO) * ROUND_TO
+
+
+def estimate(inputs: Dict) -> Dict:
+    """{"estimated_cost", "breakdown"} for one set of normalised inputs"""
+    costs = price([inputs])[0]
+    return {
+        "estimated_cost": int(costs.sum()),
+        "breakdown": {category: int(cost) for category, cost in zip(CATEGORIES, costs)},
+    }
+
+
+def local_recommendations(inputs: Dict, estimated: Dict) -> List[str]:
+    """Budget advice computed from the model itself; used when Gemini is off or slow"""
+    budget = inputs["user_budget"]
+    total = estimated["estimated_cost"]
+    breakdown = estimated["breakdown"]
+    tips = []
+
+    combos = [
+        dict(inputs, material=material, style=style)
+        for material, style in itertools.product(MATERIAL_MULTIPLIERS, STYLE_FACTORS)
+    ]
+    totals = price(combos).sum(axis=1)
+
+    if total > budget:
+        fitting = [(t, c) for t, c in zip(totals, combos) if t <= budget]
+        if fitting:
+            # The fitting option closest to what was asked for
+            best_total, best = max(fitting, key=lambda f: f[0])
+            tips.append(
+                f"{best['material']} materials with a {best['style']} style come to about "
+                f"₹{int(best_total):,}, within your ₹{int(budget):,} budget."
+            )
+        else:
+            tips.append(
+                f"Even Basic materials with a Minimal style come to about ₹{int(totals.min()):,}; "
+                f"consider doing the work in phases or raising the budget."
+            )
+    elif total < 0.8 * budget:
+        upgrades = [(t, c) for t, c in zip(totals, combos) if total < t <= budget]
+        if upgrades:
+            best_total, best = max(upgrades, key=lambda f: f[0])
+            tips.append(
+                f"You have room to upgrade: {best['material']} materials with a {best['style']} style "
+                f"come to about ₹{int(best_total):,}."
+            )
+
+    largest = max(breakdown, key=breakdown.get)
+    tips.append(f"{largest} is the largest share of the estimate ({breakdown[largest] / total:.0%}).")
+    tips.append("Keep 10-15% of the budget aside for contingencies and design changes.")
+    return tips
@@ -0,0 +1,404 @@
+"""
+Interior AI - Data Access Helpers
+Shared helpers for talking to Supabase from the Flask views.
+
+get_supabase() returns the one Supabase client of this process. app.py and
+the redesign blueprint both use it, so they share one tuned httpx connection
+pool: SUPABASE_MAX_CONNECTIONS / SUPABASE_MAX_KEEPALIVE /
+SUPABASE_KEEPALIVE_EXPIRY, optional HTTP/2 (SUPABASE_HTTP2, needs `h2`), and
+up to SUPABASE_READ_RETRIES jittered retries for GET/HEAD on connection
+errors and 502/504. 503 (and 520) is left to postgrest's own send_with_retry,
+so a failing read is retried by one layer only. pool_stats() reports in-flight requests, peak use
+against the pool size, new vs. reused connections and pool timeouts.
+
+fan_out() sends independent queries at the same time on a shared thread
+pool, so a view that needs four tables waits for the slowest query rather
+than the sum of all of them.
+
+coalesced() executes a read through a single-flight group: identical
+requests (same table, filters, projection and caller credentials) that are
+in flight at the same moment share one upstream call and its response. The
+shared response must be treated as read-only.
+
+Round trips are counted per Flask request (count_round_trips() /
+finish_round_trips()), so each route's database chattiness is visible in
+round_trip_stats() and, in debug or with DB_ROUND_TRIP_HEADER set, the
+X-DB-Round-Trips header. tests/test_round_trips.py pins the counts of the
+hot routes against a fake PostgREST. toggle_row(), the profile cache and
+the conditional updates in the views keep those counts low.
+"""
+
+import contextvars
+import hashlib
+import importlib.util
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+from supabase import Client, create_client
+from supabase.lib.client_options import SyncClientOptions
+
+load_dotenv()
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+SUPABASE_MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "20"))
+SUPABASE_MAX_KEEPALIVE = int(os.getenv("SUPABASE_MAX_KEEPALIVE", "10"))
+SUPABASE_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "30"))
+SUPABASE_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "5"))
+SUPABASE_READ_TIMEOUT = float(os.getenv("SUPABASE_READ_TIMEOUT", "30"))
+# How long a query may wait for a free pooled connection
+SUPABASE_POOL_TIMEOUT = float(os.getenv("SUPABASE_POOL_TIMEOUT", "10"))
+SUPABASE_HTTP2 = os.getenv("SUPABASE_HTTP2", "false").lower() in ("1", "true", "yes")
+SUPABASE_READ_RETRIES = int(os.getenv("SUPABASE_READ_RETRIES", "2"))
+SUPABASE_RETRY_BACKOFF = float(os.getenv("SUPABASE_RETRY_BACKOFF", "0.2"))
+# The app has always talked to Supabase with verify=False; keep that unless asked
+SUPABASE_VERIFY_SSL = os.getenv("SUPABASE_VERIFY_SSL", "false").lower() in ("1", "true", "yes")
+
+# postgrest already retries GET/HEAD on 503 and 520; retrying those here as
+# well would multiply into up to 12 upstream requests per read
+RETRY_STATUSES = (502, 504)
+
+
+# ===========================
+# SHARED CLIENT
+# ===========================
+
+class PooledTransport(httpx.BaseTransport):
+    """HTTP transport with pool metrics and retries for idempotent reads"""
+
+    def __init__(self, http2: bool):
+        self.http2 = http2
+        self.max_connections = SUPABASE_MAX_CONNECTIONS
+        self._inner = httpx.HTTPTransport(
+            http2=http2,
+            verify=SUPABASE_VERIFY_SSL,
+            limits=httpx.Limits(
+                max_connections=SUPABASE_MAX_CONNECTIONS,
+                max_keepalive_connections=SUPABASE_MAX_KEEPALIVE,
+                keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY
+            )
+        )
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.new_connections = 0
+        self.retries = 0
+        self.errors = 0
+        self.pool_timeouts = 0
+        self.total_seconds = 0.0
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        idempotent = request.method in ("GET", "HEAD")
+        attempts = SUPABASE_READ_RETRIES + 1 if idempotent else 1
+        outer_trace = request.extensions.get("trace")
+
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            opened = []
+
+            def trace(event_name: str, info: Dict):
+                # httpcore only connects when no pooled connection was free
+                if event_name == "connection.connect_tcp.complete":
+                    opened.append(event_name)
+                if outer_trace:
+                    outer_trace(event_name, info)
+
+            request.extensions = {**request.extensions, "trace": trace}
+            with self._lock:
+                counter = _round_trips.get()
+                if counter is not None:
+                    counter[0] += 1
+                self.requests += 1
+                self.in_flight += 1
+                self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            start = time.perf_counter()
+            try:
+                response = self._inner.handle_request(request)
+            except httpx.PoolTimeout:
+                # The pool is saturated; retrying would only add to the queue
+                with self._lock:
+                    self.pool_timeouts += 1
+                raise
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadTimeout, httpx.RemoteProtocolError):
+                with self._lock:
+                    self.errors += 1
+                if last:
+                    raise
+                self._backoff(attempt)
+                continue
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+                    self.new_connections += len(opened)
+                    self.total_seconds += time.perf_counter() - start
+
+            if idempotent and response.status_code in RETRY_STATUSES and not last:
+                # Drain the (small) error body so the connection goes back to the pool
+                response.read()
+                response.close()
+                self._backoff(attempt)
+                continue
+            return response
+
+    def _backoff(self, attempt: int):
+        with self._lock:
+            self.retries += 1
+        # Full jitter keeps a burst of failed reads from retrying in lockstep
+        time.sleep(random.uniform(0, SUPABASE_RETRY_BACKOFF * (2 ** attempt)))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "http2": self.http2,
+                "max_connections": self.max_connections,
+                "requests": self.requests,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "peak_utilisation": round(self.peak_in_flight / self.max_connections, 3),
+                "new_connections": self.new_connections,
+                "reused_connections": max(0, self.requests - self.in_flight - self.new_connections),
+                "retries": self.retries,
+                "errors": self.errors,
+                "pool_timeouts": self.pool_timeouts,
+                "avg_seconds": round(self.total_seconds / self.requests, 4) if self.requests else 0.0,
+            }
+
+    def close(self):
+        self._inner.close()
+
+
+# Per-request round-trip counter; a one-element list so copied contexts share it
+_round_trips: contextvars.ContextVar[Optional[List[int]]] = contextvars.ContextVar("supabase_round_trips", default=None)
+_route_lock = threading.Lock()
+_route_stats: Dict[str, Dict[str, int]] = {}
+
+_client: Optional[Client] = None
+_transport: Optional[PooledTransport] = None
+_client_lock = threading.Lock()
+
+
+def get_supabase() -> Client:
+    """The process-wide Supabase client, created on first use"""
+    global _client, _transport
+    with _client_lock:
+        if _client is None:
+            http2 = SUPABASE_HTTP2
+            if http2 and importlib.util.find_spec("h2") is None:
+                print("[WARNING] SUPABASE_HTTP2 is set but the 'h2' package is missing; using HTTP/1.1")
+                http2 = False
+            _transport = PooledTransport(http2)
+            http_client = httpx.Client(
+                transport=_transport,
+                timeout=httpx.Timeout(
+                    connect=SUPABASE_CONNECT_TIMEOUT,
+                    read=SUPABASE_READ_TIMEOUT,
+                    write=SUPABASE_READ_TIMEOUT,
+                    pool=SUPABASE_POOL_TIMEOUT
+                ),
+                follow_redirects=True
+            )
+            _client = create_client(SUPABASE_URL, SUPABASE_KEY, options=SyncClientOptions(httpx_client=http_client))
+        return _client
+
+
+def count_round_trips():
+    """Start counting Supabase round trips for the current request"""
+    _round_trips.set([0])
+
+
+def finish_round_trips(route: str) -> int:
+    """Stop counting, add the count to the route's totals and return it"""
+    counter = _round_trips.get()
+    _round_trips.set(None)
+    count = counter[0] if counter else 0
+    with _route_lock:
+        entry = _route_stats.setdefault(route, {"requests": 0, "round_trips": 0, "max": 0})
+        entry["requests"] += 1
+        entry["round_trips"] += count
+        entry["max"] = max(entry["max"], count)
+    return count
+
+
+def round_trip_stats() -> Dict[str, Dict]:
+    with _route_lock:
+        return {
+            route: {**entry, "avg": round(entry["round_trips"] / entry["requests"], 2)}
+            for route, entry in sorted(_route_stats.items())
+        }
+
+
+def pool_stats() -> Dict:
+    return _transport.stats() if _transport else {}
+
+
+# ===========================
+# FAN-OUT
+# ===========================
+
+QUERY_FANOUT_WORKERS = int(os.getenv("QUERY_FANOUT_WORKERS", "16"))
+# Per-request budget for a whole fan-out
+QUERY_DEADLINE_SECONDS = float(os.getenv("QUERY_DEADLINE_SECONDS", "10"))
+
+_executor = ThreadPoolExecutor(max_workers=QUERY_FANOUT_WORKERS, thread_name_prefix="supabase-query")
+
+
+class QueryDeadlineExceeded(Exception):
+    """One or more fanned-out queries did not finish within the deadline"""
+
+
+def _timed(query: Callable[[], Any]) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    result = query()
+    return result, time.perf_counter() - start
+
+
+def fan_out(
+    queries: Dict[str, Callable[[], Any]],
+    deadline: float = QUERY_DEADLINE_SECONDS,
+    label: str = "fan-out"
+) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Run each named zero-argument callable concurrently.
+    Returns ({name: result}, {name: seconds}). The first query error is
+    re-raised; queries still running at the deadline raise
+    QueryDeadlineExceeded.
+    """
+    start = time.perf_counter()
+    # Each query runs in a copy of the caller's context so its round trips are counted
+    futures = {
+        name: _executor.submit(contextvars.copy_context().run, _timed, query)
+        for name, query in queries.items()
+    }
+    done, pending = wait(futures.values(), timeout=deadline)
+
+    if pending:
+        for future in pending:
+            future.cancel()
+        late = [name for name, future in futures.items() if future in pending]
+        raise QueryDeadlineExceeded(f"{label}: {', '.join(late)} still running after {deadline}s")
+
+    results, timings = {}, {}
+    for name, future in futures.items():
+        results[name], timings[name] = future.result()
+
+    total = time.perf_counter() - start
+    breakdown = ", ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in timings.items())
+    print(f"[QUERY] {label}: {total * 1000:.0f}ms total ({breakdown})")
+    return results, timings
+
+
+# ===========================
+# SINGLE-FLIGHT READS
+# ===========================
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executions = 0
+        self.collapsed = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.collapsed += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # Later callers start a fresh call; they must not see a stale result
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.executions + self.collapsed
+            return {
+                "executions": self.executions,
+                "collapsed": self.collapsed,
+                "collapse_ratio": round(self.collapsed / total, 3) if total else None,
+                "in_flight": len(self._calls),
+            }
+
+
+reads = SingleFlight()
+
+# Headers that change what a read returns
+_KEY_HEADERS = ("authorization", "apikey", "accept", "accept-profile", "prefer", "range")
+
+
+def _request_key(query) -> Optional[Tuple]:
+    request = getattr(query, "request", None)
+    if request is None or str(getattr(request, "http_method", "")).upper().split(".")[-1] not in ("GET", "HEAD"):
+        return None
+    headers = request.headers
+    # Hash credentials rather than keeping bearer tokens around as dict keys
+    identity = hashlib.sha256(
+        "\n".join(f"{h}={headers.get(h, '')}" for h in _KEY_HEADERS).encode()
+    ).hexdigest()
+    return (str(request.path), tuple(sorted(request.params.multi_items())), identity)
+
+
+def coalesced(query, scope=None):
+    """
+    Execute a postgrest read, sharing the call with identical concurrent reads.
+    Reads only share a call with reads passing the same `scope`, so a caller
+    can keep reads issued after a write from joining one started before it.
+    """
+    key = _request_key(query)
+    if key is None:
+        return query.execute()
+    if scope is not None:
+        key += (scope,)
+    return reads.do(key, query.execute)
+
+
+# ===========================
+# QUERY COMPOSITION
+# ===========================
+
+def toggle_row(client, table: str, match: Dict[str, Any], row: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    Flip whether a row matching `match` exists. The delete doubles as the
+    existence check, so removing costs one round trip and adding two, instead
+    of a select followed by a write. Returns True if the row exists afterwards.
+    """
+    query = client.table(table).delete()
+    for column, value in match.items():
+        query = query.eq(column, value)
+    if query.execute().data:
+        return False
+    client.table(table).insert({**match, **(row or {})}).execute()
+    return True
@@ -0,0 +1,263 @@
+"""
+Interior AI - Design Generation Jobs
+Background job queue for the redesign blueprint. Submitting a job returns an
+ID immediately; a small worker pool runs the generation and every finished
+design is written to a local SQLite store, so status can be polled from any
+worker process and finished jobs survive a restart.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from instance_paths import instance_path
+
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", instance_path("design_jobs.sqlite3"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Jobs (each holding a decoded upload) allowed to wait for a worker; beyond
+# this, submissions are turned away instead of queueing without limit
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "8"))
+# A queued/running job that has not been touched for this long belongs to a
+# worker that died; it is reported as "interrupted" instead of running forever.
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "900"))
+# Finished jobs are kept this long before being purged
+JOB_RETENTION_HOURS = int(os.getenv("JOB_RETENTION_HOURS", "72"))
+
+ACTIVE_STATUSES = ("queued", "running")
+FINAL_STATUSES = ("completed", "failed", "interrupted")
+
+
+# ===========================
+# PERSISTENT JOB STORE
+# ===========================
+
+class JobStore:
+    """SQLite store for jobs and the designs each job has produced so far"""
+
+    def __init__(self, path: str = JOB_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._conn()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                total INTEGER NOT NULL,
+                error TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS job_designs (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                design TEXT NOT NULL,
+                UNIQUE (job_id, position)
+            );
+            CREATE INDEX IF NOT EXISTS idx_job_designs_job ON job_designs (job_id, seq);
+        """)
+        self.expire_stale()
+        self.purge_finished()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections may not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.utcnow().isoformat()
+
+    def create(self, job_id: str, user_id: str, total: int):
+        now = self._now()
+        self._conn().execute(
+            "INSERT INTO jobs (id, user_id, status, total, created_at, updated_at) VALUES (?, ?, 'queued', ?, ?, ?)",
+            (job_id, user_id, total, now, now)
+        )
+
+    def start(self, job_id: str) -> bool:
+        """queued -> running; False if the job is no longer queued (e.g. reported interrupted)"""
+        cursor = self._conn().execute(
+            "UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ? AND status = 'queued'",
+            (self._now(), job_id)
+        )
+        return cursor.rowcount == 1
+
+    def set_status(self, job_id: str, status: str, error: Optional[str] = None):
+        self._conn().execute(
+            "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+            (status, error, self._now(), job_id)
+        )
+
+    def add_design(self, job_id: str, position: int, design: Dict):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO job_designs (job_id, position, design) VALUES (?, ?, ?)",
+                (job_id, position, json.dumps(design))
+            )
+            conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (self._now(), job_id))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(self, job_id: str, since: int = 0) -> Optional[Dict]:
+        """Return the job and the designs stored after sequence number `since`"""
+        conn = self._conn()
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not row:
+            return None
+
+        job = dict(row)
+        if job["status"] in ACTIVE_STATUSES and self._is_stale(job["updated_at"]):
+            job["status"] = "interrupted"
+            job["error"] = "The worker running this job stopped before it finished."
+            self.set_status(job_id, job["status"], job["error"])
+
+        design_rows = conn.execute(
+            "SELECT seq, position, design FROM job_designs WHERE job_id = ? AND seq > ? ORDER BY seq",
+            (job_id, since)
+        ).fetchall()
+        job["designs"] = [
+            {"seq": r["seq"], "position": r["position"], **json.loads(r["design"])}
+            for r in design_rows
+        ]
+        job["completed"] = conn.execute(
+            "SELECT COUNT(*) FROM job_designs WHERE job_id = ?", (job_id,)
+        ).fetchone()[0]
+        return job
+
+    def expire_stale(self):
+        """Mark jobs abandoned by a dead worker as interrupted"""
+        cutoff = (datetime.utcnow() - timedelta(seconds=JOB_STALE_SECONDS)).isoformat()
+        self._conn().execute(
+            "UPDATE jobs SET status = 'interrupted', updated_at = ? "
+            "WHERE status IN ('queued', 'running') AND updated_at < ?",
+            (self._now(), cutoff)
+        )
+
+    def purge_finished(self):
+        cutoff = (datetime.utcnow() - timedelta(hours=JOB_RETENTION_HOURS)).isoformat()
+        conn = self._conn()
+        conn.execute(
+            "DELETE FROM job_designs WHERE job_id IN "
+            "(SELECT id FROM jobs WHERE status NOT IN ('queued', 'running') AND updated_at < ?)",
+            (cutoff,)
+        )
+        conn.execute(
+            "DELETE FROM jobs WHERE status NOT IN ('queued', 'running') AND updated_at < ?",
+            (cutoff,)
+        )
+
+    @staticmethod
+    def _is_stale(updated_at: str) -> bool:
+        age = datetime.utcnow() - datetime.fromisoformat(updated_at)
+        return age.total_seconds() > JOB_STALE_SECONDS
+
+
+# ===========================
+# JOB QUEUE
+# ===========================
+
+class JobQueueFull(Exception):
+    """JOB_QUEUE_MAX jobs are already waiting for a worker"""
+
+
+class DesignJobQueue:
+    """
+    Runs generation jobs on a fixed pool of background threads.
+
+    `run_job(image, preferences, on_design)` does the actual work; it must call
+    `on_design(position, design_dict)` as each design finishes and return the
+    list of designs that succeeded.
+    """
+
+    def __init__(
+        self,
+        run_job: Callable,
+        store: Optional[JobStore] = None,
+        workers: int = JOB_WORKERS,
+        max_waiting: int = JOB_QUEUE_MAX
+    ):
+        self.run_job = run_job
+        self.store = store or JobStore()
+        self.workers = max(1, workers)
+        self.max_waiting = max_waiting
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="design-job")
+        self._lock = threading.Lock()
+        # Submitted and not yet finished, running ones included
+        self._pending = 0
+
+    def submit(self, user_id: str, image, preferences, total: int) -> str:
+        """Queue a job; raises JobQueueFull when max_waiting jobs are already waiting"""
+        with self._lock:
+            if self._pending >= self.workers + self.max_waiting:
+                raise JobQueueFull(f"{self._pending} generation jobs are already in progress")
+            self._pending += 1
+        try:
+            job_id = str(uuid.uuid4())
+            self.store.create(job_id, user_id, total)
+            self.executor.submit(self._run, job_id, image, preferences)
+        except Exception:
+            self._finished()
+            raise
+        print(f"[JOB] Queued {job_id} ({total} designs)")
+        return job_id
+
+    def _finished(self):
+        with self._lock:
+            self._pending -= 1
+
+    def get(self, job_id: str, since: int = 0) -> Optional[Dict]:
+        return self.store.get(job_id, since)
+
+    def _run(self, job_id: str, image, preferences):
+        try:
+            self._execute(job_id, image, preferences)
+        finally:
+            self._finished()
+
+    def _execute(self, job_id: str, image, preferences):
+        if not self.store.start(job_id):
+            # Waited so long it was reported interrupted; the client has moved on
+            print(f"[JOB] {job_id} is no longer queued; skipping")
+            return
+        try:
+            designs: List = self.run_job(
+                image,
+                preferences,
+                lambda position, design: self.store.add_design(job_id, position, design)
+            )
+        except Exception as e:
+            print(f"[JOB] {job_id} failed: {e}")
+            import traceback
+            traceback.print_exc()
+            self.store.set_status(job_id, "failed", str(e))
+            return
+
+        if designs:
+            self.store.set_status(job_id, "completed")
+            print(f"[JOB] {job_id} completed with {len(designs)} designs")
+        else:
+            self.store.set_status(
+                job_id, "failed",
+                "Could not generate designs. The API may be unavailable. Please try again later."
+            )
+            print(f"[JOB] {job_id} produced no designs")
@@ -0,0 +1,166 @@
+"""
+Interior AI - Design Store
+Keeps recently generated designs so a later "like" can find them. Two
+backends share the same get/put interface:
+
+- MemoryDesignStore: per-process, bounded by item count and bytes, with TTL
+  and LRU eviction.
+- SQLiteDesignStore: one local file shared by every worker process, so a like
+  can land on any gunicorn worker.
+
+Pick one with DESIGN_STORE=sqlite|memory.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from instance_paths import instance_path
+
+DESIGN_STORE = os.getenv("DESIGN_STORE", "sqlite")
+DESIGN_STORE_PATH = os.getenv("DESIGN_STORE_PATH", instance_path("designs.sqlite3"))
+DESIGN_STORE_TTL_SECONDS = int(os.getenv("DESIGN_STORE_TTL_SECONDS", str(24 * 3600)))
+DESIGN_STORE_MAX_ITEMS = int(os.getenv("DESIGN_STORE_MAX_ITEMS", "10000"))
+DESIGN_STORE_MAX_MB = int(os.getenv("DESIGN_STORE_MAX_MB", "32"))
+
+
+class MemoryDesignStore:
+    def __init__(
+        self,
+        ttl_seconds: int = DESIGN_STORE_TTL_SECONDS,
+        max_items: int = DESIGN_STORE_MAX_ITEMS,
+        max_bytes: int = DESIGN_STORE_MAX_MB * 1024 * 1024
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # design_id -> (expires_at, size, design)
+        self._items: "OrderedDict[str, Tuple[float, int, Dict]]" = OrderedDict()
+        self._bytes = 0
+        self.evictions = 0
+
+    def get(self, design_id: str) -> Optional[Dict]:
+        with self._lock:
+            item = self._items.get(design_id)
+            if item is None:
+                return None
+            if item[0] < time.time():
+                self._drop(design_id)
+                return None
+            self._items.move_to_end(design_id)
+            return item[2]
+
+    def put(self, design_id: str, design: Dict):
+        size = len(json.dumps(design))
+        with self._lock:
+            if design_id in self._items:
+                self._drop(design_id)
+            self._items[design_id] = (time.time() + self.ttl_seconds, size, design)
+            self._bytes += size
+
+            # TTL is uniform, so expired entries collect at the LRU end
+            now = time.time()
+            while self._items and next(iter(self._items.values()))[0] < now:
+                self._drop(next(iter(self._items)))
+            while self._items and (len(self._items) > self.max_items or self._bytes > self.max_bytes):
+                self._drop(next(iter(self._items)))
+                self.evictions += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "items": len(self._items),
+                "bytes": self._bytes,
+                "evictions": self.evictions,
+            }
+
+    def _drop(self, design_id: str):
+        _, size, _ = self._items.pop(design_id)
+        self._bytes -= size
+
+
+class SQLiteDesignStore:
+    # Expired/overflow rows are pruned every this many writes
+    PRUNE_EVERY = 50
+
+    def __init__(
+        self,
+        path: str = DESIGN_STORE_PATH,
+        ttl_seconds: int = DESIGN_STORE_TTL_SECONDS,
+        max_items: int = DESIGN_STORE_MAX_ITEMS
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_items = max_items
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn().executescript("""
+            CREATE TABLE IF NOT EXISTS designs (
+                design_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_designs_last_access ON designs (last_access);
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, design_id: str) -> Optional[Dict]:
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute(
+            "SELECT data FROM designs WHERE design_id = ? AND expires_at > ?",
+            (design_id, now)
+        ).fetchone()
+        if not row:
+            return None
+        conn.execute("UPDATE designs SET last_access = ? WHERE design_id = ?", (now, design_id))
+        return json.loads(row[0])
+
+    def put(self, design_id: str, design: Dict):
+        now = time.time()
+        self._conn().execute(
+            "INSERT OR REPLACE INTO designs (design_id, data, expires_at, last_access) VALUES (?, ?, ?, ?)",
+            (design_id, json.dumps(design), now + self.ttl_seconds, now)
+        )
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self):
+        conn = self._conn()
+        conn.execute("DELETE FROM designs WHERE expires_at <= ?", (time.time(),))
+        conn.execute(
+            "DELETE FROM designs WHERE design_id IN ("
+            "SELECT design_id FROM designs ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_items,)
+        )
+
+    def stats(self) -> Dict:
+        return {
+            "backend": "sqlite",
+            "items": self._conn().execute("SELECT COUNT(*) FROM designs").fetchone()[0],
+        }
+
+
+def create_design_store():
+    if DESIGN_STORE == "memory":
+        return MemoryDesignStore()
+    return SQLiteDesignStore()
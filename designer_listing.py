@@ -0,0 +1,159 @@
+"""
+Interior AI - Designer Listing
+Paginated, filtered designer directory for browse_designers and
+/api/designers. Pages use keyset cursors on (sort column, id) instead of
+OFFSET, so fetching page 500 costs the same as page 1 given an index on each
+sort column, and only the columns a card renders are selected.
+
+Filters: style (design_styles contains), city (location or cities_served),
+budget range overlap and a minimum average rating. Sorts: name, budget
+(lowest minimum first) and rating (highest first). The rating columns
+(designers.avg_rating / review_count) and the keyset indexes come from
+supabase/migrations/20260601000000_designer_rating_columns.sql and are kept
+current by designer_stats.
+"""
+
+import base64
+import json
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from data_access import coalesced
+
+DESIGNER_PAGE_SIZE = int(os.getenv("DESIGNER_PAGE_SIZE", "24"))
+DESIGNER_MAX_PAGE_SIZE = 100
+
+CARD_COLUMNS = (
+    "id, designer_name, specialisation, studio_name, location, design_styles, "
+    "budget_range_min, budget_range_max, avg_rating, review_count"
+)
+
+# sort name -> (column, descending)
+SORTS = {
+    "name": ("designer_name", False),
+    "budget": ("budget_range_min", False),
+    "rating": ("avg_rating", True),
+}
+
+STYLE_OPTIONS = ["Modern", "Minimalist", "Traditional", "Contemporary", "Industrial", "Scandinavian"]
+
+
+class InvalidListingQuery(ValueError):
+    """A filter, sort or cursor value could not be used"""
+
+
+# ===========================
+# QUERY PARSING
+# ===========================
+
+def _clean_text(value: Optional[str]) -> Optional[str]:
+    """PostgREST filter strings treat , ( ) * and quotes specially"""
+    value = re.sub(r'[,()*"\\]', " ", value or "").strip()
+    return " ".join(value.split()) or None
+
+
+def _number(args: Dict, name: str) -> Optional[float]:
+    value = args.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise InvalidListingQuery(f"{name} must be a number")
+
+
+def parse_listing_args(args: Dict) -> Dict:
+    """Normalise request.args into the filters list_designers accepts"""
+    sort = args.get("sort") or "name"
+    if sort not in SORTS:
+        raise InvalidListingQuery(f"sort must be one of {', '.join(SORTS)}")
+    try:
+        limit = int(args.get("limit") or DESIGNER_PAGE_SIZE)
+    except ValueError:
+        raise InvalidListingQuery("limit must be an integer")
+
+    return {
+        "style": _clean_text(args.get("style")),
+        "city": _clean_text(args.get("city")),
+        "budget_min": _number(args, "budget_min"),
+        "budget_max": _number(args, "budget_max"),
+        "min_rating": _number(args, "min_rating"),
+        "sort": sort,
+        "cursor": args.get("cursor") or None,
+        "limit": max(1, min(limit, DESIGNER_MAX_PAGE_SIZE)),
+    }
+
+
+def encode_cursor(sort: str, row: Dict) -> str:
+    column, _ = SORTS[sort]
+    payload = json.dumps({"s": sort, "v": row.get(column), "id": str(row["id"])}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(sort: str, cursor: str) -> Tuple[object, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        cursor_sort, value, last_id = payload["s"], payload["v"], payload["id"]
+    except (ValueError, KeyError, TypeError):
+        raise InvalidListingQuery("invalid cursor")
+    if cursor_sort != sort:
+        raise InvalidListingQuery("cursor belongs to a different sort order")
+    return value, _clean_text(str(last_id))
+
+
+def _quote(value) -> str:
+    if isinstance(value, (int, float)):
+        return str(value)
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _after_filter(column: str, descending: bool, value, last_id: str) -> str:
+    """Rows strictly after (value, id) in `column` order, NULLs sorted last"""
+    if value is None:
+        return f"and({column}.is.null,id.gt.{last_id})"
+    op = "lt" if descending else "gt"
+    v = _quote(value)
+    return f"{column}.{op}.{v},and({column}.eq.{v},id.gt.{last_id}),{column}.is.null"
+
+
+# ===========================
+# LISTING
+# ===========================
+
+def list_designers(client, filters: Dict) -> Tuple[List[Dict], Optional[str]]:
+    """Return (one page of designer cards, cursor for the next page or None)"""
+    sort = filters.get("sort") or "name"
+    column, descending = SORTS[sort]
+    limit = filters.get("limit") or DESIGNER_PAGE_SIZE
+
+    query = client.table("designers").select(CARD_COLUMNS)
+
+    if filters.get("style"):
+        query = query.contains("design_styles", [filters["style"]])
+    if filters.get("city"):
+        city = filters["city"]
+        query = query.or_(f'location.ilike.*{city}*,cities_served.cs.{{"{city}"}}')
+    # Designer range overlaps the homeowner's range
+    if filters.get("budget_min") is not None:
+        query = query.gte("budget_range_max", filters["budget_min"])
+    if filters.get("budget_max") is not None:
+        query = query.lte("budget_range_min", filters["budget_max"])
+    if filters.get("min_rating") is not None:
+        query = query.gte("avg_rating", filters["min_rating"])
+
+    if filters.get("cursor"):
+        value, last_id = decode_cursor(sort, filters["cursor"])
+        query = query.or_(_after_filter(column, descending, value, last_id))
+
+    # One extra row tells us whether another page exists
+    rows = coalesced(
+        query.order(column, desc=descending, nullsfirst=False)
+        .order("id")
+        .limit(limit + 1)
+    ).data or []
+
+    next_cursor = encode_cursor(sort, rows[limit - 1]) if len(rows) > limit else None
+    # Other requests may hold the same response; callers get their own rows
+    return [dict(row) for row in rows[:limit]], next_cursor
@@ -0,0 +1,293 @@
+"""
+Interior AI - Designer Recommendations
+Scores every designer against a homeowner's styles, room, budget and city
+with vectorized NumPy operations over a columnar copy of the designers table:
+
+- one boolean column per style token, room and city,
+- float columns for budget_range_min/max and the average rating (read from
+  the denormalised designers.avg_rating / review_count, see designer_stats.py).
+
+The top-k are picked with argpartition, so a query over tens of thousands of
+designers stays in the low milliseconds. designer_written() upserts a single
+profile in place after a write; the whole matrix is reloaded every
+RECOMMENDER_REFRESH_SECONDS.
+"""
+
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+RECOMMENDER_REFRESH_SECONDS = int(os.getenv("RECOMMENDER_REFRESH_SECONDS", "600"))
+
+DESIGNER_COLUMNS = (
+    "id, email, designer_name, studio_name, location, design_styles, "
+    "room_specializations, cities_served, budget_range_min, budget_range_max, "
+    "avg_rating, review_count"
+)
+
+# Relative weight of each signal in the final score
+WEIGHTS = {"style": 0.45, "room": 0.2, "budget": 0.15, "city": 0.15, "rating": 0.05}
+
+
+# ===========================
+# NORMALISATION
+# ===========================
+
+def style_tokens(values: Optional[Iterable[str]]) -> List[str]:
+    """'modern_minimalist' and 'Modern' / 'Minimalist' should meet in the middle"""
+    tokens = []
+    for value in values or []:
+        tokens.extend(t for t in re.split(r"[\s_&/,-]+", str(value).lower()) if t and t != "and")
+    return list(dict.fromkeys(tokens))
+
+
+def normalize_label(value: Optional[str]) -> str:
+    return " ".join(str(value or "").replace("_", " ").lower().split())
+
+
+def parse_budget(value) -> Optional[Tuple[float, float]]:
+    """Parse '100000-300000', '<100000', '>1000000' or a number into a range"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value), float(value)
+    text = str(value).replace(",", "").replace("₹", "").strip()
+    try:
+        if text.startswith("<"):
+            return 0.0, float(text[1:])
+        if text.startswith(">"):
+            low = float(text[1:])
+            return low, low * 5
+        if "-" in text:
+            low, high = text.split("-", 1)
+            return float(low), float(high)
+        return float(text), float(text)
+    except ValueError:
+        return None
+
+
+# ===========================
+# ENGINE
+# ===========================
+
+class DesignerRecommender:
+    PAGE_SIZE = 1000
+
+    def __init__(self, client, refresh_seconds: int = RECOMMENDER_REFRESH_SECONDS):
+        self.client = client
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self._loaded_at = 0.0
+        self._reset()
+
+    # ----- loading -----
+
+    def _reset(self):
+        self.count = 0
+        self.index: Dict[str, int] = {}
+        self.cards: List[Optional[Dict]] = []
+        self.vocab = {"style": {}, "room": {}, "city": {}}
+        self.matrices = {name: np.zeros((0, 0), dtype=bool) for name in self.vocab}
+        self.budget_min = np.zeros(0, dtype=np.float32)
+        self.budget_max = np.zeros(0, dtype=np.float32)
+        self.rating = np.zeros(0, dtype=np.float32)
+        self.review_count = np.zeros(0, dtype=np.int32)
+        self.active = np.zeros(0, dtype=bool)
+
+    def _fetch_all(self, table: str, columns: str) -> List[Dict]:
+        rows, start = [], 0
+        while True:
+            page = self.client.table(table).select(columns) \
+                .range(start, start + self.PAGE_SIZE - 1).execute().data or []
+            rows.extend(page)
+            if len(page) < self.PAGE_SIZE:
+                return rows
+            start += self.PAGE_SIZE
+
+    def load(self):
+        """Rebuild the whole matrix from Supabase"""
+        start = time.perf_counter()
+        designers = self._fetch_all("designers", DESIGNER_COLUMNS)
+
+        with self._lock:
+            self._reset()
+            self._ensure_capacity(len(designers))
+            for d in designers:
+                self._upsert_locked(d)
+            self._loaded_at = time.monotonic()
+
+        print(f"[RECOMMENDER] Loaded {len(designers)} designers in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def ensure_fresh(self):
+        if time.monotonic() - self._loaded_at <= self.refresh_seconds:
+            return
+        # One thread reloads; the others keep scoring against the current copy
+        # unless there is nothing loaded yet.
+        if self._load_lock.acquire(blocking=self._loaded_at == 0):
+            try:
+                if time.monotonic() - self._loaded_at > self.refresh_seconds:
+                    self.load()
+            finally:
+                self._load_lock.release()
+
+    # ----- incremental updates -----
+
+    def upsert(self, designer: Dict):
+        with self._lock:
+            self._upsert_locked(designer)
+
+    def remove(self, designer_id: str):
+        with self._lock:
+            row = self.index.pop(str(designer_id), None)
+            if row is not None:
+                self.active[row] = False
+                self.cards[row] = None
+
+    def _upsert_locked(self, d: Dict):
+        designer_id = str(d["id"])
+        row = self.index.get(designer_id)
+        if row is None:
+            row = self.count
+            self._ensure_capacity(row + 1)
+            self.count += 1
+            self.index[designer_id] = row
+            self.cards.append(None)
+        else:
+            for matrix in self.matrices.values():
+                matrix[row, :] = False
+
+        for token in style_tokens(d.get("design_styles")):
+            self._set("style", row, token)
+        for room in d.get("room_specializations") or []:
+            self._set("room", row, normalize_label(room))
+        for city in (d.get("cities_served") or []) + [d.get("location")]:
+            if city:
+                self._set("city", row, normalize_label(city))
+
+        self.budget_min[row] = d["budget_range_min"] if d.get("budget_range_min") is not None else np.nan
+        self.budget_max[row] = d["budget_range_max"] if d.get("budget_range_max") is not None else np.nan
+        # A row without the rating columns keeps the rating it already had
+        if "avg_rating" in d:
+            self.rating[row] = float(d["avg_rating"] or 0.0)
+            self.review_count[row] = int(d.get("review_count") or 0)
+        self.active[row] = True
+
+        self.cards[row] = {
+            "id": d["id"],
+            "designer_name": d.get("designer_name") or "",
+            "studio_name": d.get("studio_name") or "",
+            "location": d.get("location") or "",
+            "design_styles": d.get("design_styles") or [],
+            "room_specializations": d.get("room_specializations") or [],
+            "budget_range_min": d.get("budget_range_min"),
+            "budget_range_max": d.get("budget_range_max"),
+        }
+
+    def _ensure_capacity(self, rows: int):
+        capacity = len(self.active)
+        if rows <= capacity:
+            return
+        new_capacity = max(rows, capacity * 2, 64)
+        extra = new_capacity - capacity
+        for name, matrix in self.matrices.items():
+            self.matrices[name] = np.pad(matrix, ((0, extra), (0, 0)))
+        self.budget_min = np.pad(self.budget_min, (0, extra), constant_values=np.nan)
+        self.budget_max = np.pad(self.budget_max, (0, extra), constant_values=np.nan)
+        self.rating = np.pad(self.rating, (0, extra))
+        self.review_count = np.pad(self.review_count, (0, extra))
+        self.active = np.pad(self.active, (0, extra))
+
+    def _set(self, kind: str, row: int, token: str):
+        # Resolve the column first: it may grow (and replace) the matrix
+        column = self._column(kind, token)
+        self.matrices[kind][row, column] = True
+
+    def _column(self, kind: str, token: str) -> int:
+        vocab = self.vocab[kind]
+        if token not in vocab:
+            vocab[token] = len(vocab)
+            matrix = self.matrices[kind]
+            if matrix.shape[1] < len(vocab):
+                # Grow columns geometrically as well
+                self.matrices[kind] = np.pad(matrix, ((0, 0), (0, max(8, matrix.shape[1]))))
+        return vocab[token]
+
+    # ----- scoring -----
+
+    def recommend(
+        self,
+        styles: Optional[Iterable[str]] = None,
+        room_type: Optional[str] = None,
+        budget=None,
+        city: Optional[str] = None,
+        k: int = 5
+    ) -> List[Dict]:
+        self.ensure_fresh()
+
+        with self._lock:
+            n = self.count
+            if n == 0:
+                return []
+
+            active = self.active[:n]
+            score = np.zeros(n, dtype=np.float32)
+
+            query_styles = [self.vocab["style"][t] for t in style_tokens(styles) if t in self.vocab["style"]]
+            if styles:
+                if not query_styles:
+                    return []
+                matched = self.matrices["style"][:n, query_styles].sum(axis=1)
+                style_score = matched / len(style_tokens(styles))
+                # Only designers sharing at least one style are candidates
+                active = active & (matched > 0)
+                score += WEIGHTS["style"] * style_score
+
+            room = self.vocab["room"].get(normalize_label(room_type)) if room_type else None
+            if room is not None:
+                score += WEIGHTS["room"] * self.matrices["room"][:n, room]
+
+            city_col = self.vocab["city"].get(normalize_label(city)) if city else None
+            if city_col is not None:
+                score += WEIGHTS["city"] * self.matrices["city"][:n, city_col]
+
+            budget_range = parse_budget(budget)
+            if budget_range:
+                score += WEIGHTS["budget"] * self._budget_fit(n, *budget_range)
+
+            score += WEIGHTS["rating"] * (self.rating[:n] / 5.0)
+            score = np.where(active, score, -np.inf)
+
+            candidates = int(active.sum())
+            if candidates == 0:
+                return []
+            k = min(k, candidates)
+            top = np.argpartition(-score, k - 1)[:k]
+            top = top[np.argsort(-score[top], kind="stable")]
+
+            return [
+                {
+                    **self.cards[i],
+                    "rating": round(float(self.rating[i]), 1),
+                    "total_reviews": int(self.review_count[i]),
+                    "score": round(float(score[i]), 4),
+                }
+                for i in top
+            ]
+
+    def _budget_fit(self, n: int, low: float, high: float) -> np.ndarray:
+        """Share of the homeowner's budget range that the designer covers (0.5 if unknown)"""
+        d_min = self.budget_min[:n]
+        d_max = self.budget_max[:n]
+        known = ~(np.isnan(d_min) | np.isnan(d_max))
+        span = max(high - low, 1.0)
+        overlap = np.minimum(high, np.nan_to_num(d_max)) - np.maximum(low, np.nan_to_num(d_min))
+        if high == low:
+            fit = ((d_min <= low) & (low <= d_max)).astype(np.float32)
+        else:
+            fit = np.clip(overlap / span, 0.0, 1.0)
+        return np.where(known, fit, 0.5)
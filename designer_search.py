@@ -0,0 +1,208 @@
+"""
+Interior AI - Designer Full-Text Search
+A local SQLite FTS5 index over designer_name, studio_name, specialisation,
+bio, awards and certifications, so free-text search never touches Supabase.
+
+- Ranked with bm25(); a name match outweighs a mention in a bio.
+- Every query term is prefix-matched ("scandi" finds "Scandinavian").
+- Results carry an HTML-safe snippet with <mark> around the matches.
+- Signup and profile updates upsert single rows; `flask rebuild-designer-search`
+  (or the first query on an empty index) rebuilds it from the table.
+- Changes made to the table some other way are picked up by a full rebuild
+  once the index is older than DESIGNER_SEARCH_REFRESH_SECONDS. It runs on a
+  background thread, one at a time, while queries keep searching the current
+  index; only a query on an empty index waits for a build.
+"""
+
+import html
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from instance_paths import instance_path
+
+DESIGNER_SEARCH_PATH = os.getenv("DESIGNER_SEARCH_PATH", instance_path("designer_search.sqlite3"))
+DESIGNER_SEARCH_REFRESH_SECONDS = int(os.getenv("DESIGNER_SEARCH_REFRESH_SECONDS", "900"))
+
+SEARCH_COLUMNS = ("designer_name", "studio_name", "specialisation", "bio", "awards", "certifications")
+# bm25 weights, in SEARCH_COLUMNS order
+COLUMN_WEIGHTS = (10.0, 6.0, 4.0, 1.0, 2.0, 2.0)
+
+# Private-use markers survive html.escape and become <mark> afterwards
+_MARK_OPEN, _MARK_CLOSE = "\ue000", "\ue001"
+
+
+def build_match_query(text: str) -> str:
+    """Turn free text into an FTS5 query: every word, prefix-matched, all required"""
+    terms = re.findall(r"\w+", text.lower())
+    return " ".join(f'"{term}"*' for term in terms[:8])
+
+
+class DesignerSearchIndex:
+    PAGE_SIZE = 1000
+
+    def __init__(self, client, path: str = DESIGNER_SEARCH_PATH, refresh_seconds: int = DESIGNER_SEARCH_REFRESH_SECONDS):
+        self.client = client
+        self.path = path
+        self.refresh_seconds = refresh_seconds
+        self._local = threading.local()
+        self._build_lock = threading.Lock()
+        self._refreshing = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search-rebuild")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._conn()
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS designer_fts USING fts5(
+                designer_id UNINDEXED,
+                location UNINDEXED,
+                {", ".join(SEARCH_COLUMNS)},
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )
+        """)
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    # ----- writes -----
+
+    def upsert(self, designer: Dict):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._upsert_rows(conn, [designer])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def remove(self, designer_id):
+        self._conn().execute("DELETE FROM designer_fts WHERE designer_id = ?", (str(designer_id),))
+
+    def _upsert_rows(self, conn: sqlite3.Connection, designers: List[Dict]):
+        for d in designers:
+            conn.execute("DELETE FROM designer_fts WHERE designer_id = ?", (str(d["id"]),))
+            conn.execute(
+                f"INSERT INTO designer_fts (designer_id, location, {', '.join(SEARCH_COLUMNS)}) "
+                f"VALUES (?, ?, {', '.join('?' for _ in SEARCH_COLUMNS)})",
+                (str(d["id"]), d.get("location") or "", *[str(d.get(c) or "") for c in SEARCH_COLUMNS])
+            )
+
+    def rebuild(self) -> int:
+        """Re-index every designer from Supabase in one transaction"""
+        start = time.perf_counter()
+        columns = "id, location, " + ", ".join(SEARCH_COLUMNS)
+        designers, offset = [], 0
+        while True:
+            page = self.client.table("designers").select(columns) \
+                .range(offset, offset + self.PAGE_SIZE - 1).execute().data or []
+            designers.extend(page)
+            if len(page) < self.PAGE_SIZE:
+                break
+            offset += self.PAGE_SIZE
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM designer_fts")
+            self._upsert_rows(conn, designers)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('built_at', ?)", (str(time.time()),))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("INSERT INTO designer_fts (designer_fts) VALUES ('optimize')")
+
+        print(f"[SEARCH] Indexed {len(designers)} designers in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return len(designers)
+
+    def _built_at(self) -> float:
+        row = self._conn().execute("SELECT value FROM meta WHERE key = 'built_at'").fetchone()
+        return float(row[0]) if row else 0.0
+
+    def ensure_built(self):
+        """Build an empty index inline; refresh a stale one in the background"""
+        built_at = self._built_at()
+        if not built_at:
+            with self._build_lock:
+                if not self._built_at():
+                    self.rebuild()
+            return
+        if time.time() - built_at > self.refresh_seconds:
+            self._rebuild_in_background()
+
+    def _rebuild_in_background(self):
+        with self._build_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                # Another worker may have rebuilt the shared file meanwhile
+                if time.time() - self._built_at() > self.refresh_seconds:
+                    self.rebuild()
+            except Exception as e:
+                print(f"[SEARCH] Background refresh failed, serving the existing index: {e}")
+            finally:
+                with self._build_lock:
+                    self._refreshing = False
+
+        self._executor.submit(run)
+
+    # ----- queries -----
+
+    def search(self, text: str, limit: int = 20) -> List[Dict]:
+        match = build_match_query(text)
+        if not match:
+            return []
+        self.ensure_built()
+
+        weights = ", ".join(str(w) for w in COLUMN_WEIGHTS)
+        rows = self._conn().execute(
+            f"""
+            SELECT designer_id, location, designer_name, studio_name, specialisation,
+                   bm25(designer_fts, 0, 0, {weights}) AS rank,
+                   snippet(designer_fts, -1, ?, ?, '…', 12) AS snippet
+            FROM designer_fts
+            WHERE designer_fts MATCH ?
+            ORDER BY rank
+            LIMIT ?
+            """,
+            (_MARK_OPEN, _MARK_CLOSE, match, limit)
+        ).fetchall()
+
+        return [
+            {
+                "id": row["designer_id"],
+                "designer_name": row["designer_name"],
+                "studio_name": row["studio_name"],
+                "specialisation": row["specialisation"],
+                "location": row["location"],
+                "snippet": html.escape(row["snippet"]).replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>"),
+                "score": round(-row["rank"], 4),
+            }
+            for row in rows
+        ]
+
+    def stats(self) -> Dict:
+        conn = self._conn()
+        built = conn.execute("SELECT value FROM meta WHERE key = 'built_at'").fetchone()
+        return {
+            "designers": conn.execute("SELECT count(*) FROM designer_fts").fetchone()[0],
+            "built_seconds_ago": round(time.time() - float(built[0])) if built else None,
+        }
@@ -0,0 +1,315 @@
+"""
+Interior AI - Designer Statistics Rollup
+One small row per designer holding everything the dashboard aggregates:
+rating sum/count, bookings per month, confirmed and pending earnings, and a
+histogram of portfolio styles. Write paths update the row incrementally
+(record_* methods). A missing row is built from Supabase on read; a stale one
+is served as is while a background rebuild picks up writes made outside this
+app. Rows live in a local SQLite file shared by all workers;
+`flask rebuild-designer-stats` rebuilds them all.
+
+The rating is also copied onto designers.avg_rating / review_count so the
+designer listing can filter and sort on it in the database. That copy is
+written by record_review, by the CLI and by the background rebuild a stale
+read queues (so a dashboard view can trigger it, but never waits for it). The
+inline build of a missing row does not write it.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Optional
+
+from instance_paths import instance_path
+
+DESIGNER_STATS_PATH = os.getenv("DESIGNER_STATS_PATH", instance_path("designer_stats.sqlite3"))
+# Rows older than this are recomputed from the source tables on the next read
+DESIGNER_STATS_MAX_AGE_SECONDS = int(os.getenv("DESIGNER_STATS_MAX_AGE_SECONDS", "3600"))
+
+CONFIRMED_STATUSES = ("confirmed", "completed")
+
+
+def booking_amount(notes: Optional[str]) -> int:
+    """Bookings carry their amount as the digits in `notes`"""
+    digits = "".join([c for c in (notes or "") if c.isdigit()])
+    return int(digits) if digits else 0
+
+
+def _earnings_bucket(status: Optional[str]) -> Optional[str]:
+    status = (status or "").lower()
+    if status in CONFIRMED_STATUSES:
+        return "confirmed_earnings"
+    if status == "pending":
+        return "pending_earnings"
+    return None
+
+
+class DesignerStatsStore:
+    def __init__(self, path: str = DESIGNER_STATS_PATH, max_age_seconds: int = DESIGNER_STATS_MAX_AGE_SECONDS):
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._rebuilding = set()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stats-rebuild")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn().execute("""
+            CREATE TABLE IF NOT EXISTS designer_stats (
+                designer_email TEXT PRIMARY KEY,
+                rating_sum REAL NOT NULL DEFAULT 0,
+                rating_count INTEGER NOT NULL DEFAULT 0,
+                total_projects INTEGER NOT NULL DEFAULT 0,
+                confirmed_earnings INTEGER NOT NULL DEFAULT 0,
+                pending_earnings INTEGER NOT NULL DEFAULT 0,
+                bookings_by_month TEXT NOT NULL DEFAULT '{}',
+                style_counts TEXT NOT NULL DEFAULT '{}',
+                updated_at REAL NOT NULL,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        columns = [c["name"] for c in self._conn().execute("PRAGMA table_info(designer_stats)")]
+        if "version" not in columns:
+            # Files created before rebuilds were versioned
+            self._conn().execute("ALTER TABLE designer_stats ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    # ----- reads -----
+
+    def get(self, email: str, client=None) -> Optional[Dict]:
+        """
+        Return the rollup row. With a client, a missing row is built inline and
+        a stale one is returned while it is rebuilt in the background.
+        """
+        email = email.strip().lower()
+        row = self._conn().execute("SELECT * FROM designer_stats WHERE designer_email = ?", (email,)).fetchone()
+        if client is not None:
+            if row is None:
+                return self.rebuild(email, client, publish=False)
+            if time.time() - row["updated_at"] > self.max_age_seconds:
+                self._rebuild_in_background(email, client)
+        return self._decode(row) if row else None
+
+    def dashboard_summary(self, email: str, client) -> Dict:
+        """The numbers the designer dashboard shows, straight from the rollup"""
+        stats = self.get(email, client)
+        count = stats["rating_count"]
+        total_styles = sum(stats["style_counts"].values())
+        return {
+            "avg_rating": round(stats["rating_sum"] / count, 1) if count else 0,
+            "total_reviews": count,
+            "total_projects": stats["total_projects"],
+            "monthly_bookings": stats["bookings_by_month"].get(datetime.now().strftime("%Y-%m"), 0),
+            "total_earnings": stats["confirmed_earnings"],
+            "pending_earnings": stats["pending_earnings"],
+            "popular_styles": [
+                {"style": s, "percent": round((c / total_styles) * 100, 1)}
+                for s, c in sorted(stats["style_counts"].items(), key=lambda x: x[1], reverse=True)
+            ] if total_styles else [],
+        }
+
+    # ----- rebuilds -----
+
+    def rebuild(self, email: str, client, publish: bool = True) -> Dict:
+        """
+        Recompute one designer's row from the source tables. If the row changed
+        while the tables were read (an incremental update, an invalidation or
+        another rebuild), the result is dropped and the current row returned;
+        the next stale read rebuilds again.
+        """
+        email = email.strip().lower()
+        started_version = self._version(email)
+        reviews = client.table("designer_reviews").select("rating") \
+            .filter("designer_email", "eq", email).execute().data or []
+        bookings = client.table("designer_bookings").select("created_at, notes, booking_status") \
+            .filter("designer_email", "eq", email).execute().data or []
+        portfolio = client.table("designer_portfolio").select("design_style") \
+            .filter("designer_email", "eq", email).execute().data or []
+
+        stats = {
+            "designer_email": email,
+            "rating_sum": float(sum(r["rating"] for r in reviews if r.get("rating") is not None)),
+            "rating_count": len([r for r in reviews if r.get("rating") is not None]),
+            "total_projects": len(portfolio),
+            "confirmed_earnings": 0,
+            "pending_earnings": 0,
+            "bookings_by_month": {},
+            "style_counts": {},
+        }
+        for b in bookings:
+            if b.get("created_at"):
+                month = b["created_at"][:7]
+                stats["bookings_by_month"][month] = stats["bookings_by_month"].get(month, 0) + 1
+            bucket = _earnings_bucket(b.get("booking_status"))
+            if bucket:
+                stats[bucket] += booking_amount(b.get("notes"))
+        for p in portfolio:
+            style = p.get("design_style")
+            if style:
+                stats["style_counts"][style] = stats["style_counts"].get(style, 0) + 1
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            current = conn.execute("SELECT * FROM designer_stats WHERE designer_email = ?", (email,)).fetchone()
+            if (current["version"] if current else None) != started_version:
+                conn.execute("COMMIT")
+                print(f"[STATS] Rollup for {email} changed during the rebuild; keeping the newer row")
+                return self._decode(current) if current else stats
+            stats["version"] = (started_version or 0) + 1
+            self._write(stats, conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        if publish:
+            self.publish_rating(stats, client)
+        return stats
+
+    def _version(self, email: str) -> Optional[int]:
+        row = self._conn().execute("SELECT version FROM designer_stats WHERE designer_email = ?", (email,)).fetchone()
+        return row["version"] if row else None
+
+    def _rebuild_in_background(self, email: str, client):
+        with self._lock:
+            if email in self._rebuilding:
+                return
+            self._rebuilding.add(email)
+
+        def run():
+            try:
+                self.rebuild(email, client)
+            except Exception as e:
+                print(f"[STATS] Background rebuild for {email} failed: {e}")
+            finally:
+                with self._lock:
+                    self._rebuilding.discard(email)
+
+        self._executor.submit(run)
+
+    def rebuild_all(self, client) -> int:
+        emails, start = [], 0
+        while True:
+            page = client.table("designers").select("email").range(start, start + 999).execute().data or []
+            emails.extend(d["email"] for d in page if d.get("email"))
+            if len(page) < 1000:
+                break
+            start += 1000
+        for email in emails:
+            self.rebuild(email, client)
+        return len(emails)
+
+    # ----- incremental updates -----
+
+    def record_review(self, email: str, rating: float, client=None):
+        """Count a review the caller just inserted and publish the new rating"""
+        self._apply(email, lambda s: s.update(
+            rating_sum=s["rating_sum"] + rating,
+            rating_count=s["rating_count"] + 1
+        ))
+        if client is None:
+            return
+        stats = self.get(email)
+        if stats is None:
+            # No row to update yet; building one counts the new review too
+            self.rebuild(email, client)
+        else:
+            self.publish_rating(stats, client)
+
+    def publish_rating(self, stats: Dict, client):
+        """Denormalise the rating onto the designers row (best effort)"""
+        count = stats["rating_count"]
+        try:
+            client.table("designers").update({
+                "avg_rating": round(stats["rating_sum"] / count, 2) if count else None,
+                "review_count": count,
+            }).filter("email", "eq", stats["designer_email"]).execute()
+        except Exception as e:
+            print(f"[STATS] Could not publish rating for {stats['designer_email']}: {e}")
+
+    def record_booking(self, email: str, created_at: Optional[str], notes: Optional[str], status: str):
+        def change(s):
+            month = (created_at or datetime.utcnow().isoformat())[:7]
+            s["bookings_by_month"][month] = s["bookings_by_month"].get(month, 0) + 1
+            bucket = _earnings_bucket(status)
+            if bucket:
+                s[bucket] += booking_amount(notes)
+        self._apply(email, change)
+
+    def record_booking_status(self, email: str, notes: Optional[str], old_status: str, new_status: str):
+        def change(s):
+            amount = booking_amount(notes)
+            old_bucket, new_bucket = _earnings_bucket(old_status), _earnings_bucket(new_status)
+            if old_bucket:
+                s[old_bucket] -= amount
+            if new_bucket:
+                s[new_bucket] += amount
+        self._apply(email, change)
+
+    def record_portfolio_item(self, email: str, design_style: Optional[str]):
+        def change(s):
+            s["total_projects"] += 1
+            if design_style:
+                s["style_counts"][design_style] = s["style_counts"].get(design_style, 0) + 1
+        self._apply(email, change)
+
+    def invalidate(self, email: str):
+        """Force a rebuild on the next read (for writes we cannot apply exactly)"""
+        self._conn().execute("DELETE FROM designer_stats WHERE designer_email = ?", (email.strip().lower(),))
+
+    # ----- storage -----
+
+    def _apply(self, email: str, change):
+        """Read-modify-write one row atomically. No row yet means the next read rebuilds it."""
+        email = email.strip().lower()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT * FROM designer_stats WHERE designer_email = ?", (email,)).fetchone()
+            if row is not None:
+                stats = self._decode(row)
+                change(stats)
+                # Tells a rebuild that is reading the source tables to drop its result
+                stats["version"] += 1
+                self._write(stats, conn, touch=False)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _write(self, stats: Dict, conn: Optional[sqlite3.Connection] = None, touch: bool = True):
+        conn = conn or self._conn()
+        updated_at = time.time() if touch else stats.get("updated_at", time.time())
+        conn.execute(
+            "INSERT OR REPLACE INTO designer_stats (designer_email, rating_sum, rating_count, total_projects, "
+            "confirmed_earnings, pending_earnings, bookings_by_month, style_counts, updated_at, version) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                stats["designer_email"], stats["rating_sum"], stats["rating_count"], stats["total_projects"],
+                stats["confirmed_earnings"], stats["pending_earnings"],
+                json.dumps(stats["bookings_by_month"]), json.dumps(stats["style_counts"]), updated_at,
+                stats.get("version", 0)
+            )
+        )
+
+    @staticmethod
+    def _decode(row: sqlite3.Row) -> Dict:
+        stats = dict(row)
+        stats["bookings_by_month"] = json.loads(stats["bookings_by_month"])
+        stats["style_counts"] = json.loads(stats["style_counts"])
+        return stats
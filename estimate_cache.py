@@ -0,0 +1,280 @@
+"""
+Interior AI - Budget Estimate Cache
+Gemini's part of a budget estimate (the recommendations; the numbers come
+from budget_model.py) depends only on city, area, home type, style, material
+and budget, and people resubmit nearly the same form all the time. Answers
+are cached under a normalised form of those inputs:
+
+- city names are canonicalised ("bengaluru", "Bangalore " and "BLR" are one city)
+- area is rounded to ESTIMATE_AREA_BUCKET_SQFT, budget to two significant figures
+- text fields are case- and whitespace-insensitive
+
+The prompt is built from the normalised inputs, so a cached answer is exactly
+what the same prompt would return. Lookups try an in-process LRU first, then
+a SQLite file shared by the workers. Entries expire after
+ESTIMATE_CACHE_TTL_SECONDS.
+
+Concurrent misses for one key share a single streamed Gemini call
+(share_stream): the first request streams it, and the others replay what has
+arrived so far and then follow it live.
+"""
+
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from instance_paths import instance_path
+
+ESTIMATE_CACHE_PATH = os.getenv("ESTIMATE_CACHE_PATH", instance_path("estimate_cache.sqlite3"))
+ESTIMATE_CACHE_TTL_SECONDS = int(os.getenv("ESTIMATE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+ESTIMATE_CACHE_MAX_ENTRIES = int(os.getenv("ESTIMATE_CACHE_MAX_ENTRIES", "1000"))
+ESTIMATE_AREA_BUCKET_SQFT = int(os.getenv("ESTIMATE_AREA_BUCKET_SQFT", "50"))
+# How long a request following another's Gemini stream waits for its next item
+ESTIMATE_SHARED_STREAM_TIMEOUT_SECONDS = float(os.getenv("ESTIMATE_SHARED_STREAM_TIMEOUT_SECONDS", "60"))
+
+# lower-cased spelling -> canonical city
+CITY_ALIASES = {
+    "bangalore": "Bengaluru", "bengaluru": "Bengaluru", "blr": "Bengaluru", "bangaluru": "Bengaluru",
+    "mumbai": "Mumbai", "bombay": "Mumbai", "bom": "Mumbai", "navi mumbai": "Mumbai",
+    "delhi": "Delhi", "new delhi": "Delhi", "ncr": "Delhi", "del": "Delhi",
+    "gurgaon": "Gurugram", "gurugram": "Gurugram",
+    "noida": "Noida", "greater noida": "Noida",
+    "chennai": "Chennai", "madras": "Chennai",
+    "kolkata": "Kolkata", "calcutta": "Kolkata",
+    "hyderabad": "Hyderabad", "secunderabad": "Hyderabad", "hyd": "Hyderabad",
+    "pune": "Pune", "poona": "Pune",
+    "ahmedabad": "Ahmedabad", "amdavad": "Ahmedabad",
+    "kochi": "Kochi", "cochin": "Kochi",
+    "mysore": "Mysuru", "mysuru": "Mysuru",
+}
+
+KEY_FIELDS = ("location", "area", "home_type", "style", "material", "user_budget")
+
+
+def _words(value) -> str:
+    return " ".join(str(value or "").replace(",", " ").split())
+
+
+def canonical_city(raw) -> str:
+    name = _words(raw).lower()
+    # "Bangalore, Karnataka" / "Mumbai Suburban" -> first recognisable part
+    for candidate in (name, name.split(" ")[0] if name else ""):
+        if candidate in CITY_ALIASES:
+            return CITY_ALIASES[candidate]
+    return name.title()
+
+
+def _positive_number(value, field: str) -> float:
+    try:
+        number = float(str(value).replace(",", "").strip())
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be a number")
+    if not math.isfinite(number) or number <= 0:
+        raise ValueError(f"{field} must be greater than zero")
+    return number
+
+
+def _two_significant(number: float) -> int:
+    magnitude = 10 ** max(0, int(math.floor(math.log10(number))) - 1)
+    return int(round(number / magnitude) * magnitude)
+
+
+def normalize_estimate_inputs(data: Dict) -> Dict:
+    """Canonical estimator inputs; raises ValueError for a non-numeric area or budget"""
+    area = _positive_number(data["area"], "area")
+    return {
+        "location": canonical_city(data["location"]),
+        "area": max(ESTIMATE_AREA_BUCKET_SQFT, int(round(area / ESTIMATE_AREA_BUCKET_SQFT)) * ESTIMATE_AREA_BUCKET_SQFT),
+        "home_type": _words(data["home_type"]).upper().replace(" ", ""),
+        "style": _words(data["style"]).title(),
+        "material": _words(data["material"]).title(),
+        "user_budget": _two_significant(_positive_number(data["user_budget"], "user_budget")),
+    }
+
+
+def cache_key(inputs: Dict) -> str:
+    return json.dumps([inputs[field] for field in KEY_FIELDS], separators=(",", ":"))
+
+
+class _SharedStream:
+    """Items produced by one request's stream, readable by any number of followers"""
+
+    def __init__(self):
+        self.items: List = []
+        self.finished = False
+        self._cond = threading.Condition()
+
+    def append(self, item):
+        with self._cond:
+            self.items.append(item)
+            self._cond.notify_all()
+
+    def finish(self):
+        with self._cond:
+            self.finished = True
+            self._cond.notify_all()
+
+    def follow(self, timeout: float) -> Iterator:
+        index = 0
+        while True:
+            with self._cond:
+                if index >= len(self.items) and not self.finished:
+                    self._cond.wait(timeout)
+                if index >= len(self.items):
+                    # Finished, or the leader went quiet for too long
+                    return
+                item = self.items[index]
+            index += 1
+            yield item
+
+
+class EstimateCache:
+    def __init__(
+        self,
+        path: str = ESTIMATE_CACHE_PATH,
+        ttl: int = ESTIMATE_CACHE_TTL_SECONDS,
+        max_entries: int = ESTIMATE_CACHE_MAX_ENTRIES
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # key -> (estimate, created_at as wall-clock time, shared with the SQLite tier)
+        self._memory: "OrderedDict[str, Tuple[Dict, float]]" = OrderedDict()
+        self._local = threading.local()
+        self._streams: Dict[str, _SharedStream] = {}
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.llm_calls = 0
+        self.shared_llm_calls = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS estimate_cache (
+                key TEXT PRIMARY KEY,
+                estimate TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        conn.execute("DELETE FROM estimate_cache WHERE created_at < ?", (time.time() - self.ttl,))
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    # ----- public API -----
+
+    def peek(self, inputs: Dict) -> Optional[Dict]:
+        """The cached estimate for `inputs`, or None; never calls out"""
+        cached = self._get(cache_key(inputs))
+        if cached is None:
+            with self._lock:
+                self.misses += 1
+        return cached[0] if cached else None
+
+    def share_stream(self, inputs: Dict, produce: Callable[[], Iterator]) -> Iterator:
+        """
+        Items of `produce()` for a cache miss on `inputs`. While one request is
+        running `produce` for a key, identical requests get its items instead
+        of starting their own call. Storing the final answer (put) is up to
+        `produce`.
+        """
+        key = cache_key(inputs)
+        with self._lock:
+            shared = self._streams.get(key)
+            if shared is not None:
+                self.shared_llm_calls += 1
+                return shared.follow(ESTIMATE_SHARED_STREAM_TIMEOUT_SECONDS)
+            shared = self._streams[key] = _SharedStream()
+            self.llm_calls += 1
+        return self._lead(key, shared, produce)
+
+    def _lead(self, key: str, shared: _SharedStream, produce: Callable[[], Iterator]) -> Iterator:
+        try:
+            for item in produce():
+                shared.append(item)
+                yield item
+        finally:
+            # Also runs when the leader's client disconnects; followers keep what arrived
+            with self._lock:
+                self._streams.pop(key, None)
+            shared.finish()
+
+    def put(self, inputs: Dict, estimate: Dict):
+        """Store a finished answer (e.g. a streamed one)"""
+        self._put(cache_key(inputs), estimate)
+
+    def invalidate(self, inputs: Dict):
+        key = cache_key(inputs)
+        with self._lock:
+            self._memory.pop(key, None)
+        self._conn().execute("DELETE FROM estimate_cache WHERE key = ?", (key,))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else None,
+                "llm_calls": self.llm_calls,
+                "shared_llm_calls": self.shared_llm_calls,
+            }
+
+    # ----- tiers -----
+
+    def _get(self, key: str, count: bool = True) -> Optional[Tuple[Dict, str]]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[1] <= self.ttl:
+                self._memory.move_to_end(key)
+                if count:
+                    self.memory_hits += 1
+                return json.loads(json.dumps(entry[0])), "memory"
+            if entry:
+                del self._memory[key]
+
+        row = self._conn().execute(
+            "SELECT estimate, created_at FROM estimate_cache WHERE key = ? AND created_at >= ?",
+            (key, now - self.ttl)
+        ).fetchone()
+        if row is None:
+            return None
+        estimate = json.loads(row[0])
+        with self._lock:
+            self._remember_locked(key, estimate, row[1])
+            if count:
+                self.disk_hits += 1
+        return json.loads(row[0]), "disk"
+
+    def _put(self, key: str, estimate: Dict):
+        created_at = time.time()
+        with self._lock:
+            self._remember_locked(key, estimate, created_at)
+        self._conn().execute(
+            "INSERT OR REPLACE INTO estimate_cache (key, estimate, created_at) VALUES (?, ?, ?)",
+            (key, json.dumps(estimate), created_at)
+        )
+
+    def _remember_locked(self, key: str, estimate: Dict, created_at: float):
+        self._memory[key] = (estimate, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
@@ -0,0 +1,236 @@
+"""
+Interior AI - Designer Facet Index
+In-memory faceted search over the designers' array attributes. Each designer
+gets a row number; each (facet, value) pair keeps a bitmap of the rows that
+have it, stored as a Python int (one bit per designer, so 30k designers cost
+under 4 KB per value). Queries are a handful of bitwise AND/OR/NOT
+operations plus popcounts, which stays well under a millisecond for the
+whole catalogue.
+
+Query shape, per facet:
+    any  - at least one of the values (OR)
+    all  - every one of the values (AND)
+    none - none of the values (NOT)
+Facets are ANDed together. Counts per value are disjunctive: a facet's own
+"any" selection is left out when counting that facet, so the UI can show how
+many results each additional choice would add.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from designer_recommender import normalize_label
+
+FACET_INDEX_REFRESH_SECONDS = int(os.getenv("FACET_INDEX_REFRESH_SECONDS", "900"))
+
+FACETS = (
+    "design_styles",
+    "room_specializations",
+    "cities_served",
+    "material_preferences",
+    "extra_services",
+    "preferred_communication",
+)
+
+
+def _iter_bits(bitmap: int):
+    while bitmap:
+        low = bitmap & -bitmap
+        yield low.bit_length() - 1
+        bitmap ^= low
+
+
+class FacetIndex:
+    PAGE_SIZE = 1000
+
+    def __init__(self, client, refresh_seconds: int = FACET_INDEX_REFRESH_SECONDS):
+        self.client = client
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self._loaded_at = 0.0
+        self._reset()
+
+    def _reset(self):
+        self.rows: Dict[str, int] = {}
+        self.ids: List[Optional[str]] = []
+        self.alive = 0
+        # facet -> normalised value -> bitmap
+        self.bitmaps: Dict[str, Dict[str, int]] = {facet: {} for facet in FACETS}
+        # facet -> normalised value -> label as first entered
+        self.labels: Dict[str, Dict[str, str]] = {facet: {} for facet in FACETS}
+        self._row_values: List[Dict[str, List[str]]] = []
+
+    # ----- loading -----
+
+    def load(self):
+        """Rebuild every bitmap from the designers table"""
+        start = time.perf_counter()
+        rows, offset = [], 0
+        columns = "id, " + ", ".join(FACETS)
+        while True:
+            page = self.client.table("designers").select(columns) \
+                .range(offset, offset + self.PAGE_SIZE - 1).execute().data or []
+            rows.extend(page)
+            if len(page) < self.PAGE_SIZE:
+                break
+            offset += self.PAGE_SIZE
+
+        with self._lock:
+            self._reset()
+            for d in rows:
+                self._upsert_locked(d)
+            self._loaded_at = time.monotonic()
+
+        print(f"[FACETS] Indexed {len(rows)} designers in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def ensure_fresh(self):
+        if time.monotonic() - self._loaded_at <= self.refresh_seconds:
+            return
+        if self._load_lock.acquire(blocking=self._loaded_at == 0):
+            try:
+                if time.monotonic() - self._loaded_at > self.refresh_seconds:
+                    self.load()
+            finally:
+                self._load_lock.release()
+
+    # ----- incremental updates -----
+
+    def upsert(self, designer: Dict):
+        with self._lock:
+            self._upsert_locked(designer)
+
+    def remove(self, designer_id: str):
+        with self._lock:
+            row = self.rows.get(str(designer_id))
+            if row is not None:
+                self._clear_row_locked(row)
+                self.alive &= ~(1 << row)
+
+    def _upsert_locked(self, d: Dict):
+        designer_id = str(d["id"])
+        row = self.rows.get(designer_id)
+        if row is None:
+            row = len(self.ids)
+            self.rows[designer_id] = row
+            self.ids.append(designer_id)
+            self._row_values.append({})
+        else:
+            self._clear_row_locked(row)
+
+        bit = 1 << row
+        values_by_facet = {}
+        for facet in FACETS:
+            values = []
+            for raw in d.get(facet) or []:
+                value = normalize_label(raw)
+                if not value or value in values:
+                    continue
+                values.append(value)
+                self.labels[facet].setdefault(value, str(raw).strip())
+                self.bitmaps[facet][value] = self.bitmaps[facet].get(value, 0) | bit
+            values_by_facet[facet] = values
+        self._row_values[row] = values_by_facet
+        self.alive |= bit
+
+    def _clear_row_locked(self, row: int):
+        mask = ~(1 << row)
+        for facet, values in self._row_values[row].items():
+            for value in values:
+                bitmap = self.bitmaps[facet].get(value, 0) & mask
+                if bitmap:
+                    self.bitmaps[facet][value] = bitmap
+                else:
+                    self.bitmaps[facet].pop(value, None)
+        self._row_values[row] = {}
+
+    # ----- querying -----
+
+    def _facet_filter(self, facet: str, spec: Dict[str, Iterable[str]], skip_any: bool = False) -> int:
+        """Bitmap of rows passing one facet's any/all/none clauses"""
+        bitmaps = self.bitmaps[facet]
+        result = self.alive
+        if spec.get("any") and not skip_any:
+            union = 0
+            for value in spec["any"]:
+                union |= bitmaps.get(normalize_label(value), 0)
+            result &= union
+        for value in spec.get("all") or []:
+            result &= bitmaps.get(normalize_label(value), 0)
+        for value in spec.get("none") or []:
+            result &= ~bitmaps.get(normalize_label(value), 0)
+        return result
+
+    def search(self, query: Dict[str, Dict[str, List[str]]], limit: int = 24, offset: int = 0) -> Dict:
+        """
+        `query` maps a facet to {"any": [...], "all": [...], "none": [...]}.
+        Returns {"total", "ids" (this page), "facets" ({facet: [{value, label, count}]}), "took_ms"}.
+        """
+        self.ensure_fresh()
+        start = time.perf_counter()
+        query = {facet: spec for facet, spec in (query or {}).items() if facet in FACETS}
+
+        with self._lock:
+            per_facet = {facet: self._facet_filter(facet, spec) for facet, spec in query.items()}
+            result = self.alive
+            for bitmap in per_facet.values():
+                result &= bitmap
+
+            facets = {}
+            for facet in FACETS:
+                base = self.alive
+                for other, bitmap in per_facet.items():
+                    if other != facet:
+                        base &= bitmap
+                if facet in query:
+                    # Disjunctive count: ignore this facet's own OR selection
+                    base &= self._facet_filter(facet, query[facet], skip_any=True)
+                counts = [
+                    {"value": value, "label": self.labels[facet][value], "count": (base & bitmap).bit_count()}
+                    for value, bitmap in self.bitmaps[facet].items()
+                ]
+                facets[facet] = sorted(
+                    (c for c in counts if c["count"]),
+                    key=lambda c: (-c["count"], c["value"])
+                )
+
+            ids = []
+            for i, row in enumerate(_iter_bits(result)):
+                if i >= offset + limit:
+                    break
+                if i >= offset:
+                    ids.append(self.ids[row])
+
+            return {
+                "total": result.bit_count(),
+                "ids": ids,
+                "facets": facets,
+                "took_ms": round((time.perf_counter() - start) * 1000, 3),
+            }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "designers": self.alive.bit_count(),
+                "values": {facet: len(values) for facet, values in self.bitmaps.items()},
+                "loaded_seconds_ago": round(time.monotonic() - self._loaded_at) if self._loaded_at else None,
+            }
+
+
+def parse_facet_args(args) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Read ?design_styles=Modern&design_styles=Boho&cities_served.all=Pune&extra_services.none=3D
+    (a werkzeug MultiDict) into a FacetIndex query.
+    """
+    query: Dict[str, Dict[str, List[str]]] = {}
+    for key in args.keys():
+        facet, _, mode = key.partition(".")
+        mode = mode or "any"
+        if facet not in FACETS or mode not in ("any", "all", "none"):
+            continue
+        values = [v for v in args.getlist(key) if v.strip()]
+        if values:
+            query.setdefault(facet, {})[mode] = values
+    return query
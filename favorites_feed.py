@@ -0,0 +1,120 @@
+"""
+Interior AI - Saved Favorites Feed
+One newest-first feed over two tables: saved_favorites (designers) and
+saved_ai_designs. Each page asks both tables for at most `limit + 1` rows
+after that table's own keyset position, concurrently, and merges the two
+sorted streams with heapq.merge. The cursor records where each table left
+off, so page N costs the same as page 1 however many items a user has saved.
+Both tables need id and created_at columns, see
+supabase/migrations/20260701000000_favorites_feed_keys.sql.
+"""
+
+import base64
+import heapq
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from data_access import fan_out
+from designer_listing import CARD_COLUMNS
+
+FAVORITES_PAGE_SIZE = int(os.getenv("FAVORITES_PAGE_SIZE", "24"))
+FAVORITES_MAX_PAGE_SIZE = 100
+
+# feed item type -> (table, projection)
+SOURCES = {
+    "designer": ("saved_favorites", f"id, created_at, designer_id, designers({CARD_COLUMNS})"),
+    "ai_image": ("saved_ai_designs", "id, created_at, design_id, style, image_url"),
+}
+
+
+class InvalidFeedCursor(ValueError):
+    """The cursor was not produced by favorites_page"""
+
+
+def encode_cursor(positions: Dict[str, Optional[List]]) -> str:
+    payload = json.dumps(positions, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Dict[str, Optional[List]]:
+    if not cursor:
+        return {source: None for source in SOURCES}
+    try:
+        payload = json.loads(base64.urlsafe_b64decode((cursor + "=" * (-len(cursor) % 4)).encode()))
+        return {source: payload.get(source) for source in SOURCES}
+    except (ValueError, AttributeError, TypeError):
+        raise InvalidFeedCursor("invalid cursor")
+
+
+def _quote(value) -> str:
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _saved_at(row: Dict) -> datetime:
+    """created_at as an aware UTC datetime; a naive value is taken to be UTC"""
+    saved_at = datetime.fromisoformat(row["created_at"].replace("Z", "+00:00"))
+    if saved_at.tzinfo is None:
+        return saved_at.replace(tzinfo=timezone.utc)
+    return saved_at.astimezone(timezone.utc)
+
+
+def _fetch(client, source: str, user_id, position: Optional[List], limit: int) -> List[Dict]:
+    """Rows of one source strictly older than `position` ([created_at, id]), newest first"""
+    table, columns = SOURCES[source]
+    query = client.table(table).select(columns).eq("user_id", user_id)
+    if position:
+        created_at, row_id = position
+        query = query.or_(
+            f"created_at.lt.{_quote(created_at)},and(created_at.eq.{_quote(created_at)},id.lt.{_quote(row_id)})"
+        )
+    return query.order("created_at", desc=True).order("id", desc=True).limit(limit).execute().data or []
+
+
+def _stream(source: str, rows: List[Dict]) -> Iterator[Tuple[Tuple, str, Dict]]:
+    for row in rows:
+        yield (_saved_at(row), source, row["id"]), source, row
+
+
+def _to_item(source: str, row: Dict) -> Optional[Dict]:
+    if source == "designer":
+        if not row.get("designers"):
+            # The designer was deleted; skip the dangling favorite
+            return None
+        item = dict(row["designers"])
+    else:
+        item = {k: v for k, v in row.items() if k != "id"}
+    item["favorite_type"] = source
+    item["saved_at"] = row["created_at"]
+    return item
+
+
+def favorites_page(client, user_id, cursor: Optional[str] = None, limit: int = FAVORITES_PAGE_SIZE) -> Tuple[List[Dict], Optional[str]]:
+    """Return (up to `limit` feed items, cursor for the next page or None)"""
+    limit = max(1, min(limit, FAVORITES_MAX_PAGE_SIZE))
+    positions = decode_cursor(cursor)
+
+    results, _ = fan_out({
+        source: (lambda source=source: _fetch(client, source, user_id, positions[source], limit + 1))
+        for source in SOURCES
+    }, label="favorites feed")
+
+    merged = heapq.merge(
+        *(_stream(source, results[source]) for source in SOURCES),
+        key=lambda entry: entry[0],
+        reverse=True
+    )
+
+    items, consumed = [], {source: 0 for source in SOURCES}
+    for _, source, row in merged:
+        if sum(consumed.values()) == limit:
+            break
+        consumed[source] += 1
+        positions[source] = [row["created_at"], row["id"]]
+        item = _to_item(source, row)
+        if item:
+            items.append(item)
+
+    more = any(len(results[source]) > consumed[source] for source in SOURCES)
+    return items, encode_cursor(positions) if more else None
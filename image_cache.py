@@ -0,0 +1,228 @@
+"""
+Interior AI - Generated Image Cache
+Content-addressed cache for provider output. Keys are derived from
+(provider, normalized prompt, width, height, params); values are the raw image
+bytes. A small in-memory LRU sits in front of an on-disk tier that is evicted
+by total size, and each key can hold several variants so repeat requests do
+not always get the identical picture.
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from instance_paths import instance_path
+
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", instance_path("image_cache"))
+IMAGE_CACHE_MEMORY_MB = int(os.getenv("IMAGE_CACHE_MEMORY_MB", "64"))
+IMAGE_CACHE_DISK_MB = int(os.getenv("IMAGE_CACHE_DISK_MB", "1024"))
+# Distinct images kept per key; a key only counts as a hit once it is full
+IMAGE_CACHE_VARIANTS = int(os.getenv("IMAGE_CACHE_VARIANTS", "1"))
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lower-case and collapse whitespace so cosmetic differences share a key"""
+    return " ".join(prompt.lower().split())
+
+
+def make_key(provider: str, prompt: str, width: Optional[int], height: Optional[int], params: Optional[Dict] = None) -> str:
+    material = json.dumps({
+        "provider": provider,
+        "prompt": normalize_prompt(prompt),
+        "width": width,
+        "height": height,
+        "params": params or {},
+    }, sort_keys=True)
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        return 0.0
+
+
+def _link(source: str, target: str) -> bool:
+    try:
+        os.link(source, target)
+        return True
+    except OSError:
+        # Gone, or on another filesystem
+        return False
+
+
+class ImageCache:
+    def __init__(
+        self,
+        directory: str = IMAGE_CACHE_DIR,
+        memory_bytes: int = IMAGE_CACHE_MEMORY_MB * 1024 * 1024,
+        disk_bytes: int = IMAGE_CACHE_DISK_MB * 1024 * 1024,
+        variants: int = IMAGE_CACHE_VARIANTS
+    ):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.variants = max(1, variants)
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, List[bytes]]" = OrderedDict()
+        self._memory_used = 0
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+
+        os.makedirs(directory, exist_ok=True)
+        self._disk_used = sum(os.path.getsize(path) for path in self._disk_files())
+
+    # ----- public API -----
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return one cached variant, or None when the key still needs more variants"""
+        with self._lock:
+            variants = self._memory.get(key)
+            if variants is not None and len(variants) >= self.variants:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return random.choice(variants)
+
+        variants = self._read_disk(key)
+        if len(variants) >= self.variants:
+            with self._lock:
+                self.stats["disk_hits"] += 1
+            self._remember(key, variants)
+            return random.choice(variants)
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, key: str, data: bytes, source_path: Optional[str] = None):
+        """Cache a variant; source_path (a file already holding `data`, e.g. its
+        blob) is hard-linked instead of writing the bytes a second time"""
+        digest = hashlib.sha256(data).hexdigest()
+        key_dir = self._key_dir(key)
+        os.makedirs(key_dir, exist_ok=True)
+
+        path = os.path.join(key_dir, f"{digest}.img")
+        if not os.path.exists(path):
+            # Write-then-rename so readers in other workers never see half a file
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            if not (source_path and _link(source_path, tmp_path)):
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+            os.replace(tmp_path, path)
+            with self._lock:
+                self._disk_used += len(data)
+
+        self._trim_variants(key_dir)
+        self._remember(key, self._read_disk(key))
+        with self._lock:
+            self.stats["stores"] += 1
+        self._evict_disk()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            return {
+                **self.stats,
+                "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+                "memory_keys": len(self._memory),
+                "memory_bytes": self._memory_used,
+                "disk_bytes": self._disk_used,
+                "variants_per_key": self.variants,
+            }
+
+    # ----- memory tier -----
+
+    def _remember(self, key: str, variants: List[bytes]):
+        size = sum(len(v) for v in variants)
+        if size > self.memory_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_used -= sum(len(v) for v in old)
+            self._memory[key] = variants
+            self._memory_used += size
+            while self._memory_used > self.memory_bytes and self._memory:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_used -= sum(len(v) for v in evicted)
+                self.stats["memory_evictions"] += 1
+
+    # ----- disk tier -----
+
+    def _key_dir(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def _read_disk(self, key: str) -> List[bytes]:
+        key_dir = self._key_dir(key)
+        if not os.path.isdir(key_dir):
+            return []
+
+        variants = []
+        for name in os.listdir(key_dir):
+            if not name.endswith(".img"):
+                continue
+            path = os.path.join(key_dir, name)
+            try:
+                with open(path, "rb") as f:
+                    variants.append(f.read())
+                # mtime doubles as "last used" for disk eviction
+                os.utime(path)
+            except FileNotFoundError:
+                # Evicted by another worker between listdir and open
+                continue
+        return variants
+
+    def _trim_variants(self, key_dir: str):
+        paths = sorted(
+            (os.path.join(key_dir, n) for n in os.listdir(key_dir) if n.endswith(".img")),
+            key=_mtime,
+            reverse=True
+        )
+        for path in paths[self.variants:]:
+            self._remove(path)
+
+    def _disk_files(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".img"):
+                    yield os.path.join(root, name)
+
+    def _evict_disk(self):
+        if self._disk_used <= self.disk_bytes:
+            return
+
+        # Least recently used first, down to 90% so we do not evict on every put
+        target = int(self.disk_bytes * 0.9)
+        paths = sorted(self._disk_files(), key=_mtime)
+        for path in paths:
+            if self._disk_used <= target:
+                break
+            self._remove(path)
+            with self._lock:
+                self.stats["disk_evictions"] += 1
+
+    def _remove(self, path: str):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._disk_used -= size
+        try:
+            os.rmdir(os.path.dirname(path))
+        except OSError:
+            pass
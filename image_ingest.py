@@ -0,0 +1,115 @@
+"""
+Interior AI - Upload Ingestion
+Turns an uploaded room photo into a small RGB image without ever holding the
+full-resolution bitmap when it can be avoided:
+
+1. the byte size is capped while reading the upload,
+2. the pixel count is checked from the header, before anything is decoded,
+3. JPEGs are decoded straight at near-target size with draft mode (the
+   decoder's DCT scaling), other formats are shrunk with Image.reduce,
+4. EXIF orientation is applied to the already small image.
+
+Each upload reports an estimate of its peak image memory.
+"""
+
+import io
+import os
+import time
+from typing import Dict, Tuple
+
+from PIL import Image
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_MB", "20")) * 1024 * 1024
+UPLOAD_MAX_PIXELS = int(os.getenv("UPLOAD_MAX_MEGAPIXELS", "64")) * 1_000_000
+INGEST_TARGET_SIZE = 768
+
+# Anything bigger is refused by PIL itself rather than just warned about
+Image.MAX_IMAGE_PIXELS = UPLOAD_MAX_PIXELS
+
+EXIF_ORIENTATION_TAG = 0x0112
+ORIENTATION_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+
+class UploadRejected(ValueError):
+    """The upload breaks a size limit; maps to HTTP 413"""
+
+
+def _read_limited(stream, max_bytes: int) -> bytes:
+    data = stream.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise UploadRejected(f"Image is larger than {max_bytes // (1024 * 1024)} MB.")
+    return data
+
+
+def _bitmap_bytes(image: Image.Image) -> int:
+    return image.width * image.height * len(image.getbands())
+
+
+def ingest_upload(
+    stream,
+    target_size: int = INGEST_TARGET_SIZE,
+    max_bytes: int = UPLOAD_MAX_BYTES,
+    max_pixels: int = UPLOAD_MAX_PIXELS
+) -> Tuple[Image.Image, Dict]:
+    """
+    Decode an upload at roughly `target_size` on its longest side.
+    Returns (image, stats). Raises UploadRejected for oversized uploads.
+    """
+    start = time.perf_counter()
+    data = _read_limited(stream, max_bytes)
+
+    try:
+        # Only parses the header; pixels are decoded on load()
+        image = Image.open(io.BytesIO(data))
+    except Image.DecompressionBombError as e:
+        raise UploadRejected(str(e))
+
+    source_size = image.size
+    source_format = image.format
+    orientation = image.getexif().get(EXIF_ORIENTATION_TAG, 1)
+    if source_size[0] * source_size[1] > max_pixels:
+        raise UploadRejected(
+            f"Image is {source_size[0]}x{source_size[1]}; the limit is {max_pixels // 1_000_000} megapixels."
+        )
+
+    scale = target_size / max(source_size)
+    if source_format == "JPEG" and scale < 1:
+        # Picks the smallest 1/2, 1/4 or 1/8 scale that is still >= this size
+        image.draft("RGB", (int(source_size[0] * scale), int(source_size[1] * scale)))
+
+    image.load()
+    decoded_size = image.size
+    peak_bytes = len(data) + _bitmap_bytes(image)
+
+    # reduce() does not handle palette or bilevel images
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGB')
+
+    factor = max(image.size) // target_size
+    if factor >= 2:
+        reduced = image.reduce(factor)
+        peak_bytes = max(peak_bytes, len(data) + _bitmap_bytes(image) + _bitmap_bytes(reduced))
+        image = reduced
+
+    # Rotating the already reduced image is cheap
+    if orientation in ORIENTATION_TRANSPOSE:
+        image = image.transpose(ORIENTATION_TRANSPOSE[orientation])
+
+    stats = {
+        "bytes": len(data),
+        "format": source_format,
+        "source_size": source_size,
+        "decoded_size": decoded_size,
+        "final_size": image.size,
+        "peak_bytes": peak_bytes,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+    return image, stats
@@ -0,0 +1,19 @@
+"""
+Interior AI - Instance Paths
+Where the local stores (job queue, design store, caches, rate limits, search
+and stats indexes, blobs) keep their files. Everything lives under the Flask
+app's instance folder, which app.py pins to INSTANCE_DIR, so the files land
+in the same place whatever directory the server was started from.
+"""
+
+import os
+
+# Flask's default instance folder for app.py: <project root>/instance
+INSTANCE_DIR = os.path.abspath(
+    os.getenv("INSTANCE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance"))
+)
+
+
+def instance_path(*parts: str) -> str:
+    """Absolute path of `parts` inside the instance folder"""
+    return os.path.join(INSTANCE_DIR, *parts)
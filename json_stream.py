@@ -0,0 +1,116 @@
+"""
+Interior AI - Incremental JSON Parsing
+Reads a JSON document as it streams out of the LLM and reports each value as
+soon as its closing character arrives, rather than waiting for the whole
+document and calling json.loads. Values are reported by path:
+
+    {"recommendations": ["a", "b"]}
+    -> (("recommendations", 0), "a"), (("recommendations", 1), "b"),
+       (("recommendations",), ["a", "b"])
+
+Only values at most `max_depth` levels deep are reported. Each finished value
+is still parsed by json.loads, so the parser only tracks structure: strings,
+escapes, nesting and where each value starts.
+"""
+
+import json
+from typing import Any, Iterator, List, Optional, Tuple
+
+Path = Tuple[Any, ...]
+
+_WHITESPACE = " \t\r\n"
+
+
+class _Frame:
+    __slots__ = ("kind", "path", "expect_key", "key", "index", "start")
+
+    def __init__(self, kind: str, path: Path):
+        self.kind = kind
+        self.path = path
+        self.expect_key = kind == "{"
+        self.key = None
+        self.index = 0
+        self.start: Optional[int] = None
+
+    def child_path(self) -> Path:
+        return self.path + ((self.key,) if self.kind == "{" else (self.index,))
+
+
+class JsonEventParser:
+    def __init__(self, max_depth: int = 2):
+        self.max_depth = max_depth
+        self.buf = ""
+        self.pos = 0
+        self.stack: List[_Frame] = []
+        self.done = False
+        self._in_string = False
+        self._escape = False
+        self._string_is_key = False
+        self._token_start: Optional[int] = None
+        self._scalar_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> Iterator[Tuple[Path, Any]]:
+        """Add text; yield (path, value) for every value it completes"""
+        self.buf += chunk
+        buf = self.buf
+        while self.pos < len(buf) and not self.done:
+            i, c = self.pos, buf[self.pos]
+            self.pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._string_is_key:
+                        self.stack[-1].key = json.loads(buf[self._token_start:i + 1])
+                    else:
+                        yield from self._finish(i + 1)
+                continue
+
+            if self._scalar_start is not None and (c in _WHITESPACE or c in ",]}"):
+                self._scalar_start = None
+                yield from self._finish(i)
+
+            if not self.stack:
+                # Anything before the root container (e.g. a stray fence) is ignored
+                if c in "{[":
+                    self.stack.append(_Frame(c, ()))
+                continue
+
+            frame = self.stack[-1]
+            if c in _WHITESPACE:
+                continue
+            if c == '"':
+                self._in_string = True
+                self._string_is_key = frame.kind == "{" and frame.expect_key
+                self._token_start = i
+                if not self._string_is_key:
+                    frame.start = i
+            elif c in "{[":
+                frame.start = i
+                self.stack.append(_Frame(c, frame.child_path()))
+            elif c in "}]":
+                self.stack.pop()
+                if not self.stack:
+                    self.done = True
+                else:
+                    yield from self._finish(i + 1)
+            elif c == ":":
+                frame.expect_key = False
+            elif c == ",":
+                if frame.kind == "{":
+                    frame.expect_key = True
+                else:
+                    frame.index += 1
+            elif self._scalar_start is None:
+                frame.start = self._scalar_start = i
+
+    def _finish(self, end: int) -> Iterator[Tuple[Path, Any]]:
+        frame = self.stack[-1]
+        path = frame.child_path()
+        if frame.start is not None and len(path) <= self.max_depth:
+            yield path, json.loads(self.buf[frame.start:end])
+        frame.start = None
@@ -0,0 +1,274 @@
+"""
+Interior AI - Gemini Client
+One Gemini client per worker. `google.generativeai` is imported and configured
+once, and every GenerativeModel handle is built once and then reused, so a
+request pays only for generation. Before this, every estimate and timeline
+request re-imported the SDK (under the interpreter's import lock), ran
+configure() and built a fresh model.
+
+- Each model has a concurrency limit (GEMINI_MAX_CONCURRENCY). Callers wait
+  up to GEMINI_QUEUE_TIMEOUT_SECONDS for a slot and then get LLMBusy.
+- GEMINI_WARMUP=true imports the SDK, builds the default model and sends a
+  count_tokens call in the background at startup. The first user request
+  then finds the channel already open.
+- stats() reports setup cost (import, configure, model builds) separately
+  from per-model generation latency, time to first streamed chunk and queue
+  wait.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+GEMINI_QUEUE_TIMEOUT_SECONDS = float(os.getenv("GEMINI_QUEUE_TIMEOUT_SECONDS", "20"))
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "60"))
+GEMINI_WARMUP = os.getenv("GEMINI_WARMUP", "false").lower() in ("1", "true", "yes")
+
+STATS_WINDOW = 100
+
+
+class LLMError(Exception):
+    """A Gemini call could not be made or returned nothing usable"""
+
+
+class LLMBusy(LLMError):
+    """Every slot for the model stayed taken for the whole queue timeout"""
+
+
+class ModelStats:
+    def __init__(self):
+        self.latencies: Deque[float] = deque(maxlen=STATS_WINDOW)
+        self.first_chunk_latencies: Deque[float] = deque(maxlen=STATS_WINDOW)
+        self.calls = 0
+        self.errors = 0
+        self.busy = 0
+        self.in_flight = 0
+        self.queue_wait_seconds = 0.0
+        self.build_seconds = 0.0
+
+    @staticmethod
+    def percentile(samples: Deque[float], pct: float) -> Optional[float]:
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+    def as_dict(self) -> Dict:
+        p50, p95 = self.percentile(self.latencies, 50), self.percentile(self.latencies, 95)
+        first_chunk = self.percentile(self.first_chunk_latencies, 50)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "busy": self.busy,
+            "in_flight": self.in_flight,
+            "build_seconds": round(self.build_seconds, 4),
+            "avg_queue_wait_seconds": round(self.queue_wait_seconds / self.calls, 4) if self.calls else 0.0,
+            "p50_seconds": round(p50, 3) if p50 is not None else None,
+            "p95_seconds": round(p95, 3) if p95 is not None else None,
+            "p50_first_chunk_seconds": round(first_chunk, 3) if first_chunk is not None else None,
+        }
+
+
+class LLMClient:
+    def __init__(
+        self,
+        api_key: Optional[str] = GEMINI_API_KEY,
+        default_model: str = GEMINI_MODEL,
+        max_concurrency: int = GEMINI_MAX_CONCURRENCY,
+        queue_timeout: float = GEMINI_QUEUE_TIMEOUT_SECONDS,
+        timeout: float = GEMINI_TIMEOUT_SECONDS
+    ):
+        self.api_key = api_key
+        self.default_model = default_model
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._genai = None
+        self._models: Dict[str, object] = {}
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._stats: Dict[str, ModelStats] = {}
+        self.import_seconds = None
+        self.configure_seconds = None
+        self.warmed_up = False
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.api_key)
+
+    # ----- setup (once per worker) -----
+
+    def _sdk(self):
+        with self._lock:
+            if self._genai is None:
+                if not self.api_key:
+                    raise LLMError("GEMINI_API_KEY is not set")
+                start = time.perf_counter()
+                import google.generativeai as genai
+                self.import_seconds = time.perf_counter() - start
+                start = time.perf_counter()
+                genai.configure(api_key=self.api_key)
+                self.configure_seconds = time.perf_counter() - start
+                self._genai = genai
+            return self._genai
+
+    def model(self, name: Optional[str] = None):
+        """The shared GenerativeModel handle for `name`"""
+        name = name or self.default_model
+        genai = self._sdk()
+        with self._lock:
+            handle = self._models.get(name)
+            if handle is None:
+                start = time.perf_counter()
+                handle = genai.GenerativeModel(name)
+                self._models[name] = handle
+                self._slots[name] = threading.BoundedSemaphore(self.max_concurrency)
+                self._stats_for(name).build_seconds = time.perf_counter() - start
+            return handle
+
+    def _stats_for(self, name: str) -> ModelStats:
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = ModelStats()
+        return stats
+
+    def warm_up(self, name: Optional[str] = None):
+        """Import, configure, build the model and open the connection with a free count_tokens call"""
+        try:
+            self.model(name).count_tokens("ping", request_options={"timeout": self.timeout})
+            self.warmed_up = True
+            print(f"[GEMINI] Warmed up {name or self.default_model} "
+                  f"(import {self.import_seconds:.2f}s, configure {self.configure_seconds:.3f}s)")
+        except Exception as e:
+            print(f"[GEMINI] Warm-up failed: {e}")
+
+    def warm_up_async(self, name: Optional[str] = None):
+        threading.Thread(target=self.warm_up, args=(name,), name="gemini-warmup", daemon=True).start()
+
+    # ----- calls -----
+
+    @contextmanager
+    def _slot(self, name: str):
+        start = time.perf_counter()
+        if not self._slots[name].acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self._stats_for(name).busy += 1
+            raise LLMBusy(f"{name} is at its concurrency limit ({self.max_concurrency})")
+        stats = self._stats_for(name)
+        with self._lock:
+            stats.calls += 1
+            stats.in_flight += 1
+            stats.queue_wait_seconds += time.perf_counter() - start
+        try:
+            yield stats
+        finally:
+            with self._lock:
+                stats.in_flight -= 1
+            self._slots[name].release()
+
+    def generate_json(self, prompt: str, model: Optional[str] = None) -> Dict:
+        """Generate with a JSON response type and return the parsed object"""
+        name = model or self.default_model
+        handle = self.model(name)
+        with self._slot(name) as stats:
+            start = time.perf_counter()
+            try:
+                response = handle.generate_content(
+                    prompt,
+                    generation_config={"response_mime_type": "application/json"},
+                    request_options={"timeout": self.timeout}
+                )
+                text = response.text
+            except Exception:
+                with self._lock:
+                    stats.errors += 1
+                raise
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stats.latencies.append(elapsed)
+
+        print(f"[GEMINI] {name} answered in {elapsed:.2f}s ({len(text)} chars)")
+        return json.loads(text)
+
+    def stream_json(self, prompt: str, model: Optional[str] = None) -> Iterator[str]:
+        """
+        Generate with a JSON response type, yielding text chunks as they arrive
+        (feed them to json_stream.JsonEventParser). The model's slot is held
+        until the generator is exhausted or closed.
+        """
+        name = model or self.default_model
+        handle = self.model(name)
+        with self._slot(name) as stats:
+            start = time.perf_counter()
+            first_chunk = None
+            chars = 0
+            try:
+                response = handle.generate_content(
+                    prompt,
+                    generation_config={"response_mime_type": "application/json"},
+                    request_options={"timeout": self.timeout},
+                    stream=True
+                )
+                for chunk in response:
+                    try:
+                        text = chunk.text
+                    except ValueError:
+                        # A chunk carrying only finish/safety metadata has no text
+                        continue
+                    if first_chunk is None:
+                        first_chunk = time.perf_counter() - start
+                        with self._lock:
+                            stats.first_chunk_latencies.append(first_chunk)
+                    chars += len(text)
+                    yield text
+            except GeneratorExit:
+                # The client went away; stop quietly and give the slot back
+                raise
+            except Exception:
+                with self._lock:
+                    stats.errors += 1
+                raise
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stats.latencies.append(elapsed)
+
+        print(f"[GEMINI] {name} streamed {chars} chars in {elapsed:.2f}s (first chunk {first_chunk or 0:.2f}s)")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "default_model": self.default_model,
+                "max_concurrency": self.max_concurrency,
+                "warmed_up": self.warmed_up,
+                "setup": {
+                    "import_seconds": round(self.import_seconds, 3) if self.import_seconds is not None else None,
+                    "configure_seconds": round(self.configure_seconds, 4) if self.configure_seconds is not None else None,
+                },
+                "models": {name: stats.as_dict() for name, stats in self._stats.items()},
+            }
+
+
+_llm: Optional[LLMClient] = None
+_llm_lock = threading.Lock()
+
+
+def get_llm() -> LLMClient:
+    """The process-wide Gemini client, warmed up in the background if GEMINI_WARMUP is set"""
+    global _llm
+    with _llm_lock:
+        if _llm is None:
+            _llm = LLMClient()
+            if GEMINI_WARMUP and _llm.api_key:
+                _llm.warm_up_async()
+        return _llm
@@ -0,0 +1,192 @@
+"""
+Interior AI - Designer Profile Cache
+Read-through, in-process cache of designers rows, addressable by id or email.
+
+- Fresh for PROFILE_CACHE_TTL_SECONDS; after that, for another
+  PROFILE_CACHE_STALE_SECONDS, the stale row is served while one background
+  refresh runs (stale-while-revalidate). Older entries are fetched inline.
+- At most PROFILE_CACHE_MAX_ENTRIES rows, least recently used evicted first.
+- Write paths call invalidate() (or put() with the row they just wrote).
+  Invalidation is per process, so the TTL bounds staleness across workers.
+- Both record the write against that designer's id and email. A fetch of
+  the same designer that started before the write (a background refresh or
+  an inline miss) still answers its caller but is not cached, so it cannot
+  put back the row a write just replaced. Fetches only coalesce with fetches
+  started after the same write, so a miss cannot join an older request.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from data_access import coalesced
+
+PROFILE_CACHE_TTL_SECONDS = float(os.getenv("PROFILE_CACHE_TTL_SECONDS", "60"))
+PROFILE_CACHE_STALE_SECONDS = float(os.getenv("PROFILE_CACHE_STALE_SECONDS", "300"))
+PROFILE_CACHE_MAX_ENTRIES = int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", "2000"))
+
+
+class DesignerProfileCache:
+    def __init__(
+        self,
+        client,
+        ttl: float = PROFILE_CACHE_TTL_SECONDS,
+        stale_ttl: float = PROFILE_CACHE_STALE_SECONDS,
+        max_entries: int = PROFILE_CACHE_MAX_ENTRIES
+    ):
+        self.client = client
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # designer id -> (row, fetched_at)
+        self._entries: "OrderedDict[str, Tuple[Dict, float]]" = OrderedDict()
+        self._ids_by_email: Dict[str, str] = {}
+        self._refreshing = set()
+        # Counts writes; _written_at maps ("id"|"email", value) to the count at
+        # that designer's last write (one entry per designer ever written)
+        self._generation = 0
+        self._written_at: Dict[Tuple[str, str], int] = {}
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="profile-refresh")
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    # ----- public API -----
+
+    def get_by_id(self, designer_id) -> Optional[Dict]:
+        return self._get(("id", str(designer_id)))
+
+    def get_by_email(self, email: str) -> Optional[Dict]:
+        return self._get(("email", email.strip().lower()))
+
+    def put(self, row: Dict):
+        """Store a row the caller just read or wrote"""
+        with self._lock:
+            self._mark_written_locked(str(row["id"]), self._email_of(row))
+            self._store_locked(row)
+
+    def invalidate(self, designer_id=None, email: Optional[str] = None):
+        with self._lock:
+            if email and designer_id is None:
+                designer_id = self._ids_by_email.get(email.strip().lower())
+            written_email = email.strip().lower() if email else None
+            if designer_id is not None and not written_email:
+                cached = self._entries.get(str(designer_id))
+                written_email = self._email_of(cached[0]) if cached else None
+            self._mark_written_locked(str(designer_id) if designer_id is not None else None, written_email)
+            if designer_id is not None:
+                entry = self._entries.pop(str(designer_id), None)
+                if entry:
+                    self._ids_by_email.pop(self._email_of(entry[0]), None)
+                    self.invalidations += 1
+            if email:
+                self._ids_by_email.pop(email.strip().lower(), None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_ratio": round((self.hits + self.stale_hits) / lookups, 3) if lookups else None,
+                "refreshes": self.refreshes,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    # ----- internals -----
+
+    @staticmethod
+    def _email_of(row: Dict) -> str:
+        return (row.get("email") or "").strip().lower()
+
+    def _mark_written_locked(self, designer_id: Optional[str], email: Optional[str]):
+        self._generation += 1
+        if designer_id:
+            self._written_at[("id", designer_id)] = self._generation
+        if email:
+            self._written_at[("email", email)] = self._generation
+
+    def _current_locked(self, key: Tuple[str, str], row: Dict, generation: int) -> bool:
+        """False if this designer was written after a fetch started at `generation`"""
+        keys = (key, ("id", str(row["id"])), ("email", self._email_of(row)))
+        return all(self._written_at.get(k, 0) <= generation for k in keys)
+
+    def _lookup_locked(self, key: Tuple[str, str]) -> Optional[Tuple[Dict, float]]:
+        kind, value = key
+        designer_id = value if kind == "id" else self._ids_by_email.get(value)
+        if designer_id is None:
+            return None
+        entry = self._entries.get(designer_id)
+        if entry:
+            self._entries.move_to_end(designer_id)
+        return entry
+
+    def _get(self, key: Tuple[str, str]) -> Optional[Dict]:
+        with self._lock:
+            entry = self._lookup_locked(key)
+            age = time.monotonic() - entry[1] if entry else None
+            if entry and age <= self.ttl:
+                self.hits += 1
+                return dict(entry[0])
+            if entry and age <= self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    self._executor.submit(self._refresh, key, self._generation)
+                return dict(entry[0])
+            self.misses += 1
+            generation = self._generation
+
+        row = self._fetch(key, generation)
+        if row is None:
+            return None
+        with self._lock:
+            if self._current_locked(key, row, generation):
+                self._store_locked(row)
+        return dict(row)
+
+    def _refresh(self, key: Tuple[str, str], generation: int):
+        try:
+            row = self._fetch(key, generation)
+            with self._lock:
+                self.refreshes += 1
+                # Fetched before a write invalidated the cache; it may be the old row
+                if row is not None and self._current_locked(key, row, generation):
+                    self._store_locked(row)
+        except Exception as e:
+            print(f"[PROFILE CACHE] Background refresh of {key} failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _fetch(self, key: Tuple[str, str], generation: int) -> Optional[Dict]:
+        kind, value = key
+        # Concurrent misses for the same designer share one request, but only
+        # with requests started after the same write
+        res = coalesced(
+            self.client.table("designers").select("*").eq(kind, value).limit(1),
+            scope=("profile-generation", generation)
+        )
+        return res.data[0] if res.data else None
+
+    def _store_locked(self, row: Dict):
+        designer_id = str(row["id"])
+        self._entries[designer_id] = (dict(row), time.monotonic())
+        self._entries.move_to_end(designer_id)
+        if self._email_of(row):
+            self._ids_by_email[self._email_of(row)] = designer_id
+        while len(self._entries) > self.max_entries:
+            _, (old, _) = self._entries.popitem(last=False)
+            self._ids_by_email.pop(self._email_of(old), None)
+            self.evictions += 1
@@ -0,0 +1,146 @@
+"""
+Interior AI - Project Scheduler
+Turns phase durations into calendar dates on a 5-, 6- or 7-day work week
+with NumPy's business-day arithmetic (numpy.busday_offset over a
+busdaycalendar), instead of asking an LLM to count days. Results are exact
+and repeatable.
+
+- A phase lasting N weeks takes N x work_week_days working days.
+- A phase starts on the first working day after every phase it depends on
+  has ended. Without `depends_on` it follows the previous phase; with an
+  empty list it starts with the project.
+- Holidays are skipped like weekends. They can be given explicitly or taken
+  from a named calendar in HOLIDAY_CALENDARS.
+- Phases whose dependencies are all scheduled are dated together, one
+  vectorised busday_offset call per dependency level.
+"""
+
+import math
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+WEEKMASKS = {5: "1111100", 6: "1111110", 7: "1111111"}
+
+# name -> fixed-date (month, day) holidays, repeated every year
+HOLIDAY_CALENDARS = {
+    # Republic Day, Independence Day, Gandhi Jayanti
+    "india_national": ((1, 26), (8, 15), (10, 2)),
+}
+# How many years past the start year a named calendar is expanded
+CALENDAR_YEARS = 5
+
+
+class ScheduleError(ValueError):
+    """The phases, dates or calendar cannot be scheduled"""
+
+
+def _parse_date(value, field: str) -> np.datetime64:
+    try:
+        return np.datetime64(date.fromisoformat(str(value)[:10]), "D")
+    except ValueError:
+        raise ScheduleError(f"{field} must be a YYYY-MM-DD date")
+
+
+def holiday_dates(start: np.datetime64, holidays: Iterable = (), calendar: Optional[str] = None) -> np.ndarray:
+    dates = [_parse_date(h, "holidays") for h in holidays or ()]
+    if calendar:
+        if calendar not in HOLIDAY_CALENDARS:
+            raise ScheduleError(f"unknown holiday calendar: {calendar}")
+        first_year = start.astype(object).year
+        for year in range(first_year, first_year + CALENDAR_YEARS + 1):
+            dates.extend(np.datetime64(date(year, m, d), "D") for m, d in HOLIDAY_CALENDARS[calendar])
+    return np.array(sorted(set(dates)), dtype="datetime64[D]")
+
+
+def _levels(phases: Sequence[Dict]) -> Tuple[List[List[int]], List[List[int]]]:
+    """(phase indices grouped so each comes after all its dependencies, dependency indices per phase)"""
+    index = {}
+    for i, phase in enumerate(phases):
+        if phase["name"] in index:
+            raise ScheduleError(f"duplicate phase: {phase['name']}")
+        index[phase["name"]] = i
+
+    deps = []
+    for i, phase in enumerate(phases):
+        names = phase.get("depends_on")
+        if names is None:
+            names = [phases[i - 1]["name"]] if i else []
+        missing = [n for n in names if n not in index]
+        if missing:
+            raise ScheduleError(f"{phase['name']} depends on unknown phases: {missing}")
+        deps.append([index[n] for n in names])
+
+    level = [None] * len(phases)
+    for _ in range(len(phases)):
+        changed = False
+        for i, d in enumerate(deps):
+            if level[i] is None and all(level[j] is not None for j in d):
+                level[i] = 1 + max((level[j] for j in d), default=-1)
+                changed = True
+        if not changed:
+            break
+    if None in level:
+        raise ScheduleError("phase dependencies contain a cycle")
+
+    grouped: List[List[int]] = [[] for _ in range(max(level, default=-1) + 1)]
+    for i, lvl in enumerate(level):
+        grouped[lvl].append(i)
+    return grouped, deps
+
+
+def schedule(
+    start_date,
+    phases: Sequence[Dict],
+    work_week_days: int = 5,
+    holidays: Iterable = (),
+    calendar: Optional[str] = None
+) -> Dict:
+    """
+    `phases` are {"name", "duration_weeks", optional "depends_on", optional "details"}.
+    Returns {"total_project_days", "end_date", "working_days", "phases": [... + start_date, end_date, working_days]}.
+    """
+    if work_week_days not in WEEKMASKS:
+        raise ScheduleError("work_week must be 5, 6 or 7")
+    if not phases:
+        raise ScheduleError("at least one phase is required")
+
+    start = _parse_date(start_date, "start_date")
+    busdays = np.busdaycalendar(weekmask=WEEKMASKS[work_week_days], holidays=holiday_dates(start, holidays, calendar))
+
+    weeks = np.array([float(p["duration_weeks"]) for p in phases])
+    if (weeks <= 0).any():
+        raise ScheduleError("every phase needs a positive duration")
+    working_days = np.array([max(1, math.ceil(w * work_week_days)) for w in weeks])
+
+    levels, deps = _levels(phases)
+    starts = np.empty(len(phases), dtype="datetime64[D]")
+    ends = np.empty(len(phases), dtype="datetime64[D]")
+    one_day = np.timedelta64(1, "D")
+    for level in levels:
+        earliest = np.array(
+            [max((ends[j] for j in deps[i]), default=start - one_day) + one_day for i in level],
+            dtype="datetime64[D]"
+        )
+        level_starts = np.busday_offset(earliest, 0, roll="forward", busdaycal=busdays)
+        starts[level] = level_starts
+        ends[level] = np.busday_offset(level_starts, working_days[level] - 1, busdaycal=busdays)
+
+    first, last = starts.min(), ends.max()
+    return {
+        "total_project_days": int((last - first) / one_day) + 1,
+        "end_date": str(last),
+        "working_days": int(np.busday_count(first, last + one_day, busdaycal=busdays)),
+        "phases": [
+            {
+                "name": p["name"],
+                "duration_weeks": p["duration_weeks"],
+                "details": p.get("details", ""),
+                "start_date": str(starts[i]),
+                "end_date": str(ends[i]),
+                "working_days": int(working_days[i]),
+            }
+            for i, p in enumerate(phases)
+        ],
+    }
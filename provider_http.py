@@ -0,0 +1,131 @@
+"""
+Interior AI - Provider HTTP Transport
+One pooled httpx.Client per image provider, so repeated generations reuse
+warm keep-alive connections instead of paying a TCP + TLS handshake per call.
+Connect and read timeouts are set separately, HTTP/2 can be switched on when
+the `h2` package is installed, and every request is counted in per-provider
+metrics (new vs. reused connections, latency, errors).
+"""
+
+import importlib.util
+import os
+import threading
+import time
+from typing import Dict
+
+import httpx
+
+PROVIDER_MAX_CONNECTIONS = int(os.getenv("PROVIDER_MAX_CONNECTIONS", "10"))
+PROVIDER_MAX_KEEPALIVE = int(os.getenv("PROVIDER_MAX_KEEPALIVE", "5"))
+PROVIDER_KEEPALIVE_EXPIRY = float(os.getenv("PROVIDER_KEEPALIVE_EXPIRY", "60"))
+PROVIDER_CONNECT_TIMEOUT = float(os.getenv("PROVIDER_CONNECT_TIMEOUT", "10"))
+# How long a request may wait for a free connection from the pool
+PROVIDER_POOL_TIMEOUT = float(os.getenv("PROVIDER_POOL_TIMEOUT", "30"))
+PROVIDER_HTTP2 = os.getenv("PROVIDER_HTTP2", "false").lower() in ("1", "true", "yes")
+# The providers were always called with verify=False; keep that unless asked
+PROVIDER_VERIFY_SSL = os.getenv("PROVIDER_VERIFY_SSL", "false").lower() in ("1", "true", "yes")
+
+
+class ProviderTransport:
+    def __init__(self):
+        self.http2 = PROVIDER_HTTP2
+        if self.http2 and importlib.util.find_spec("h2") is None:
+            print("[WARNING] PROVIDER_HTTP2 is set but the 'h2' package is missing; using HTTP/1.1")
+            self.http2 = False
+
+        self._lock = threading.Lock()
+        self._clients: Dict[str, httpx.Client] = {}
+        self._metrics: Dict[str, Dict] = {}
+
+    def _client(self, provider: str) -> httpx.Client:
+        with self._lock:
+            client = self._clients.get(provider)
+            if client is None:
+                client = httpx.Client(
+                    http2=self.http2,
+                    verify=PROVIDER_VERIFY_SSL,
+                    limits=httpx.Limits(
+                        max_connections=PROVIDER_MAX_CONNECTIONS,
+                        max_keepalive_connections=PROVIDER_MAX_KEEPALIVE,
+                        keepalive_expiry=PROVIDER_KEEPALIVE_EXPIRY
+                    )
+                )
+                self._clients[provider] = client
+                self._metrics[provider] = {
+                    "requests": 0,
+                    "in_flight": 0,
+                    "new_connections": 0,
+                    "errors": 0,
+                    "timeouts": 0,
+                    "total_seconds": 0.0,
+                }
+            return client
+
+    def request(
+        self,
+        provider: str,
+        method: str,
+        url: str,
+        read_timeout: float = 90,
+        **kwargs
+    ) -> httpx.Response:
+        client = self._client(provider)
+        metrics = self._metrics[provider]
+        # A caller short on time passes a small read_timeout; no phase may exceed it
+        timeout = httpx.Timeout(
+            connect=min(PROVIDER_CONNECT_TIMEOUT, read_timeout),
+            read=read_timeout,
+            write=read_timeout,
+            pool=min(PROVIDER_POOL_TIMEOUT, read_timeout)
+        )
+
+        opened = []
+
+        def trace(event_name: str, info: Dict):
+            # httpcore reports connection setup only when no pooled connection was free
+            if event_name == "connection.connect_tcp.complete":
+                opened.append(event_name)
+
+        with self._lock:
+            metrics["requests"] += 1
+            metrics["in_flight"] += 1
+        start = time.perf_counter()
+        try:
+            return client.request(method, url, timeout=timeout, extensions={"trace": trace}, **kwargs)
+        except httpx.TimeoutException:
+            with self._lock:
+                metrics["timeouts"] += 1
+            raise
+        except httpx.HTTPError:
+            with self._lock:
+                metrics["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                metrics["in_flight"] -= 1
+                metrics["new_connections"] += len(opened)
+                metrics["total_seconds"] += time.perf_counter() - start
+
+    def get(self, provider: str, url: str, read_timeout: float = 90, **kwargs) -> httpx.Response:
+        return self.request(provider, "GET", url, read_timeout=read_timeout, **kwargs)
+
+    def post(self, provider: str, url: str, read_timeout: float = 90, **kwargs) -> httpx.Response:
+        return self.request(provider, "POST", url, read_timeout=read_timeout, **kwargs)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            result = {}
+            for provider, m in self._metrics.items():
+                result[provider] = {
+                    **m,
+                    "reused_connections": max(0, m["requests"] - m["in_flight"] - m["new_connections"]),
+                    "avg_seconds": round(m["total_seconds"] / m["requests"], 3) if m["requests"] else 0.0,
+                    "total_seconds": round(m["total_seconds"], 3),
+                }
+            return {"http2": self.http2, "providers": result}
+
+    def close(self):
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
@@ -0,0 +1,326 @@
+"""
+Interior AI - Provider Router
+Chooses which image provider serves a generation. Every provider has its own
+latency/error statistics and a circuit breaker; a failing provider is skipped
+until its circuit half-opens again. Retry-After and "model loading" hints are
+honoured with a bounded backoff, and a hedged request can be sent to the next
+provider once the first one is slower than its usual latency percentile.
+Calls also draw from the provider's token bucket (see rate_limit.py).
+
+PROVIDER_DEADLINE_SECONDS bounds the whole routed call: each attempt is given
+only the time that is left as its timeout, and a provider is skipped once less
+time remains than it needs to connect.
+"""
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+PROVIDER_FAILURE_THRESHOLD = int(os.getenv("PROVIDER_FAILURE_THRESHOLD", "3"))
+PROVIDER_ERROR_RATE_THRESHOLD = float(os.getenv("PROVIDER_ERROR_RATE_THRESHOLD", "0.5"))
+PROVIDER_CIRCUIT_OPEN_SECONDS = float(os.getenv("PROVIDER_CIRCUIT_OPEN_SECONDS", "30"))
+PROVIDER_MAX_RETRIES = int(os.getenv("PROVIDER_MAX_RETRIES", "2"))
+# Longest we are willing to sleep on a retry hint before failing over instead
+PROVIDER_MAX_BACKOFF_SECONDS = float(os.getenv("PROVIDER_MAX_BACKOFF_SECONDS", "30"))
+# Upper bound on the whole routed call, across retries and failover
+PROVIDER_DEADLINE_SECONDS = float(os.getenv("PROVIDER_DEADLINE_SECONDS", "150"))
+PROVIDER_HEDGING = os.getenv("PROVIDER_HEDGING", "false").lower() in ("1", "true", "yes")
+PROVIDER_HEDGE_PERCENTILE = float(os.getenv("PROVIDER_HEDGE_PERCENTILE", "95"))
+PROVIDER_HEDGE_MIN_SAMPLES = int(os.getenv("PROVIDER_HEDGE_MIN_SAMPLES", "20"))
+
+STATS_WINDOW = 50
+
+
+class ProviderError(Exception):
+    """A provider call failed. `retry_after` carries the provider's own hint."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None, retryable: bool = True):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.retryable = retryable
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        # HTTP-date form is rare for these APIs; treat as "soon"
+        return None
+
+
+class ProviderStats:
+    def __init__(self):
+        self.latencies: Deque[float] = deque(maxlen=STATS_WINDOW)
+        self.outcomes: Deque[bool] = deque(maxlen=STATS_WINDOW)
+        self.calls = 0
+        self.failures = 0
+
+    def record(self, seconds: float, ok: bool):
+        self.calls += 1
+        if ok:
+            self.latencies.append(seconds)
+        else:
+            self.failures += 1
+        self.outcomes.append(ok)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+
+class CircuitBreaker:
+    """closed -> open after repeated failures -> half_open (one probe) -> closed"""
+
+    def __init__(self):
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_until = 0.0
+        self._probe_in_flight = False
+
+    def available(self) -> bool:
+        """Would a call be let through right now? (does not use up the probe)"""
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            return time.monotonic() >= self.opened_until
+        return not self._probe_in_flight
+
+    def allow(self) -> bool:
+        """Let a call through, reserving the single half-open probe if needed"""
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() >= self.opened_until:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def release_probe(self):
+        """Give back a half-open probe that allow() reserved but was never used"""
+        self._probe_in_flight = False
+
+    def record_success(self):
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self, stats: ProviderStats, retry_after: Optional[float] = None):
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        too_many = self.consecutive_failures >= PROVIDER_FAILURE_THRESHOLD
+        too_often = len(stats.outcomes) >= 10 and stats.error_rate() >= PROVIDER_ERROR_RATE_THRESHOLD
+        if self.state == "half_open" or too_many or too_often:
+            self.state = "open"
+            self.opened_until = time.monotonic() + max(PROVIDER_CIRCUIT_OPEN_SECONDS, retry_after or 0)
+
+
+class ProviderRouter:
+    """
+    `providers` maps a provider name to a callable taking the prompt and a
+    timeout in seconds and returning image bytes (or None / raising
+    ProviderError on failure). `order` is the preference order; the first
+    entry is the primary. `limiters` optionally maps a provider name to a
+    TokenBucket. `min_call_seconds` is the least time worth starting a call
+    with, normally the connect timeout.
+    """
+
+    def __init__(
+        self,
+        providers: Dict[str, Callable[[str, float], Optional[bytes]]],
+        order: List[str],
+        limiters: Optional[Dict] = None,
+        min_call_seconds: float = 0.0
+    ):
+        self.providers = providers
+        self.limiters = limiters or {}
+        self.min_call_seconds = min_call_seconds
+        self.order = [p for p in order if p in providers]
+        self.stats_by_provider = {name: ProviderStats() for name in self.order}
+        self.breakers = {name: CircuitBreaker() for name in self.order}
+        self._lock = threading.Lock()
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="provider-hedge")
+
+    # ----- public API -----
+
+    def generate(self, prompt: str) -> Tuple[Optional[str], Optional[bytes]]:
+        """Return (provider, image bytes), or (None, None) if every provider failed"""
+        deadline = time.monotonic() + PROVIDER_DEADLINE_SECONDS
+        candidates = self._available()
+        if not candidates:
+            print("[ROUTER] Every provider circuit is open")
+            return None, None
+
+        while candidates and time.monotonic() < deadline:
+            primary = candidates.pop(0)
+            hedge_after = self._hedge_delay(primary) if candidates else None
+
+            if hedge_after is None:
+                data = self._call_with_retries(primary, prompt, deadline)
+                if data:
+                    return primary, data
+                continue
+
+            winner, data, hedged = self._call_hedged(primary, candidates[0], prompt, deadline, hedge_after)
+            if data:
+                return winner, data
+            if hedged:
+                # The hedge target has been tried as well
+                candidates.pop(0)
+
+        return None, None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "order": self.order,
+                "hedging": PROVIDER_HEDGING,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "rate_limits": {name: bucket.stats() for name, bucket in self.limiters.items()},
+                "providers": {
+                    name: {
+                        "circuit": self.breakers[name].state,
+                        "calls": s.calls,
+                        "failures": s.failures,
+                        "error_rate": round(s.error_rate(), 3),
+                        "p50_seconds": s.percentile(50),
+                        "p95_seconds": s.percentile(95),
+                    }
+                    for name, s in self.stats_by_provider.items()
+                },
+            }
+
+    # ----- internals -----
+
+    def _available(self) -> List[str]:
+        with self._lock:
+            return [name for name in self.order if self.breakers[name].available()]
+
+    def _hedge_delay(self, provider: str) -> Optional[float]:
+        if not PROVIDER_HEDGING:
+            return None
+        stats = self.stats_by_provider[provider]
+        if len(stats.latencies) < PROVIDER_HEDGE_MIN_SAMPLES:
+            return None
+        return stats.percentile(PROVIDER_HEDGE_PERCENTILE)
+
+    def _call_once(self, provider: str, prompt: str, deadline: float) -> Optional[bytes]:
+        if deadline - time.monotonic() < self.min_call_seconds:
+            raise ProviderError("not enough time left before the deadline", retryable=False)
+
+        # An open circuit must not use up (or wait for) a rate limit token
+        with self._lock:
+            allowed = self.breakers[provider].allow()
+        if not allowed:
+            raise ProviderError("circuit open", retryable=False)
+
+        limiter = self.limiters.get(provider)
+        if limiter and not limiter.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            with self._lock:
+                self.breakers[provider].release_probe()
+            raise ProviderError("local rate limit budget exhausted", retryable=False)
+
+        start = time.monotonic()
+        retry_after = None
+        try:
+            # The call may use whatever is left of the deadline, and no more
+            data = self.providers[provider](prompt, max(self.min_call_seconds, deadline - start))
+        except ProviderError as e:
+            retry_after = e.retry_after
+            self._record(provider, time.monotonic() - start, False, retry_after)
+            raise
+        except Exception as e:
+            self._record(provider, time.monotonic() - start, False)
+            raise ProviderError(str(e))
+
+        self._record(provider, time.monotonic() - start, bool(data))
+        return data
+
+    def _call_with_retries(self, provider: str, prompt: str, deadline: float) -> Optional[bytes]:
+        for attempt in range(PROVIDER_MAX_RETRIES + 1):
+            try:
+                data = self._call_once(provider, prompt, deadline)
+                if data:
+                    return data
+                return None
+            except ProviderError as e:
+                if not e.retryable or attempt == PROVIDER_MAX_RETRIES:
+                    print(f"[ROUTER] {provider} failed: {e}")
+                    return None
+
+                # Provider hint when given, otherwise exponential backoff with jitter
+                delay = e.retry_after if e.retry_after is not None else (2 ** attempt)
+                delay = delay * random.uniform(1.0, 1.2)
+                if delay > PROVIDER_MAX_BACKOFF_SECONDS or time.monotonic() + delay >= deadline:
+                    print(f"[ROUTER] {provider} asked to wait {delay:.0f}s; failing over")
+                    return None
+                if self.breakers[provider].state == "open":
+                    return None
+
+                print(f"[ROUTER] {provider} failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+        return None
+
+    def _call_hedged(
+        self,
+        primary: str,
+        secondary: str,
+        prompt: str,
+        deadline: float,
+        hedge_after: float
+    ) -> Tuple[Optional[str], Optional[bytes], bool]:
+        """Returns (winner, data, whether the secondary was actually started)"""
+        futures = {self.executor.submit(self._call_with_retries, primary, prompt, deadline): primary}
+        done, _ = wait(futures, timeout=hedge_after)
+
+        hedged = not done
+        if hedged:
+            print(f"[ROUTER] {primary} slower than p{PROVIDER_HEDGE_PERCENTILE:.0f} ({hedge_after:.1f}s); hedging to {secondary}")
+            with self._lock:
+                self.hedges += 1
+            futures[self.executor.submit(self._call_with_retries, secondary, prompt, deadline)] = secondary
+
+        pending = set(futures)
+        while pending:
+            remaining = max(0.0, deadline - time.monotonic())
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                data = future.result()
+                if data:
+                    winner = futures[future]
+                    if winner != primary:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    return winner, data, hedged
+
+        return None, None, hedged
+
+    def _record(self, provider: str, seconds: float, ok: bool, retry_after: Optional[float] = None):
+        with self._lock:
+            stats = self.stats_by_provider[provider]
+            stats.record(seconds, ok)
+            breaker = self.breakers[provider]
+            if ok:
+                breaker.record_success()
+            else:
+                breaker.record_failure(stats, retry_after)
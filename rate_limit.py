@@ -0,0 +1,136 @@
+"""
+Interior AI - Provider Rate Limiting
+Token buckets that keep image generation inside each provider's quota. A call
+only waits when the shared budget is actually exhausted, instead of every
+request sleeping between styles. Buckets are per process by default; with
+RATE_LIMIT_BACKEND=sqlite all workers on the host draw from the same bucket.
+
+Per provider: <PROVIDER>_RATE_PER_SECOND and <PROVIDER>_BURST, e.g.
+POLLINATIONS_RATE_PER_SECOND=1 POLLINATIONS_BURST=4.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable
+
+from instance_paths import instance_path
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_DB_PATH = os.getenv("RATE_LIMIT_DB_PATH", instance_path("rate_limits.sqlite3"))
+DEFAULT_RATE_PER_SECOND = 1.0
+DEFAULT_BURST = 4
+
+
+class TokenBucket:
+    """In-process bucket: `rate` tokens per second, holding at most `burst`"""
+
+    def __init__(self, name: str, rate: float, burst: int):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waits = 0
+        self.waited_seconds = 0.0
+        self.rejections = 0
+
+    def _take(self) -> float:
+        """Take a token if one is available; otherwise return seconds until one is"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, timeout: float) -> bool:
+        """Block until a token is available or `timeout` seconds pass"""
+        deadline = time.monotonic() + timeout
+        waited = False
+        start = time.monotonic()
+        while True:
+            wait = self._take()
+            if wait == 0:
+                if waited:
+                    with self._lock:
+                        self.waits += 1
+                        self.waited_seconds += time.monotonic() - start
+                return True
+            if time.monotonic() + wait > deadline:
+                with self._lock:
+                    self.rejections += 1
+                return False
+            waited = True
+            time.sleep(wait)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "rate_per_second": self.rate,
+                "burst": self.burst,
+                "waits": self.waits,
+                "waited_seconds": round(self.waited_seconds, 3),
+                "rejections": self.rejections,
+            }
+
+
+class SQLiteTokenBucket(TokenBucket):
+    """Same bucket, but its state lives in a SQLite row shared by all workers"""
+
+    def __init__(self, name: str, rate: float, burst: int, path: str = RATE_LIMIT_DB_PATH):
+        super().__init__(name, rate, burst)
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _take(self) -> float:
+        conn = self._conn()
+        # Wall-clock time, since monotonic clocks are not comparable across processes
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)).fetchone()
+            tokens = float(self.burst) if row is None else min(self.burst, row[0] + max(0.0, now - row[1]) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                (self.name, tokens, now)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+
+def create_limiters(providers: Iterable[str]) -> Dict[str, TokenBucket]:
+    bucket_class = SQLiteTokenBucket if RATE_LIMIT_BACKEND == "sqlite" else TokenBucket
+    limiters = {}
+    for name in providers:
+        prefix = name.upper()
+        rate = float(os.getenv(f"{prefix}_RATE_PER_SECOND", str(DEFAULT_RATE_PER_SECOND)))
+        burst = int(os.getenv(f"{prefix}_BURST", str(DEFAULT_BURST)))
+        limiters[name] = bucket_class(name, rate, burst)
+    return limiters
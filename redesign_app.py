@@ -8,35 +8,78 @@ import io
 import json
 import os
 import uuid
-import requests
 import time
 import warnings
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Optional
-from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import quote
-from supabase import create_client, Client
-from supabase.lib.client_options import ClientOptions as SyncClientOptions
+from supabase import Client
 import httpx
 
 from dotenv import load_dotenv
 # --- MODIFICATION: Import session, redirect, url_for, and flash ---
-from flask import Blueprint, jsonify, render_template, request, session, redirect, url_for, flash
+from flask import (Blueprint, Response, current_app, jsonify, render_template, request, send_file,
+                   session, redirect, stream_with_context, url_for, flash)
 from flask_cors import CORS
 from PIL import Image
 from pydantic import BaseModel, Field, ValidationError
 
+import image_cache
+from blob_store import BlobStore
+from design_jobs import DesignJobQueue, JobQueueFull
+from design_store import create_design_store
+from designer_recommender import DesignerRecommender
+from profile_cache import DesignerProfileCache
+from facet_index import FacetIndex
+from designer_search import DesignerSearchIndex
+from data_access import (
+    get_supabase, pool_stats as supabase_pool_stats, reads as supabase_reads, round_trip_stats, toggle_row
+)
+from image_ingest import UploadRejected, ingest_upload
+from llm_client import get_llm
+from provider_http import PROVIDER_CONNECT_TIMEOUT, ProviderTransport
+from provider_router import ProviderError, ProviderRouter, parse_retry_after
+from rate_limit import create_limiters
+
 # Suppress SSL warnings
 warnings.filterwarnings('ignore', message='Unverified HTTPS request')
 
 load_dotenv()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-http_client = httpx.Client(verify=False)
-# options = SyncClientOptions(httpx_client=http_client)
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# The same client (and connection pool) app.py uses, see data_access.py
+supabase: Client = get_supabase()
+
+# Columnar designer matrix for /api/recommend-designers and the homeowner dashboard
+designer_recommender = DesignerRecommender(supabase)
+designer_profiles = DesignerProfileCache(supabase)
+designer_facets = FacetIndex(supabase)
+designer_search = DesignerSearchIndex(supabase)
+
+
+def designer_written(designer_id, row=None):
+    """
+    Bring every local copy of a designer up to date after a write to the
+    designers table. Pass the written row when the write returned it;
+    otherwise it is re-read once.
+    """
+    try:
+        designer_profiles.invalidate(designer_id)
+        if row is None:
+            row = designer_profiles.get_by_id(designer_id)
+        if row is None:
+            designer_recommender.remove(designer_id)
+            designer_facets.remove(designer_id)
+            designer_search.remove(designer_id)
+            return
+        designer_profiles.put(row)
+        designer_recommender.upsert(row)
+        designer_facets.upsert(row)
+        designer_search.upsert(row)
+    except Exception as e:
+        # The write itself succeeded; the periodic reloads will catch up
+        print(f"[WARN] Could not sync designer {designer_id} to local indexes: {e}")
 
 # ===========================
 # FLASK BLUEPRINT SETUP
@@ -47,12 +90,50 @@ supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 redesign_bp = Blueprint('redesign', __name__, template_folder='templates')
 CORS(redesign_bp) # Apply CORS to the blueprint
 
-DESIGN_DATABASE: Dict[str, Dict] = {}
+# Recently generated designs, so a like can find them (see design_store.py)
+design_store = create_design_store()
+
+# Generated images live here and are referenced by /redesign/blobs/<hash> URLs
+blob_store = BlobStore()
+BLOB_MAX_AGE = 365 * 24 * 3600
 
 # FREE API Options - Choose one
 API_PROVIDER = os.getenv("API_PROVIDER", "pollinations")
 print(f"[INFO] Using API Provider: {API_PROVIDER}")
 
+# Providers to fail over to, in order. By default every provider that has its
+# API key configured (Pollinations needs none).
+_DEFAULT_FALLBACKS = ",".join(
+    name for name, key in (("pollinations", None), ("segmind", "SEGMIND_API_KEY"), ("huggingface", "HUGGINGFACE_API_KEY"))
+    if key is None or os.getenv(key)
+)
+API_PROVIDER_FALLBACKS = [
+    p.strip() for p in os.getenv("API_PROVIDER_FALLBACKS", _DEFAULT_FALLBACKS).split(",") if p.strip()
+]
+
+# "concurrent" fans the styles of a request out over the generator's thread
+# pool; "sequential" generates them one at a time. Either way, pacing against
+# the providers comes from the shared token buckets in rate_limit.py.
+GENERATION_MODE = os.getenv("GENERATION_MODE", "concurrent")
+MAX_DESIGNS_PER_REQUEST = 4
+
+NEGATIVE_PROMPT = "ugly, blurry, low quality, distorted"
+
+# Request parameters per provider. They are part of the image cache key, so any
+# change here naturally stops serving images made with the old settings.
+GENERATION_PARAMS = {
+    "pollinations": {"width": 768, "height": 768, "nologo": "true", "enhance": "true"},
+    "segmind": {"width": 768, "height": 768, "samples": 1, "steps": 20, "negative_prompt": NEGATIVE_PROMPT},
+    "huggingface": {"negative_prompt": NEGATIVE_PROMPT},
+}
+
+# How many generations may be in flight at once against each provider
+PROVIDER_PARALLELISM = {
+    "pollinations": int(os.getenv("POLLINATIONS_PARALLELISM", "4")),
+    "segmind": int(os.getenv("SEGMIND_PARALLELISM", "2")),
+    "huggingface": int(os.getenv("HUGGINGFACE_PARALLELISM", "2")),
+}
+
 
 # ===========================
 # ENUMS & DATA MODELS
@@ -145,11 +226,44 @@ def resize_image(image: Image.Image, max_size: int = 768) -> Image.Image:
 
 class DesignGenerator:
     def __init__(self):
-        self.executor = ThreadPoolExecutor(max_workers=1)
         self.provider = API_PROVIDER
-
-    def generate_designs(self, image: Image.Image, preferences: UserPreferences) -> List[DesignResponse]:
-        """Generate room designs using free APIs"""
+        self.cache = image_cache.ImageCache()
+        # Pooled keep-alive connections, one client per provider
+        self.http = ProviderTransport()
+        
+        primary = self.provider
+        if primary not in GENERATION_PARAMS:
+            print(f"[WARNING] Unknown provider: {primary}, using Pollinations")
+            primary = "pollinations"
+        self.router = ProviderRouter(
+            {
+                "pollinations": self._generate_pollinations,
+                "segmind": self._generate_segmind,
+                "huggingface": self._generate_huggingface,
+            },
+            [primary] + [p for p in API_PROVIDER_FALLBACKS if p != primary],
+            limiters=create_limiters(GENERATION_PARAMS),
+            min_call_seconds=PROVIDER_CONNECT_TIMEOUT
+        )
+        print(f"[INFO] Provider order: {self.router.order}")
+        self.parallelism = max(1, PROVIDER_PARALLELISM.get(self.provider, 1))
+        # Shared by all requests in this process, so the pool size is also the
+        # cap on concurrent calls made to the provider.
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.parallelism,
+            thread_name_prefix=f"design-{self.provider}"
+        )
+
+    def generate_designs(
+        self,
+        image: Image.Image,
+        preferences: UserPreferences,
+        on_design: Optional[Callable[[int, Dict], None]] = None
+    ) -> List[DesignResponse]:
+        """
+        Generate room designs using free APIs.
+        `on_design(position, design)` is called as soon as each design is ready.
+        """
         
         if image.mode not in ('RGB', 'RGBA'):
             image = image.convert('RGB')
@@ -160,31 +274,93 @@ class DesignGenerator:
         image.save(buffered, format="PNG")
         image_b64 = base64.b64encode(buffered.getvalue()).decode()
         
+        styles = preferences.styles[:MAX_DESIGNS_PER_REQUEST]
         print(f"Image size: {image.size}")
-        print(f"Generating {len(preferences.styles)} designs...")
+        print(f"Generating {len(styles)} designs ({GENERATION_MODE}, parallelism={self.parallelism})...")
+        
+        if GENERATION_MODE == "sequential":
+            results = self._run_sequential(image_b64, styles, preferences, on_design)
+        else:
+            results = self._run_concurrent(image_b64, styles, preferences, on_design)
         
+        # Results come back in the order the styles were requested; failed
+        # styles are dropped so the rest of the request still succeeds.
         designs = []
-        for idx, style in enumerate(preferences.styles[:4]):
+        for result in results:
+            if result:
+                designs.append(result)
+        
+        return designs
+
+    @staticmethod
+    def _publish(result: DesignResponse, position: int, on_design: Optional[Callable[[int, Dict], None]]):
+        design_store.put(result.design_id, result.dict())
+        if on_design:
+            try:
+                on_design(position, result.dict())
+            except Exception as e:
+                print(f"[ERROR] Could not publish design {result.design_id}: {e}")
+
+    def _run_concurrent(
+        self,
+        image_b64: str,
+        styles: List[DesignStyle],
+        preferences: UserPreferences,
+        on_design: Optional[Callable[[int, Dict], None]] = None
+    ) -> List[Optional[DesignResponse]]:
+        """Generate all styles at once on the executor, one slot per style"""
+        results: List[Optional[DesignResponse]] = [None] * len(styles)
+        futures = {
+            self.executor.submit(self._generate_single_design, image_b64, style, preferences): idx
+            for idx, style in enumerate(styles)
+        }
+        
+        for future in as_completed(futures):
+            idx = futures[future]
+            style = styles[idx]
+            try:
+                results[idx] = future.result()
+            except Exception as e:
+                print(f"[ERROR] Error generating {style.value}: {e}")
+                import traceback
+                traceback.print_exc()
+                continue
+            
+            if results[idx]:
+                self._publish(results[idx], idx, on_design)
+                print(f"[OK] Generated {style.value}")
+            else:
+                print(f"[FAIL] Failed to generate {style.value}")
+        
+        return results
+
+    def _run_sequential(
+        self,
+        image_b64: str,
+        styles: List[DesignStyle],
+        preferences: UserPreferences,
+        on_design: Optional[Callable[[int, Dict], None]] = None
+    ) -> List[Optional[DesignResponse]]:
+        """Generate styles one after another"""
+        results: List[Optional[DesignResponse]] = []
+        for idx, style in enumerate(styles):
             try:
                 result = self._generate_single_design(image_b64, style, preferences)
+                results.append(result)
                 if result:
-                    designs.append(result)
-                    DESIGN_DATABASE[result.design_id] = result.dict()
+                    self._publish(result, idx, on_design)
                     print(f"[OK] Generated {style.value}")
                 else:
                     print(f"[FAIL] Failed to generate {style.value}")
-                
-                # Rate limiting between requests
-                if idx < len(preferences.styles) - 1:
-                    time.sleep(1)
             
             except Exception as e:
                 print(f"[ERROR] Error generating {style.value}: {e}")
                 import traceback
                 traceback.print_exc()
+                results.append(None)
                 continue
         
-        return designs
+        return results
 
     def _generate_single_design(
         self, 
@@ -214,20 +390,28 @@ class DesignGenerator:
             
             print(f"[{style.value}] Generating with prompt length: {len(prompt)}")
             
-            if self.provider == "pollinations":
-                output_url = self._generate_pollinations(prompt)
-            elif self.provider == "segmind":
-                output_url = self._generate_segmind(prompt)
-            elif self.provider == "huggingface":
-                output_url = self._generate_huggingface(prompt)
-            else:
-                print(f"[WARNING] Unknown provider: {self.provider}, using Pollinations")
-                output_url = self._generate_pollinations(prompt)
+            # An image from any provider we would route to is good enough
+            image_data = None
+            for provider in self.router.order:
+                image_data = self.cache.get(self._cache_key(provider, prompt))
+                if image_data:
+                    print(f"[{style.value}] Served from image cache ({provider})")
+                    break
             
-            if not output_url:
-                print(f"[{style.value}] Failed - no output URL")
+            cache_key = None
+            if not image_data:
+                provider, image_data = self.router.generate(prompt)
+                cache_key = self._cache_key(provider, prompt)
+            
+            if not image_data:
+                print(f"[{style.value}] Failed - no image data")
                 return None
             
+            blob_name = blob_store.put(image_data)
+            if cache_key:
+                # Same bytes as the blob: link to it rather than keep two copies
+                self.cache.put(cache_key, image_data, source_path=blob_store.path(blob_name))
+            output_url = blob_store.url(blob_name)
             processing_time = (datetime.now() - start_time).total_seconds()
             
             return DesignResponse(
@@ -243,7 +427,23 @@ class DesignGenerator:
             traceback.print_exc()
             return None
 
-    def _generate_pollinations(self, prompt: str) -> Optional[str]:
+    @staticmethod
+    def _cache_key(provider: str, prompt: str) -> str:
+        params = GENERATION_PARAMS[provider]
+        return image_cache.make_key(provider, prompt, params.get("width"), params.get("height"), params)
+
+    @staticmethod
+    def _status_error(name: str, response) -> ProviderError:
+        """Turn a non-200 provider response into a ProviderError for the router"""
+        print(f"[ERROR] {name} error {response.status_code}")
+        print(f"Response: {response.text[:200]}")
+        return ProviderError(
+            f"{name} HTTP {response.status_code}",
+            retry_after=parse_retry_after(response.headers),
+            retryable=response.status_code == 429 or response.status_code >= 500
+        )
+
+    def _generate_pollinations(self, prompt: str, timeout: float = 120) -> Optional[bytes]:
         """Pollinations.ai - Fixed version with proper error handling"""
         try:
             # Clean and encode prompt properly
@@ -254,12 +454,7 @@ class DesignGenerator:
             url = f"https://image.pollinations.ai/prompt/{encoded_prompt}"
             
             # Add parameters for better results
-            params = {
-                "width": 768,
-                "height": 768,
-                "nologo": "true",
-                "enhance": "true"
-            }
+            params = GENERATION_PARAMS["pollinations"]
             
             # Build URL with params
             param_str = "&".join([f"{k}={v}" for k, v in params.items()])
@@ -273,13 +468,14 @@ class DesignGenerator:
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
             }
             
-            # Make request with SSL verification disabled and longer timeout
-            response = requests.get(
+            # Pooled connection with a longer read timeout, capped by the router's deadline
+            timeout = min(120, timeout)
+            response = self.http.get(
+                "pollinations",
                 full_url, 
                 headers=headers, 
-                timeout=120, 
-                allow_redirects=True,
-                verify=False
+                read_timeout=timeout, 
+                follow_redirects=True
             )
             
             print(f"Response status: {response.status_code}")
@@ -290,38 +486,38 @@ class DesignGenerator:
                 content_type = response.headers.get('Content-Type', '')
                 if 'image' in content_type or len(response.content) > 1000:
                     image_data = response.content
-                    image_b64 = base64.b64encode(image_data).decode()
                     print(f"[OK] Pollinations Success! Image size: {len(image_data)} bytes")
-                    return f"data:image/png;base64,{image_b64}"
+                    return image_data
                 else:
                     print(f"[ERROR] Response is not an image: {content_type}")
                     print(f"Response text: {response.text[:200]}")
                     return None
             else:
-                print(f"[ERROR] Pollinations error {response.status_code}")
-                print(f"Response: {response.text[:200]}")
-                return None
+                raise self._status_error("Pollinations", response)
         
-        except requests.exceptions.Timeout:
-            print(f"[ERROR] Pollinations timeout after 120s")
-            return None
-        except requests.exceptions.ConnectionError as e:
+        except ProviderError:
+            raise
+        except httpx.TimeoutException:
+            print(f"[ERROR] Pollinations timeout after {timeout:.0f}s")
+            # Waiting that long again would blow the deadline; fail over instead
+            raise ProviderError("Pollinations timeout", retryable=False)
+        except httpx.TransportError as e:
             print(f"[ERROR] Pollinations connection error: {e}")
-            return None
+            raise ProviderError(f"Pollinations connection error: {e}")
         except Exception as e:
             print(f"[ERROR] Pollinations error: {e}")
             import traceback
             traceback.print_exc()
             return None
 
-    def _generate_segmind(self, prompt: str) -> Optional[str]:
+    def _generate_segmind(self, prompt: str, timeout: float = 90) -> Optional[bytes]:
         """Segmind API - Free tier option"""
         try:
             api_key = os.getenv("SEGMIND_API_KEY")
             
             if not api_key:
                 print("[ERROR] Segmind API key not found in .env")
-                return None
+                raise ProviderError("Segmind API key missing", retryable=False)
             
             url = "https://api.segmind.com/v1/sd1.5-txt2img"
             
@@ -332,38 +528,34 @@ class DesignGenerator:
             
             payload = {
                 "prompt": prompt,
-                "negative_prompt": "ugly, blurry, low quality, distorted",
-                "samples": 1,
-                "steps": 20,
-                "width": 768,
-                "height": 768
+                **GENERATION_PARAMS["segmind"]
             }
             
             print(f"Calling Segmind API...")
-            response = requests.post(url, headers=headers, json=payload, timeout=90, verify=False)
+            response = self.http.post("segmind", url, headers=headers, json=payload, read_timeout=min(90, timeout))
             
             if response.status_code == 200:
-                image_data = response.content
-                image_b64 = base64.b64encode(image_data).decode()
                 print(f"[OK] Segmind Success!")
-                return f"data:image/png;base64,{image_b64}"
+                return response.content
             else:
-                print(f"[ERROR] Segmind error: {response.status_code}")
-                print(f"Response: {response.text[:200]}")
-                return None
+                raise self._status_error("Segmind", response)
         
+        except ProviderError:
+            raise
+        except httpx.TimeoutException:
+            raise ProviderError("Segmind timeout", retryable=False)
         except Exception as e:
             print(f"[ERROR] Segmind error: {e}")
             return None
 
-    def _generate_huggingface(self, prompt: str) -> Optional[str]:
+    def _generate_huggingface(self, prompt: str, timeout: float = 90) -> Optional[bytes]:
         """HuggingFace Inference API - Free tier"""
         try:
             api_key = os.getenv("HUGGINGFACE_API_KEY")
             
             if not api_key:
                 print("[ERROR] HuggingFace API key not found in .env")
-                return None
+                raise ProviderError("HuggingFace API key missing", retryable=False)
             
             url = "https://api-inference.huggingface.co/models/runwayml/stable-diffusion-v1-5"
             
@@ -374,27 +566,30 @@ class DesignGenerator:
             
             payload = {
                 "inputs": prompt,
-                "parameters": {
-                    "negative_prompt": "ugly, blurry, low quality, distorted"
-                }
+                "parameters": GENERATION_PARAMS["huggingface"]
             }
             
             print(f"Calling HuggingFace API...")
-            response = requests.post(url, headers=headers, json=payload, timeout=90, verify=False)
+            response = self.http.post("huggingface", url, headers=headers, json=payload, read_timeout=min(90, timeout))
             
             if response.status_code == 200:
-                image_data = response.content
-                image_b64 = base64.b64encode(image_data).decode()
                 print(f"[OK] HuggingFace Success!")
-                return f"data:image/png;base64,{image_b64}"
+                return response.content
             elif response.status_code == 503:
-                print(f"[ERROR] HuggingFace model loading, retry in 20s...")
-                return None
+                # The body says how long the model needs to load
+                try:
+                    estimated_time = float(response.json().get("estimated_time", 20))
+                except Exception:
+                    estimated_time = parse_retry_after(response.headers) or 20
+                print(f"[ERROR] HuggingFace model loading, retry in {estimated_time:.0f}s...")
+                raise ProviderError("HuggingFace model loading", retry_after=estimated_time)
             else:
-                print(f"[ERROR] HuggingFace error: {response.status_code}")
-                print(f"Response: {response.text[:200]}")
-                return None
+                raise self._status_error("HuggingFace", response)
         
+        except ProviderError:
+            raise
+        except httpx.TimeoutException:
+            raise ProviderError("HuggingFace timeout", retryable=False)
         except Exception as e:
             print(f"[ERROR] HuggingFace error: {e}")
             return None
@@ -406,6 +601,33 @@ class DesignGenerator:
 # ===========================
 
 generator = DesignGenerator()
+job_queue = DesignJobQueue(generator.generate_designs)
+
+# How long an event stream stays open before the client has to reconnect
+JOB_EVENTS_MAX_SECONDS = int(os.getenv("JOB_EVENTS_MAX_SECONDS", "600"))
+
+
+def _async_worker() -> bool:
+    """True under a gevent/eventlet worker, where an open stream costs a greenlet, not a thread"""
+    try:
+        from gevent import monkey
+        if monkey.is_module_patched("socket"):
+            return True
+    except ImportError:
+        pass
+    try:
+        from eventlet import patcher
+        return patcher.is_monkey_patched("socket")
+    except ImportError:
+        return False
+
+
+# An event stream holds its worker for up to JOB_EVENTS_MAX_SECONDS, which a
+# sync worker cannot afford, so by default it is only offered to clients under
+# an async worker; everyone else polls /api/jobs/<id>?since=.
+# JOB_EVENTS_SSE=true/false overrides the detection.
+_JOB_EVENTS_SSE = os.getenv("JOB_EVENTS_SSE", "auto").lower()
+JOB_EVENTS_SSE = _async_worker() if _JOB_EVENTS_SSE == "auto" else _JOB_EVENTS_SSE in ("1", "true", "yes")
 
 # --- *** THIS IS THE CRITICAL FIX *** ---
 @redesign_bp.route("/upload")
@@ -428,9 +650,56 @@ def upload_wizard():
 # --- *** END OF FIX *** ---
 
 
+def _parse_generation_request():
+    """
+    Validate an upload + preferences form.
+    Returns (image, preferences, None) or (None, None, error_response).
+    """
+    if 'image' not in request.files:
+        return None, None, (jsonify({"detail": "No image file provided"}), 400)
+    if 'preferences' not in request.form:
+        return None, None, (jsonify({"detail": "No preferences provided"}), 400)
+
+    image_file = request.files['image']
+    preferences_str = request.form['preferences']
+    
+    # Parse preferences
+    try:
+        user_prefs = UserPreferences(**json.loads(preferences_str))
+    except ValidationError as e:
+        print(f"Validation error: {e}")
+        return None, None, (jsonify({"detail": f"Invalid preferences: {str(e)}"}), 400)
+    except json.JSONDecodeError as e:
+        print(f"JSON error: {e}")
+        return None, None, (jsonify({"detail": f"Invalid JSON in preferences: {str(e)}"}), 400)
+    
+    # Process image: limits are checked before decoding, and the photo is
+    # decoded at close to the size the providers need
+    try:
+        pil_image, ingest_stats = ingest_upload(image_file.stream)
+            
+        print(
+            f"Processing image: {ingest_stats['source_size']} -> {pil_image.size} "
+            f"(decoded at {ingest_stats['decoded_size']}, "
+            f"peak ~{ingest_stats['peak_bytes'] / (1024 * 1024):.1f} MB, {ingest_stats['elapsed_ms']} ms)"
+        )
+        print(f"Room: {user_prefs.room_type}, Styles: {[s.value for s in user_prefs.styles]}")
+        
+    except UploadRejected as e:
+        print(f"Upload rejected: {e}")
+        return None, None, (jsonify({"detail": str(e)}), 413)
+    except Exception as e:
+        print(f"Image error: {e}")
+        import traceback
+        traceback.print_exc()
+        return None, None, (jsonify({"detail": f"Invalid image file: {str(e)}"}), 400)
+
+    return pil_image, user_prefs, None
+
+
 @redesign_bp.route("/api/generate", methods=['POST'])
 def generate_room_designs():
-    """Generate interior designs"""
+    """Generate interior designs (blocks until every design is done)"""
     
     # --- ADDED: A login check for the API endpoint too ---
     if "user" not in session:
@@ -438,40 +707,9 @@ def generate_room_designs():
     # --- END ADDITION ---
 
     try:
-        # Validate request
-        if 'image' not in request.files:
-            return jsonify({"detail": "No image file provided"}), 400
-        if 'preferences' not in request.form:
-            return jsonify({"detail": "No preferences provided"}), 400
-
-        image_file = request.files['image']
-        preferences_str = request.form['preferences']
-        
-        # Parse preferences
-        try:
-            user_prefs = UserPreferences(**json.loads(preferences_str))
-        except ValidationError as e:
-            print(f"Validation error: {e}")
-            return jsonify({"detail": f"Invalid preferences: {str(e)}"}), 400
-        except json.JSONDecodeError as e:
-            print(f"JSON error: {e}")
-            return jsonify({"detail": f"Invalid JSON in preferences: {str(e)}"}), 400
-        
-        # Process image
-        try:
-            pil_image = Image.open(image_file.stream)
-            
-            if pil_image.mode not in ('RGB', 'RGBA'):
-                pil_image = pil_image.convert('RGB')
-                
-            print(f"Processing image: {pil_image.size}")
-            print(f"Room: {user_prefs.room_type}, Styles: {[s.value for s in user_prefs.styles]}")
-            
-        except Exception as e:
-            print(f"Image error: {e}")
-            import traceback
-            traceback.print_exc()
-            return jsonify({"detail": f"Invalid image file: {str(e)}"}), 400
+        pil_image, user_prefs, error = _parse_generation_request()
+        if error:
+            return error
         
         # Generate designs
         designs = generator.generate_designs(pil_image, user_prefs)
@@ -496,6 +734,125 @@ def generate_room_designs():
         }), 500
 
 
+# ===========================
+# ASYNC GENERATION JOBS
+# ===========================
+
+@redesign_bp.route("/api/jobs", methods=['POST'])
+def submit_generation_job():
+    """Queue a generation job and return its ID straight away"""
+
+    if "user" not in session:
+        return jsonify({"detail": "Authentication required."}), 401
+
+    try:
+        pil_image, user_prefs, error = _parse_generation_request()
+        if error:
+            return error
+
+        total = len(user_prefs.styles[:MAX_DESIGNS_PER_REQUEST])
+        try:
+            job_id = job_queue.submit(session["user"]["id"], pil_image, user_prefs, total)
+        except JobQueueFull as e:
+            print(f"[JOB] Rejected submission: {e}")
+            return jsonify({"detail": "The design generator is busy. Please try again in a minute."}), 503, {"Retry-After": "30"}
+
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "total": total,
+            "status_url": url_for("redesign.get_generation_job", job_id=job_id)
+        }
+        if JOB_EVENTS_SSE:
+            job["events_url"] = url_for("redesign.stream_generation_job", job_id=job_id)
+        return jsonify(job), 202
+
+    except Exception as e:
+        print(f"CRITICAL Job submission error: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            "detail": f"Server error: {str(e)}",
+            "error_type": type(e).__name__
+        }), 500
+
+
+def _load_job(job_id: str, since: int = 0):
+    """Fetch a job for the logged-in user, or (None, error_response)"""
+    job = job_queue.get(job_id, since)
+    if not job or job["user_id"] != session["user"]["id"]:
+        return None, (jsonify({"detail": "Job not found."}), 404)
+    return job, None
+
+
+@redesign_bp.route("/api/jobs/<string:job_id>", methods=['GET'])
+def get_generation_job(job_id: str):
+    """
+    Poll a job. Pass ?since=<seq> to receive only designs finished after the
+    last one you already have.
+    """
+    if "user" not in session:
+        return jsonify({"detail": "Authentication required."}), 401
+
+    job, error = _load_job(job_id, request.args.get("since", 0, type=int))
+    if error:
+        return error
+    return jsonify(job)
+
+
+@redesign_bp.route("/api/jobs/<string:job_id>/events", methods=['GET'])
+def stream_generation_job(job_id: str):
+    """
+    Server-Sent Events: one `design` event per finished design, then a final
+    `status` event. Reconnecting with Last-Event-ID resumes where it stopped.
+    Only served when JOB_EVENTS_SSE is on.
+    """
+    if "user" not in session:
+        return jsonify({"detail": "Authentication required."}), 401
+    if not JOB_EVENTS_SSE:
+        return jsonify({"detail": "Event streams are disabled; poll the job's status_url instead."}), 404
+
+    since = request.headers.get("Last-Event-ID", request.args.get("since", "0"))
+    since = int(since) if str(since).isdigit() else 0
+    job, error = _load_job(job_id, since)
+    if error:
+        return error
+
+    def events(job, since):
+        deadline = time.monotonic() + JOB_EVENTS_MAX_SECONDS
+        while True:
+            for design in job["designs"]:
+                since = design["seq"]
+                yield f"id: {since}\nevent: design\ndata: {json.dumps(design)}\n\n"
+
+            if job["status"] not in ("queued", "running"):
+                status = {
+                    "job_id": job_id,
+                    "status": job["status"],
+                    "error": job["error"],
+                    "completed": job["completed"],
+                    "total": job["total"]
+                }
+                yield f"event: status\ndata: {json.dumps(status)}\n\n"
+                return
+
+            if time.monotonic() > deadline:
+                return
+
+            # Comment line keeps proxies from closing an idle stream
+            yield ": waiting\n\n"
+            time.sleep(0.5)
+            job = job_queue.get(job_id, since)
+            if not job:
+                return
+
+    return Response(
+        stream_with_context(events(job, since)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @redesign_bp.route("/api/designs/<string:design_id>/like", methods=['POST'])
 def like_design(design_id: str):
     """Toggle like status and save to Supabase."""
@@ -506,41 +863,82 @@ def like_design(design_id: str):
     user = session["user"]
     user_id = user["id"]
 
-    # Find the design in our temporary database
-    design_data = DESIGN_DATABASE.get(design_id)
+    # Find the design in the shared design store
+    design_data = design_store.get(design_id)
     if not design_data:
-        return jsonify({"detail": "Design not found or app was restarted."}), 404
+        return jsonify({"detail": "Design not found or it has expired."}), 404
 
     try:
-        # Check if it's already liked in the database
-        existing_like = supabase.table("saved_ai_designs") \
-            .select("id") \
-            .eq("user_id", user_id) \
-            .eq("design_id", design_id) \
-            .execute()
-
-        if existing_like.data:
-            # UN-like (DELETE)
-            supabase.table("saved_ai_designs").delete().eq("id", existing_like.data[0]["id"]).execute()
+        # Saved designs must outlive blob eviction
+        blob_store.pin_url(design_data["image_url"])
+        # Delete-or-insert: the delete tells us whether the like existed
+        liked = toggle_row(
+            supabase,
+            "saved_ai_designs",
+            {"user_id": user_id, "design_id": design_data["design_id"]},
+            {"style": design_data["style"], "image_url": design_data["image_url"]}
+        )
+        if not liked:
             print(f"User {user_id} UN-liked AI design {design_id}")
             return jsonify({"status": "unliked", "design_id": design_id, "liked": False})
 
-        else:
-            # LIKE (INSERT)
-            new_like = {
-                "user_id": user_id,
-                "design_id": design_data["design_id"],
-                "style": design_data["style"],
-                "image_url": design_data["image_url"]
-            }
-            supabase.table("saved_ai_designs").insert(new_like).execute()
-            print(f"User {user_id} LIKED AI design {design_id}")
-            return jsonify({"status": "liked", "design_id": design_id, "liked": True})
+        print(f"User {user_id} LIKED AI design {design_id}")
+        return jsonify({"status": "liked", "design_id": design_id, "liked": True})
 
     except Exception as e:
         print(f"ERROR LIKING AI DESIGN: {e}")
         return jsonify({"error": str(e)}), 500
 
+@redesign_bp.route("/blobs/<string:name>", methods=['GET'])
+def serve_blob(name: str):
+    """Serve a generated image. Blob names are content hashes, so they never change."""
+    located = blob_store.locate(name)
+    if not located:
+        return jsonify({"detail": "Image not found."}), 404
+
+    path, mimetype = located
+    # conditional=True answers If-None-Match with 304 and Range with 206
+    response = send_file(
+        path,
+        mimetype=mimetype,
+        conditional=True,
+        etag=name.split(".")[0],
+        max_age=BLOB_MAX_AGE
+    )
+    response.headers["Cache-Control"] = f"public, max-age={BLOB_MAX_AGE}, immutable"
+    return response
+
+
+@redesign_bp.cli.command("migrate-images")
+def migrate_saved_images():
+    """Move base64 images in saved_ai_designs into the blob store."""
+    migrated = 0
+    last_id = None
+    while True:
+        query = supabase.table("saved_ai_designs") \
+            .select("id, image_url") \
+            .like("image_url", "data:%") \
+            .order("id") \
+            .limit(50)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.execute().data or []
+        if not rows:
+            break
+
+        for row in rows:
+            last_id = row["id"]
+            url = blob_store.from_data_url(row["image_url"])
+            if not url:
+                print(f"[WARNING] Could not decode image for saved design {row['id']}")
+                continue
+            blob_store.pin_url(url)
+            supabase.table("saved_ai_designs").update({"image_url": url}).eq("id", row["id"]).execute()
+            migrated += 1
+
+    print(f"[OK] Migrated {migrated} saved designs to the blob store")
+
+
 @redesign_bp.route("/api/styles", methods=['GET'])
 def get_available_styles():
     """Get all available design styles"""
@@ -564,13 +962,58 @@ def get_room_types():
     return jsonify([e.value for e in RoomType])
 
 
+@redesign_bp.route("/api/recommend-designers", methods=['POST'])
+def recommend_designers():
+    """Top designers for the chosen styles, optionally weighted by room, budget and city"""
+    if "user" not in session:
+        return jsonify({"detail": "Authentication required."}), 401
+
+    data = request.get_json(silent=True) or {}
+    try:
+        k = max(1, min(int(data.get("k", 5)), 50))
+        designers = designer_recommender.recommend(
+            styles=data.get("styles"),
+            room_type=data.get("room_type"),
+            budget=data.get("budget"),
+            city=data.get("city"),
+            k=k
+        )
+    except ValueError:
+        return jsonify({"detail": "k must be a number."}), 400
+    except Exception as e:
+        print(f"[ERROR] Designer recommendation failed: {e}")
+        return jsonify({"detail": "Could not load designer recommendations."}), 500
+
+    return jsonify(designers)
+
+
+# Cache, pool and round-trip counters describe the backend, so /health only
+# reports them in debug or when asked for; otherwise it is a liveness check
+HEALTH_DETAIL = os.getenv("HEALTH_DETAIL", "false").lower() in ("1", "true", "yes")
+
+
 @redesign_bp.route("/health", methods=['GET'])
 def health_check():
     """Health check"""
+    if not (current_app.debug or HEALTH_DETAIL):
+        return jsonify({"status": "healthy"})
+
     return jsonify({
         "status": "healthy", 
         "service": "Interior AI FREE (Blueprint)",
-        "provider": API_PROVIDER
+        "provider": API_PROVIDER,
+        "image_cache": generator.cache.get_stats(),
+        "blob_store": blob_store.get_stats(),
+        "design_store": design_store.stats(),
+        "provider_http": generator.http.stats(),
+        "provider_router": generator.router.stats(),
+        "designer_profiles": designer_profiles.stats(),
+        "designer_facets": designer_facets.stats(),
+        "designer_search": designer_search.stats(),
+        "supabase_single_flight": supabase_reads.stats(),
+        "supabase_pool": supabase_pool_stats(),
+        "supabase_round_trips": round_trip_stats(),
+        "gemini": get_llm().stats()
     })
 
 
@@ -597,11 +1040,10 @@ def designer_profile():
 
     # 2) Fetch designer details
     try:
-        response = supabase.table("designers").select("*").eq("id", designer_id).limit(1).execute()
-        if not response.data:
+        designer = designer_profiles.get_by_id(designer_id)
+        if not designer:
             flash("Designer profile not found.", "error")
             return redirect(url_for("dashboard"))
-        designer = response.data[0]
     except Exception as e:
         print(f"[ERROR] Could not fetch designer: {e}")
         flash("Database error fetching profile.", "error")
@@ -640,6 +1082,7 @@ def designer_profile():
             # IMPORTANT: Do not delete keys from the payload here.
             # Let Supabase set fields to null if you explicitly want to.
             supabase.table("designers").update(updated_data).eq("id", designer_id).execute()
+            designer_written(designer_id)
 
             # Supabase .update() may return empty .data — treat execute success as success if no exception
             flash("✅ Profile updated successfully!", "success")
@@ -0,0 +1,28 @@
+-- Interior AI - designer rating columns
+-- designers.avg_rating / review_count back the directory's rating filter and
+-- sort (designer_listing.py). designer_stats.publish_rating keeps them current
+-- after each review; this backfills them from designer_reviews once.
+
+alter table public.designers
+    add column if not exists avg_rating numeric(3, 2),
+    add column if not exists review_count integer not null default 0;
+
+update public.designers d
+set avg_rating = r.avg_rating,
+    review_count = r.review_count
+from (
+    select designer_email,
+           round(avg(rating)::numeric, 2) as avg_rating,
+           count(*)::integer as review_count
+    from public.designer_reviews
+    group by designer_email
+) r
+where r.designer_email = d.email;
+
+-- Keyset pagination indexes, one per sort in designer_listing.SORTS
+create index if not exists designers_name_id_idx
+    on public.designers (designer_name, id);
+create index if not exists designers_budget_min_id_idx
+    on public.designers (budget_range_min nulls last, id);
+create index if not exists designers_rating_id_idx
+    on public.designers (avg_rating desc nulls last, id);
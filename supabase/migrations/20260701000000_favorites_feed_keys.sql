@@ -0,0 +1,18 @@
+-- Interior AI - favorites feed keys
+-- favorites_feed.py pages saved_favorites and saved_ai_designs newest first
+-- by (created_at, id). Both columns are added where a table lacks them (rows
+-- saved before this get the migration time), and each table gets the index
+-- that keyset order needs.
+
+alter table public.saved_favorites
+    add column if not exists id bigint generated by default as identity,
+    add column if not exists created_at timestamptz not null default now();
+
+alter table public.saved_ai_designs
+    add column if not exists id bigint generated by default as identity,
+    add column if not exists created_at timestamptz not null default now();
+
+create index if not exists saved_favorites_user_created_id_idx
+    on public.saved_favorites (user_id, created_at desc, id desc);
+create index if not exists saved_ai_designs_user_created_id_idx
+    on public.saved_ai_designs (user_id, created_at desc, id desc);
@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# app.py builds its Supabase client and local stores at import time; point
+# them at a dummy project and a throwaway instance folder
+os.environ.setdefault("SUPABASE_URL", "http://postgrest.test")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.test")
+os.environ.setdefault("INSTANCE_DIR", tempfile.mkdtemp(prefix="interior-ai-test-"))
+os.environ["DB_ROUND_TRIP_HEADER"] = "true"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,82 @@
+"""
+JsonEventParser fed in pieces: every split of a document has to report the
+same (path, value) events as feeding it in one go, wherever a chunk boundary
+falls (inside strings, escapes, numbers or between nested brackets).
+"""
+
+import json
+
+import pytest
+
+from json_stream import JsonEventParser
+
+DOCUMENTS = [
+    '{"recommendations": ["Use warm \\"ivory\\" paint", "Add a C:\\\\ rug", "caf\\u00e9 lights"], "total": 125000}',
+    '{"phases": [[1, 2.5, [true, null]], [], [["deep"]]], "note": "a } and ] inside"}',
+    '```json\n{"items": [{"name": "Sofa", "cost": -1.5e3}, {"name": "Lamp, brass", "cost": 40}]}\n```',
+]
+
+
+def events(chunks, max_depth=2):
+    parser = JsonEventParser(max_depth=max_depth)
+    found = []
+    for chunk in chunks:
+        found.extend(parser.feed(chunk))
+    return found
+
+
+def every_two_way_split(text):
+    for cut in range(len(text) + 1):
+        yield [text[:cut], text[cut:]]
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+def test_one_character_chunks_match_a_single_feed(document):
+    assert events(list(document)) == events([document])
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+def test_every_split_point_matches_a_single_feed(document):
+    expected = events([document])
+    for chunks in every_two_way_split(document):
+        assert events(chunks) == expected, chunks
+
+
+def test_escapes_split_between_backslash_and_character():
+    document = DOCUMENTS[0]
+    cut = document.index('\\"ivory') + 1
+
+    found = dict(events([document[:cut], document[cut:]]))
+
+    assert found[("recommendations", 0)] == 'Use warm "ivory" paint'
+    assert found[("recommendations", 1)] == "Add a C:\\ rug"
+    assert found[("recommendations", 2)] == "café lights"
+    assert found[("total",)] == 125000
+
+
+def test_nested_arrays_are_reported_up_to_max_depth():
+    document = DOCUMENTS[1]
+
+    shallow = events(list(document), max_depth=2)
+    deep = events(list(document), max_depth=4)
+
+    assert (("phases", 0), [1, 2.5, [True, None]]) in shallow
+    assert (("phases", 1), []) in shallow
+    assert all(len(path) <= 2 for path, _ in shallow)
+    assert (("phases", 0, 2, 1), None) in deep
+    assert (("phases", 2, 0, 0), "deep") in deep
+    assert ((), json.loads(document)) not in deep
+
+
+def test_brackets_inside_strings_do_not_close_containers():
+    found = dict(events(list(DOCUMENTS[1])))
+
+    assert found[("note",)] == "a } and ] inside"
+    assert found[("phases",)] == json.loads(DOCUMENTS[1])["phases"]
+
+
+def test_text_around_the_document_is_ignored():
+    found = events(list(DOCUMENTS[2]))
+
+    assert (("items", 1), {"name": "Lamp, brass", "cost": 40}) in found
+    assert found[-1] == (("items",), json.loads(DOCUMENTS[2].strip("`json\n"))["items"])
@@ -0,0 +1,95 @@
+"""
+Calendar arithmetic in project_schedule: weekends, holidays (explicit and
+from a named calendar) and the inputs schedule() refuses.
+"""
+
+import pytest
+
+from project_schedule import ScheduleError, schedule
+
+
+def dates(result, name):
+    phase = next(p for p in result["phases"] if p["name"] == name)
+    return phase["start_date"], phase["end_date"]
+
+
+def test_weekend_start_rolls_forward_and_phases_follow_each_other():
+    # 2026-01-03 is a Saturday
+    result = schedule("2026-01-03", [
+        {"name": "Design", "duration_weeks": 1},
+        {"name": "Civil", "duration_weeks": 0.5},
+    ])
+
+    assert dates(result, "Design") == ("2026-01-05", "2026-01-09")
+    assert dates(result, "Civil") == ("2026-01-12", "2026-01-14")
+    assert result["end_date"] == "2026-01-14"
+    assert result["working_days"] == 8
+    assert result["total_project_days"] == 10
+
+
+def test_explicit_holiday_is_skipped_like_a_weekend():
+    # Wednesday off pushes a five-day phase over the weekend to Monday
+    result = schedule("2026-01-19", [{"name": "Design", "duration_weeks": 1}], holidays=["2026-01-21"])
+
+    assert dates(result, "Design") == ("2026-01-19", "2026-01-26")
+    assert result["phases"][0]["working_days"] == 5
+
+
+def test_six_day_week_counts_saturdays():
+    result = schedule(
+        "2026-01-19", [{"name": "Design", "duration_weeks": 1}], work_week_days=6, holidays=["2026-01-21"]
+    )
+
+    assert dates(result, "Design") == ("2026-01-19", "2026-01-26")
+    assert result["phases"][0]["working_days"] == 6
+
+
+def test_named_calendar_skips_republic_day():
+    result = schedule("2026-01-22", [{"name": "Design", "duration_weeks": 1}], calendar="india_national")
+
+    # Thu, Fri, then Mon 26 January is a holiday
+    assert dates(result, "Design") == ("2026-01-22", "2026-01-29")
+
+
+def test_phase_starting_on_a_holiday_rolls_to_the_next_working_day():
+    result = schedule("2026-10-01", [
+        {"name": "Design", "duration_weeks": 0.2},
+        {"name": "Civil", "duration_weeks": 0.2},
+    ], calendar="india_national")
+
+    # Design takes Thu 1 October; Fri 2 October is Gandhi Jayanti
+    assert dates(result, "Design") == ("2026-10-01", "2026-10-01")
+    assert dates(result, "Civil") == ("2026-10-05", "2026-10-05")
+
+
+def test_empty_depends_on_runs_in_parallel_with_the_first_phase():
+    result = schedule("2026-01-05", [
+        {"name": "Design", "duration_weeks": 2},
+        {"name": "Procurement", "duration_weeks": 1, "depends_on": []},
+        {"name": "Install", "duration_weeks": 1, "depends_on": ["Design", "Procurement"]},
+    ])
+
+    assert dates(result, "Procurement") == ("2026-01-05", "2026-01-09")
+    assert dates(result, "Install") == ("2026-01-19", "2026-01-23")
+
+
+@pytest.mark.parametrize("kwargs, message", [
+    ({"holidays": ["26/01/2026"]}, "holidays must be a YYYY-MM-DD date"),
+    ({"calendar": "mars_national"}, "unknown holiday calendar"),
+    ({"work_week_days": 4}, "work_week must be 5, 6 or 7"),
+])
+def test_rejected_calendar_inputs(kwargs, message):
+    with pytest.raises(ScheduleError, match=message):
+        schedule("2026-01-05", [{"name": "Design", "duration_weeks": 1}], **kwargs)
+
+
+@pytest.mark.parametrize("phases, message", [
+    ([], "at least one phase"),
+    ([{"name": "Design", "duration_weeks": 0}], "positive duration"),
+    ([{"name": "Design", "duration_weeks": 1, "depends_on": ["Survey"]}], "unknown phases"),
+    ([{"name": "A", "duration_weeks": 1, "depends_on": ["B"]},
+      {"name": "B", "duration_weeks": 1, "depends_on": ["A"]}], "cycle"),
+])
+def test_rejected_phases(phases, message):
+    with pytest.raises(ScheduleError, match=message):
+        schedule("2026-01-05", phases)
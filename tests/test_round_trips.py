@@ -0,0 +1,127 @@
+"""
+Round trips per route against a fake PostgREST. The fake replaces the
+network layer under data_access.PooledTransport, so every request the views
+make is counted exactly as in production and reported in X-DB-Round-Trips.
+"""
+
+import json
+from urllib.parse import urlparse
+
+import httpx
+import pytest
+
+import app as app_module
+import data_access
+
+DESIGNER = {
+    "id": "11111111-1111-1111-1111-111111111111",
+    "email": "designer@example.com",
+    "designer_name": "Asha Rao",
+    "specialisation": "Residential",
+    "location": "Bengaluru",
+    "avg_rating": 4.5,
+    "review_count": 2,
+}
+
+
+class FakePostgrest:
+    """Answers /rest/v1/<table> with canned rows per (method, table)"""
+
+    def __init__(self):
+        self.responses = {}
+        self.requests = []
+
+    def reply(self, method: str, table: str, rows):
+        self.responses[(method, table)] = rows
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        table = urlparse(str(request.url)).path.rsplit("/", 1)[-1]
+        self.requests.append((request.method, table))
+        rows = self.responses.get((request.method, table), [])
+        return httpx.Response(200, json=rows, headers={"Content-Type": "application/json"})
+
+
+@pytest.fixture
+def postgrest():
+    data_access.get_supabase()
+    transport = data_access._transport
+    real = transport._inner
+    fake = FakePostgrest()
+    transport._inner = httpx.MockTransport(fake)
+    app_module.designer_profiles.invalidate(designer_id=DESIGNER["id"])
+    try:
+        yield fake
+    finally:
+        transport._inner = real
+
+
+def client_as(role: str):
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session["user"] = {"id": DESIGNER["id"] if role == "designer" else "user-1", "name": "Test",
+                           "email": "user@example.com", "role": role}
+    return client
+
+
+def round_trips(response) -> int:
+    return int(response.headers["X-DB-Round-Trips"])
+
+
+def test_view_designer_is_one_embedded_select(postgrest):
+    postgrest.reply("GET", "designers", [
+        {**DESIGNER, "designer_portfolio": [{"project_title": "Loft", "uploaded_at": "2026-01-01"}]}
+    ])
+    response = client_as("user").get(f"/designer/{DESIGNER['id']}")
+
+    assert response.status_code == 200
+    assert b"Loft" in response.data
+    assert round_trips(response) == 1
+    assert postgrest.requests == [("GET", "designers")]
+
+
+def test_health_is_liveness_only_by_default(postgrest):
+    response = app_module.app.test_client().get("/redesign/health")
+
+    assert response.status_code == 200
+    assert response.get_json() == {"status": "healthy"}
+
+
+def test_unlike_is_one_round_trip_and_like_two(postgrest):
+    client = client_as("user")
+
+    postgrest.reply("DELETE", "saved_favorites", [{"user_id": "user-1", "designer_id": DESIGNER["id"]}])
+    unlike = client.post(f"/api/designer/{DESIGNER['id']}/like")
+    postgrest.reply("DELETE", "saved_favorites", [])
+    like = client.post(f"/api/designer/{DESIGNER['id']}/like")
+
+    assert unlike.get_json()["status"] == "unliked" and round_trips(unlike) == 1
+    assert like.get_json()["status"] == "liked" and round_trips(like) == 2
+
+
+def test_answering_a_pending_booking_is_one_update(postgrest):
+    postgrest.reply("PATCH", "designer_bookings", [
+        {"id": 7, "designer_email": DESIGNER["email"], "notes": "Budget 50000", "booking_status": "confirmed"}
+    ])
+    response = client_as("designer").post("/api/booking/update/7", json={"status": "confirmed"})
+
+    assert response.status_code == 200
+    assert round_trips(response) == 1
+    assert postgrest.requests == [("PATCH", "designer_bookings")]
+
+
+def test_designer_listing_is_one_page_plus_likes(postgrest):
+    postgrest.reply("GET", "designers", [DESIGNER])
+    response = client_as("user").get("/api/designers?sort=rating&min_rating=4")
+
+    assert response.status_code == 200
+    assert round_trips(response) == 2
+    assert postgrest.requests == [("GET", "designers"), ("GET", "saved_favorites")]
+
+
+def test_round_trip_header_is_off_by_default(postgrest, monkeypatch):
+    monkeypatch.setattr(app_module, "DB_ROUND_TRIP_HEADER", False)
+    postgrest.reply("GET", "designers", [DESIGNER])
+    response = client_as("user").get("/api/designers")
+
+    assert "X-DB-Round-Trips" not in response.headers
+    assert json.loads(response.data)